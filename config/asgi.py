@@ -13,4 +13,5 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
+# /stream/quotes/ (SSE) cần ASGI: uvicorn config.asgi:application
 application = get_asgi_application()
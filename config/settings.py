@@ -14,6 +14,7 @@ import os
 import dj_database_url
 from pathlib import Path
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 
 # Load environment variables
 load_dotenv()
@@ -88,11 +89,11 @@ if 'DATABASE_URL' in os.environ:
         )
     }
 else:
-    # Local (SQLite)
+    # Local (SQLite); SQLITE_PATH để dùng file DB khác (vd. benchmark_asgi)
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
         }
     }
 
@@ -100,7 +101,7 @@ else:
 if 'DATABASE_URL' not in os.environ:
     DATABASES['default'] = {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
     }
 
 # Password validation
@@ -164,14 +165,121 @@ SESSION_SAVE_EVERY_REQUEST = True
 # API Keys for external services
 FRED_API_KEY = os.getenv('FRED_API_KEY', 'your_fred_api_key_here')
 
+# Market data provider (dotted path). Dùng FixtureMarketDataProvider để chạy offline:
+# MARKET_DATA_PROVIDER=finance_dashboard.services.market_data.FixtureMarketDataProvider
+MARKET_DATA_PROVIDER = os.getenv('MARKET_DATA_PROVIDER', 'finance_dashboard.services.market_data.MarketDataProvider')
+MARKET_DATA_PROVIDER_OPTIONS = {}
+if os.getenv('MARKET_DATA_FIXTURE_DIR'):
+    MARKET_DATA_PROVIDER_OPTIONS['fixture_dir'] = os.getenv('MARKET_DATA_FIXTURE_DIR')
+if os.getenv('MARKET_DATA_FIXTURE_LATENCY'):
+    # Giả lập upstream chậm (giây mỗi download), xem manage.py benchmark_asgi
+    MARKET_DATA_PROVIDER_OPTIONS['latency'] = float(os.getenv('MARKET_DATA_FIXTURE_LATENCY'))
+
+# Bar store (bảng PriceBar): số giây trước khi refresh incremental từ provider,
+# và period backfill lần đầu cho một symbol
+BAR_STORE_MAX_AGE = int(os.getenv('BAR_STORE_MAX_AGE', 900))
+BAR_STORE_BACKFILL_PERIOD = os.getenv('BAR_STORE_BACKFILL_PERIOD', '1y')
+# Symbol không có dữ liệu (ticker sai / delisted) không gọi lại upstream trong N giây
+MARKET_DATA_NO_DATA_TTL = int(os.getenv('MARKET_DATA_NO_DATA_TTL', 3600))
+
+# Single-flight cho cache miss: 'local' (coalesce trong process) hoặc
+# 'cache' (thêm lock dùng chung trong cache để coalesce giữa các workers)
+SINGLEFLIGHT_MODE = os.getenv('SINGLEFLIGHT_MODE', 'local')
+
+# Stale-while-revalidate cho market payloads: hard TTL = soft TTL * factor;
+# quá soft TTL thì trả giá trị cũ và refresh ở background worker
+MARKET_CACHE_HARD_TTL_FACTOR = int(os.getenv('MARKET_CACHE_HARD_TTL_FACTOR', 6))
+MARKET_CACHE_REFRESH_WORKERS = int(os.getenv('MARKET_CACHE_REFRESH_WORKERS', 2))
+MARKET_CACHE_BACKGROUND_REFRESH = os.getenv('MARKET_CACHE_BACKGROUND_REFRESH', 'True') == 'True'
+# Marker "đang refresh" (dùng chung giữa workers) tự hết hạn sau N giây nếu worker chết giữa chừng
+MARKET_CACHE_REFRESH_LOCK_TIMEOUT = int(os.getenv('MARKET_CACHE_REFRESH_LOCK_TIMEOUT', 60))
+
+# Macro panel: số fetch song song và timeout (giây) cho từng nguồn
+MACRO_FETCH_WORKERS = int(os.getenv('MACRO_FETCH_WORKERS', 4))
+MACRO_SOURCE_TIMEOUTS = {
+    'yahoo': float(os.getenv('MACRO_YAHOO_TIMEOUT', 10)),
+    'fred': float(os.getenv('MACRO_FRED_TIMEOUT', 5)),
+}
+# Tile không có dữ liệu được nhớ bấy nhiêu giây trước khi fetch lại (fragments vẫn cache được)
+MACRO_MISSING_TILE_TTL = int(os.getenv('MACRO_MISSING_TILE_TTL', 300))
+
+# Circuit breaker + rate limiter (token bucket) cho từng upstream, xem services/circuit_breaker.py.
+# failure_threshold lỗi liên tiếp -> open trong recovery_timeout giây; rate = số call/giây.
+UPSTREAM_LIMITS = {
+    'yahoo': {'failure_threshold': 5, 'recovery_timeout': 60, 'rate': 2.0, 'burst': 5, 'max_wait': 2.0},
+    'fred': {'failure_threshold': 3, 'recovery_timeout': 300, 'rate': 1.0, 'burst': 2, 'max_wait': 1.0},
+    # FixtureMarketDataProvider là local, không cần giới hạn thực tế
+    'fixture': {'rate': 1000.0, 'burst': 1000},
+}
+
+# Refresher daemon (manage.py refresh_market_data): universe mặc định lấy từ các
+# symbols views đang dùng; schedule là {interval: số giây giữa hai lần refresh}.
+# MARKET_DATA_READ_ONLY_VIEWS=True -> views không gọi upstream, chỉ đọc bar store/cache
+# (cần cache dùng chung với process của daemon để các payload được warm có hiệu lực).
+MARKET_DATA_UNIVERSE = [s for s in os.getenv('MARKET_DATA_UNIVERSE', '').split(',') if s] or None
+MARKET_DATA_REFRESH_SCHEDULE = {'1d': int(os.getenv('MARKET_DATA_REFRESH_SECONDS', 900))}
+MARKET_DATA_REFRESH_CONCURRENCY = int(os.getenv('MARKET_DATA_REFRESH_CONCURRENCY', 4))
+MARKET_DATA_REFRESH_JITTER = float(os.getenv('MARKET_DATA_REFRESH_JITTER', 0.1))
+MARKET_DATA_READ_ONLY_VIEWS = os.getenv('MARKET_DATA_READ_ONLY_VIEWS', 'False') == 'True'
+
+# Async views (finance_dashboard/async_views.py) cho home/analysis/ajax/search/chart khi
+# chạy dưới ASGI: uvicorn config.asgi:application. Các call blocking (yfinance, FRED,
+# bar store) chạy trong executor tối đa ASYNC_UPSTREAM_WORKERS threads mỗi process.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
+ASYNC_UPSTREAM_WORKERS = int(os.getenv('ASYNC_UPSTREAM_WORKERS', 16))
+
+# SSE quote stream (/stream/quotes/, chỉ dưới ASGI): một producer mỗi worker lấy
+# dữ liệu mỗi QUOTE_STREAM_INTERVAL giây cho tất cả connections
+QUOTE_STREAM = {
+    'interval': int(os.getenv('QUOTE_STREAM_INTERVAL', 15)),
+    'heartbeat': 20,
+    'max_connections': int(os.getenv('QUOTE_STREAM_MAX_CONNECTIONS', 10000)),
+    'max_per_client': 20,
+    'max_symbols': 30,
+}
+
 # Cache configuration
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-        'TIMEOUT': 3600,  # 1 hour default timeout
-        'OPTIONS': {
-            'MAX_ENTRIES': 1000,
+# MARKET_CACHE_MODE:
+#   'locmem' - cache riêng trong từng process (mỗi gunicorn worker tự fetch), mặc định
+#   'shared' - file SQLite (WAL) MARKET_CACHE_PATH dùng chung cho mọi worker trên máy
+#   'tiered' - L1 LocMem TTL ngắn cho các key hot + L2 shared
+#   'dummy'  - không cache, mỗi request tới provider (benchmark upstream chậm)
+# 'shared' / 'tiered' ghi file trên disk -> chỉ bật qua environment
+# Counters hit/miss/eviction theo tier: /metrics/market-data/
+MARKET_CACHE_MODE = os.getenv('MARKET_CACHE_MODE', 'locmem')
+MARKET_CACHE_PATH = os.getenv('MARKET_CACHE_PATH', str(BASE_DIR / 'cache' / 'market_cache.sqlite3'))
+
+if MARKET_CACHE_MODE == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'finance_dashboard.services.cache_backends.StatsLocMemCache',
+            'LOCATION': 'unique-snowflake',
+            'TIMEOUT': 3600,  # 1 hour default timeout
+            'OPTIONS': {
+                'MAX_ENTRIES': 1000,
+            }
         }
     }
-}
\ No newline at end of file
+elif MARKET_CACHE_MODE in ('shared', 'tiered'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'finance_dashboard.services.cache_backends.'
+                       + ('SQLiteCache' if MARKET_CACHE_MODE == 'shared' else 'TieredCache'),
+            'LOCATION': MARKET_CACHE_PATH,
+            'TIMEOUT': 3600,
+            'OPTIONS': {
+                'MAX_ENTRIES': int(os.getenv('MARKET_CACHE_MAX_ENTRIES', 5000)),
+            }
+        }
+    }
+    if MARKET_CACHE_MODE == 'tiered':
+        CACHES['default']['OPTIONS'].update({
+            'L1_TIMEOUT': int(os.getenv('MARKET_CACHE_L1_TIMEOUT', 5)),
+            'L1_MAX_ENTRIES': 200,
+            # Payloads đọc ở mỗi page view; lock/marker keys không qua L1
+            'L1_PREFIXES': ('macro_tile_', 'technical_', 'chart_data_', 'symbol_', 'sparkline_', 'json_fragment_'),
+        })
+elif MARKET_CACHE_MODE == 'dummy':
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+else:
+    raise ImproperlyConfigured(f"Unknown MARKET_CACHE_MODE: {MARKET_CACHE_MODE}")
\ No newline at end of file
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class FinanceDashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'finance_dashboard'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        from . import signals  # noqa: F401 (PortfolioAnalytics hooks)
+        post_migrate.connect(signals.install_insight_search, sender=self)
@@ -0,0 +1,105 @@
+# finance_dashboard/async_views.py
+"""
+Async (ASGI-native) versions của các trang I/O-bound: home, analysis, analysis_ajax,
+search, chart. Bật bằng ASYNC_VIEWS=True khi deploy dưới uvicorn config.asgi:application.
+
+Các phần dữ liệu của một trang được lấy đồng thời (asyncio.gather) trong executor
+giới hạn của services.async_market; ORM chỉ chạy trong thread (run_blocking /
+sync_to_async), context và HTML dùng chung helpers với views sync.
+"""
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import render
+
+from finance_dashboard.services.async_market import run_blocking
+from finance_dashboard.services.conditional_get import conditional
+from finance_dashboard.services.json_fragments import FragmentResponse
+from finance_dashboard.services.quote_service import (
+    ETF_FLOW_TICKERS, get_etf_flows, get_multiple_chart_data, get_real_chart_data,
+    get_real_search_data_many, get_sparklines, get_symbols_data,
+)
+from .views import (
+    ANALYSIS_PAIRS, _ajax_macro_fragments, _ajax_signals_fragment, _analysis_ajax_data,
+    _analysis_ajax_version, _analysis_context, _analysis_params, _chart_html, _chart_version,
+    _home_context, _home_symbols, _search_html, _search_matches, _search_version,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def home(request):
+    chart_pairs, symbols, quote_symbols = _home_symbols()
+
+    quotes, sparklines, all_chart_data, etf_flows = await asyncio.gather(
+        run_blocking(get_symbols_data, quote_symbols),
+        run_blocking(get_sparklines, symbols, points=20),
+        run_blocking(get_multiple_chart_data, chart_pairs),
+        run_blocking(get_etf_flows, ETF_FLOW_TICKERS),
+    )
+
+    context = await run_blocking(_home_context, quotes, sparklines, all_chart_data, etf_flows)
+    return await sync_to_async(render)(request, "finance_dashboard/home.html", context)
+
+
+async def analysis(request):
+    from .services.analysis_service import AnalysisService
+    analysis_service = AnalysisService()
+    params = _analysis_params(request)
+    yf_pair = params[1]
+
+    macro_data, technical_by_pair, gainers_losers = await asyncio.gather(
+        run_blocking(analysis_service.get_macro_data),
+        run_blocking(analysis_service.get_technical_analyses, [yf_pair] + [pair + '=X' for pair in ANALYSIS_PAIRS]),
+        run_blocking(analysis_service.get_forex_gainers_losers),
+    )
+
+    context = await run_blocking(_analysis_context, analysis_service, params, macro_data, technical_by_pair, gainers_losers)
+    return await sync_to_async(render)(request, "finance_dashboard/analysis.html", context)
+
+
+@conditional(_analysis_ajax_version)
+async def analysis_ajax(request):
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Invalid request method'}, status=405)
+
+    from .services.analysis_service import AnalysisService, SIGNAL_INDICATORS
+    from .services.analysis_fragments import SIGNAL_PAIRS, indicator_fragment
+    analysis_service = AnalysisService()
+    params = _analysis_params(request)
+    pair, yf_pair, indicator, macro_indicator = params
+
+    async def skip():
+        return None
+
+    try:
+        versions = await run_blocking(analysis_service.bar_versions, [yf_pair, *SIGNAL_PAIRS])
+        # Technical, macro và signals lấy đồng thời; signals bỏ đi nếu technical không có
+        technical_data, macro_tiles, signals = await asyncio.gather(
+            run_blocking(indicator_fragment, analysis_service, yf_pair, [indicator, *SIGNAL_INDICATORS], versions)
+            if pair else skip(),
+            run_blocking(_ajax_macro_fragments, analysis_service) if macro_indicator else skip(),
+            run_blocking(_ajax_signals_fragment, analysis_service, versions) if pair else skip(),
+        )
+        response_data = await run_blocking(_analysis_ajax_data, params, technical_data, macro_tiles, signals)
+    except Exception as e:
+        logger.error(f"Error in analysis_ajax: {e}")
+        response_data = {'error': f'Server error: {str(e)}', 'success': False}
+
+    return FragmentResponse(response_data)
+
+
+@conditional(_search_version)
+async def search_view(request):
+    query = request.GET.get('query', '').upper()
+    matches = _search_matches(query)
+    data = await run_blocking(get_real_search_data_many, matches) if matches else {}
+    return HttpResponse(_search_html(query, matches, data))
+
+
+@conditional(_chart_version)
+async def chart_view(request, symbol):
+    real_data = await run_blocking(get_real_chart_data, symbol)
+    return HttpResponse(_chart_html(symbol, real_data))
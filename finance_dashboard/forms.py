@@ -150,7 +150,7 @@ class InsightForm(forms.ModelForm):
         model = Insight
         fields = [
             'title', 'summary', 'category', 'result',
-            'reason', 'analysis', 'lessons', 'metrics',
+            'reason', 'analysis', 'lessons', 'metrics', 'tags',
             'attached_file', 'attached_image'  # THÊM FIELD FILE
         ]
         widgets = {
@@ -159,6 +159,7 @@ class InsightForm(forms.ModelForm):
             'reason': forms.Textarea(attrs={'rows': 3}),
             'analysis': forms.Textarea(attrs={'rows': 3}),
             'lessons': forms.Textarea(attrs={'rows': 2}),
+            'tags': forms.TextInput(attrs={'placeholder': 'forex, breakout'}),
             # THÊM WIDGET CHO FILE UPLOAD
             'attached_file': forms.FileInput(attrs={'class': 'form-control'}),
             'attached_image': forms.FileInput(attrs={'class': 'form-control'}),
@@ -169,6 +170,12 @@ class InsightForm(forms.ModelForm):
         for field in self.fields:
             self.fields[field].required = False
 
+    def clean_tags(self):
+        # Form không gửi tags (modal cũ) -> giữ tags hiện có thay vì xóa
+        if self.is_bound and 'tags' not in self.data:
+            return self.instance.tags
+        return self.cleaned_data.get('tags') or ''
+
     # THÊM CLEAN METHOD ĐỂ VALIDATE FILE
     def clean(self):
         cleaned_data = super().clean()
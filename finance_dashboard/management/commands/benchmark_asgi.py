@@ -0,0 +1,120 @@
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = '/,/analysis/ajax/?pair=EURUSD&indicator=RSI_14,/search/?query=USD,/chart/EURUSD/'
+
+
+class Command(BaseCommand):
+    help = (
+        'Requests/s and latency percentiles of the dashboard pages: sync views under gunicorn (WSGI) '
+        'vs async views under uvicorn (ASGI), against FixtureMarketDataProvider with simulated '
+        'upstream latency and no cache (every request reaches the provider)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--latency', type=float, default=0.2, help='Simulated upstream seconds per download')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per deployment')
+        parser.add_argument('--concurrency', type=int, default=32, help='Concurrent clients')
+        parser.add_argument('--workers', type=int, default=1, help='Server processes')
+        parser.add_argument('--threads', type=int, default=8,
+                            help='gunicorn threads per worker / ASYNC_UPSTREAM_WORKERS for uvicorn')
+        parser.add_argument('--paths', default=DEFAULT_PATHS, help='Comma separated paths, requested round robin')
+        parser.add_argument('--modes', default='wsgi,asgi')
+
+    def handle(self, *args, **options):
+        logging.getLogger('urllib3').setLevel(logging.WARNING)
+        paths = [path for path in options['paths'].split(',') if path]
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(
+                os.environ,
+                DJANGO_SETTINGS_MODULE='config.settings',
+                DEBUG='True',  # static không cần collectstatic manifest
+                SQLITE_PATH=os.path.join(tmp, 'bench.sqlite3'),
+                MARKET_DATA_PROVIDER='finance_dashboard.services.market_data.FixtureMarketDataProvider',
+                MARKET_DATA_FIXTURE_LATENCY=str(options['latency']),
+                MARKET_CACHE_MODE='dummy',
+                MARKET_CACHE_BACKGROUND_REFRESH='False',
+                ASYNC_UPSTREAM_WORKERS=str(options['threads']),
+            )
+            env.pop('DATABASE_URL', None)
+            subprocess.run([sys.executable, 'manage.py', 'migrate', '--noinput', '-v', '0'],
+                           cwd=settings.BASE_DIR, env=env, check=True)
+
+            self.stdout.write(
+                f"latency={options['latency']}s requests={options['requests']} concurrency={options['concurrency']} "
+                f"workers={options['workers']} threads={options['threads']}"
+            )
+            self.stdout.write(f"{'deployment':<10} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+            for mode in [mode.strip() for mode in options['modes'].split(',') if mode.strip()]:
+                port = self._free_port()
+                server = subprocess.Popen(self._server_command(mode, port, options),
+                                          cwd=settings.BASE_DIR, env=dict(env, ASYNC_VIEWS=str(mode == 'asgi')),
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                try:
+                    base = f"http://127.0.0.1:{port}"
+                    self._wait_ready(base, server)
+                    # Warm-up: import, kết nối DB, templates
+                    for path in paths:
+                        requests.get(base + path, timeout=60)
+                    rps, p50, p99, errors = self._load(base, paths, options['requests'], options['concurrency'])
+                    self.stdout.write(f"{mode:<10} {rps:>8.1f} {p50:>8.0f} {p99:>8.0f} {errors:>7}")
+                finally:
+                    server.terminate()
+                    server.wait(timeout=30)
+
+    def _server_command(self, mode, port, options):
+        bind = ['127.0.0.1', str(port)]
+        if mode == 'wsgi':
+            return [sys.executable, '-m', 'gunicorn', 'config.wsgi:application', '--bind', ':'.join(bind),
+                    '--workers', str(options['workers']), '--threads', str(options['threads']),
+                    '--worker-class', 'gthread', '--log-level', 'warning']
+        if mode == 'asgi':
+            return [sys.executable, '-m', 'uvicorn', 'config.asgi:application', '--host', bind[0], '--port', bind[1],
+                    '--workers', str(options['workers']), '--log-level', 'warning']
+        raise CommandError(f"Unknown mode: {mode}")
+
+    def _free_port(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
+
+    def _wait_ready(self, base, server, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"Server exited with code {server.returncode}")
+            try:
+                requests.get(base + '/about/', timeout=5)
+                return
+            except requests.ConnectionError:
+                time.sleep(0.2)
+        raise CommandError('Server did not start')
+
+    def _load(self, base, paths, total, concurrency):
+        def one(i):
+            started = time.perf_counter()
+            try:
+                ok = requests.get(base + paths[i % len(paths)], timeout=120).status_code == 200
+            except requests.RequestException:
+                ok = False
+            return time.perf_counter() - started, ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(one, range(total)))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for latency, _ in results)
+        percentile = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+        errors = sum(1 for _, ok in results if not ok)
+        return total / elapsed, percentile(0.5), percentile(0.99), errors
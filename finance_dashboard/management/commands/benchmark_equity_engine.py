@@ -0,0 +1,64 @@
+import time
+from decimal import Decimal
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from finance_dashboard.services.equity_engine import equity_curve, max_drawdown, risk_metrics
+
+
+class Command(BaseCommand):
+    help = (
+        'Times the max drawdown equity walk: Python float loop (old portfolio view), Decimal loop '
+        '(old Portfolio.max_drawdown) and the NumPy equity engine, on synthetic trade PnLs'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,100000,1000000', help='Comma separated trade counts')
+        parser.add_argument('--initial', type=float, default=10000.0, help='Starting equity')
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(42)
+        initial = options['initial']
+
+        self.stdout.write(f"{'trades':>9} {'float loop ms':>14} {'decimal loop ms':>16} {'engine dd ms':>13} "
+                          f"{'all metrics ms':>15} {'max dd %':>9}")
+        for size in [int(size) for size in options['sizes'].split(',')]:
+            pnls = np.round(rng.normal(2.0, 50.0, size), 2)
+
+            float_ms, float_dd = self._time(lambda: self._float_loop(pnls.tolist(), initial))
+            decimals = [Decimal(str(pnl)) for pnl in pnls.tolist()]
+            decimal_ms, decimal_dd = self._time(lambda: self._decimal_loop(decimals, Decimal(str(initial))))
+            engine_ms, engine_dd = self._time(lambda: max_drawdown(equity_curve(pnls, initial)))
+            metrics_ms, _ = self._time(lambda: risk_metrics(pnls, initial))
+
+            if not (np.isclose(engine_dd, float_dd) and np.isclose(engine_dd, float(decimal_dd))):
+                self.stdout.write(self.style.ERROR(f"{size}: max drawdown mismatch {engine_dd} / {float_dd} / {decimal_dd}"))
+            self.stdout.write(f"{size:>9} {float_ms:>14.1f} {decimal_ms:>16.1f} {engine_ms:>13.2f} "
+                              f"{metrics_ms:>15.2f} {engine_dd * 100:>9.2f}")
+
+    def _time(self, fn):
+        started = time.perf_counter()
+        result = fn()
+        return (time.perf_counter() - started) * 1000, result
+
+    def _float_loop(self, pnls, initial):
+        """Như compute_portfolio_analytics trước đây (drawdown dương)"""
+        equity = peak = initial
+        max_dd = 0.0
+        for pnl in pnls:
+            equity += pnl
+            peak = max(peak, equity)
+            dd = (peak - equity) / peak if peak != 0 else 0.0
+            max_dd = max(max_dd, dd)
+        return max_dd
+
+    def _decimal_loop(self, pnls, initial):
+        """Như Portfolio.max_drawdown trước đây"""
+        equity = peak = initial
+        max_dd = Decimal("0")
+        for pnl in pnls:
+            equity += pnl
+            peak = max(peak, equity)
+            max_dd = max(max_dd, (peak - equity) / peak)
+        return max_dd
@@ -0,0 +1,106 @@
+import time
+
+import numpy as np
+import ta
+from django.core.management.base import BaseCommand
+
+from finance_dashboard.services.indicators import TECHNICAL_INDICATORS, compute_indicators
+from finance_dashboard.services.market_data import FixtureMarketDataProvider, symbol_frame
+from finance_dashboard.services.streaming_indicators import technical_indicator_set
+
+
+def ta_indicators(df):
+    """Cách tính cũ: một bộ indicator objects của ``ta`` cho mỗi pair."""
+    df = df.copy()
+    df['SMA_20'] = ta.trend.SMAIndicator(close=df['Close'], window=20).sma_indicator()
+    df['SMA_50'] = ta.trend.SMAIndicator(close=df['Close'], window=50).sma_indicator()
+    df['EMA_12'] = ta.trend.EMAIndicator(close=df['Close'], window=12).ema_indicator()
+    df['EMA_26'] = ta.trend.EMAIndicator(close=df['Close'], window=26).ema_indicator()
+    df['RSI_14'] = ta.momentum.RSIIndicator(close=df['Close'], window=14).rsi()
+    macd = ta.trend.MACD(close=df['Close'], window_fast=12, window_slow=26, window_sign=9)
+    df['MACD_12_26_9'] = macd.macd()
+    df['MACDs_12_26_9'] = macd.macd_signal()
+    bb = ta.volatility.BollingerBands(close=df['Close'], window=20, window_dev=2)
+    df['BBU_20_2.0'] = bb.bollinger_hband()
+    df['BBL_20_2.0'] = bb.bollinger_lband()
+    stoch = ta.momentum.StochasticOscillator(high=df['High'], low=df['Low'], close=df['Close'], window=14, smooth_window=3)
+    df['STOCHk_14_3_3'] = stoch.stoch()
+    df['ATR_14'] = ta.volatility.AverageTrueRange(high=df['High'], low=df['Low'], close=df['Close'], window=14).average_true_range()
+    return df
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks the vectorized indicator engine and the streaming indicator state '
+        'against per-pair ta indicators (synthetic data, no network)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='5,50,500', help='Comma separated symbol counts')
+        parser.add_argument('--period', default='3mo', help='History period per symbol')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is reported)')
+        parser.add_argument('--skip-ta', action='store_true', help='Only time the vectorized engine')
+
+    def handle(self, *args, **options):
+        provider = FixtureMarketDataProvider()
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        symbols = [f'BENCH{i:04d}=X' for i in range(max(sizes))]
+        frame = provider.history(symbols, period=options['period'])
+
+        self.stdout.write(f"{len(frame)} bars per symbol, {len(TECHNICAL_INDICATORS)} indicators")
+        self.stdout.write(f"{'symbols':>8} {'ta ms/pair':>12} {'engine ms/pair':>15} {'speedup':>8} {'max rel err':>12}")
+        for size in sizes:
+            subset = symbols[:size]
+            sub_frame = frame[subset]
+            engine_time = self._best(lambda: compute_indicators(sub_frame, subset), options['repeat'])
+            engine_result = compute_indicators(sub_frame, subset)
+
+            if options['skip_ta']:
+                self.stdout.write(f"{size:>8} {'-':>12} {engine_time / size * 1000:>15.3f}")
+                continue
+
+            per_pair = {symbol: symbol_frame(sub_frame, symbol) for symbol in subset}
+            ta_time = self._best(lambda: [ta_indicators(df) for df in per_pair.values()], options['repeat'])
+            error = self._max_error(engine_result, {symbol: ta_indicators(df) for symbol, df in per_pair.items()})
+            self.stdout.write(
+                f"{size:>8} {ta_time / size * 1000:>12.3f} {engine_time / size * 1000:>15.3f} "
+                f"{ta_time / engine_time:>7.1f}x {error:>12.2e}"
+            )
+
+        self._streaming(frame, symbols[:5])
+
+    def _streaming(self, frame, symbols):
+        """Streaming state: chi phí mỗi bar mới và sai số so với ta trên cùng chuỗi."""
+        results, expected, bars, elapsed = {}, {}, 0, 0.0
+        for symbol in symbols:
+            df = symbol_frame(frame, symbol)
+            state = technical_indicator_set(history=len(df))
+            started = time.perf_counter()
+            results[symbol] = state.advance(df).frame()
+            elapsed += time.perf_counter() - started
+            bars += len(df)
+            expected[symbol] = ta_indicators(df)
+        worst = self._max_error(results, expected)
+        self.stdout.write(
+            f"streaming: {elapsed / bars * 1e6:.1f} us per new bar (all indicators), max rel err vs ta {worst:.2e}"
+        )
+
+    def _best(self, fn, repeat):
+        timings = []
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def _max_error(self, engine_result, ta_result):
+        """Sai số tương đối lớn nhất trên các giá trị cả hai cùng có (ATR warm-up của ta là 0)."""
+        worst = 0.0
+        for symbol, expected in ta_result.items():
+            for name in TECHNICAL_INDICATORS:
+                a = engine_result[symbol][name].to_numpy(dtype=float)
+                b = expected[name].to_numpy(dtype=float)
+                mask = ~np.isnan(a) & ~np.isnan(b) & (b != 0)
+                if mask.any():
+                    worst = max(worst, float(np.max(np.abs(a[mask] - b[mask]) / np.abs(b[mask]))))
+        return worst
@@ -0,0 +1,84 @@
+import statistics
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from finance_dashboard.models import Insight
+from finance_dashboard.services.insight_search import contains_filter
+from finance_dashboard.views import filter_insights
+
+FINANCE_WORDS = [
+    'eurusd', 'gbpusd', 'usdjpy', 'gold', 'breakout', 'support', 'resistance', 'inflation', 'cpi', 'fomc',
+    'yield', 'momentum', 'reversal', 'liquidity', 'stoploss', 'divergence', 'trend', 'range', 'earnings', 'volatility',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Insight search on N synthetic insights in a throwaway test database: the old six-column icontains '
+        'filter vs the full-text index (first page of 6 + count, as the Paginator does)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100000, help='Synthetic insights')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query (median reported)')
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            vocabulary = self._populate(options['count'])
+            self._run(vocabulary, options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def _populate(self, count):
+        rng = np.random.default_rng(7)
+        letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+        vocabulary = FINANCE_WORDS + [''.join(rng.choice(letters, rng.integers(4, 10))) for _ in range(5000)]
+        # Zipf: vài từ rất phổ biến, đa số hiếm (như văn bản thật)
+        weights = 1.0 / np.arange(1, len(vocabulary) + 1)
+        weights /= weights.sum()
+        sizes = {'title': 6, 'summary': 30, 'reason': 15, 'analysis': 25, 'lessons': 10, 'tags': 3}
+        words = np.array(vocabulary, dtype=object)[rng.choice(len(vocabulary), (count, sum(sizes.values())), p=weights)]
+
+        def fields(row):
+            values, start = {}, 0
+            for field, size in sizes.items():
+                values[field] = ' '.join(row[start:start + size])
+                start += size
+            return values
+
+        started = time.perf_counter()
+        insights = (Insight(category='currency', **fields(row)) for row in words)
+        Insight.objects.bulk_create(insights, batch_size=2000)
+        self.stdout.write(f"{count} insights indexed in {time.perf_counter() - started:.1f}s ({connection.vendor})")
+        return vocabulary
+
+    def _run(self, vocabulary, repeat):
+        queries = [
+            ('common word', vocabulary[0]),
+            ('mid word', vocabulary[50]),
+            ('rare word', vocabulary[4000]),
+            ('prefix', vocabulary[50][:3]),
+            ('two words', f'{vocabulary[1]} {vocabulary[60]}'),
+            ('no match', 'zzzzqx'),
+        ]
+        self.stdout.write(f"{'query':<12} {'q':<22} {'matches':>8} {'icontains ms':>13} {'full-text ms':>13}")
+        for label, q in queries:
+            legacy = Insight.objects.filter(contains_filter(q)).order_by('-date')
+            legacy_ms, legacy_count = self._time(legacy, repeat)
+            fts_ms, fts_count = self._time(filter_insights(q), repeat)
+            self.stdout.write(f"{label:<12} {q:<22} {fts_count:>8} {legacy_ms:>13.1f} {fts_ms:>13.1f}"
+                              + (f"  (icontains: {legacy_count})" if legacy_count != fts_count else ''))
+
+    def _time(self, queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset[:6])
+            count = queryset.count()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), count
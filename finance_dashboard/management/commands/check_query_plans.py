@@ -0,0 +1,81 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from finance_dashboard.models import Trade
+from finance_dashboard.services.keyset import keyset_queryset
+from finance_dashboard.views import _filtered_trades, _trades_prefetch, filter_insights
+
+# SQLite: "SCAN <table>" không kèm "USING ..." = đọc cả bảng; Postgres: "Seq Scan on <table>"
+SQLITE_SCAN_RE = re.compile(r'\bSCAN (?:TABLE )?(\w+)(?!.*\bUSING\b)')
+POSTGRES_SCAN_RE = re.compile(r'\bSeq Scan on (\w+)')
+# Cùng các query / regex được assert trong finance_dashboard/tests/test_query_plans.py; command này để chẩn đoán (in plans)
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs EXPLAIN for the hot Trade / Insight queries (details, portfolio, filter_trades, insights, '
+        'search_insights) and fails if any of them falls back to a full table scan (SQLite / PostgreSQL)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not only failures')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Unsupported database vendor: {connection.vendor}')
+
+        failures = []
+        for label, queryset in self._queries():
+            plan = self._explain(queryset)
+            scans = self._full_scans(plan)
+            sort = 'TEMP B-TREE' in plan or re.search(r'^\s*(->\s*)?Sort\b', plan, re.M)
+            status = self.style.ERROR('FULL SCAN ' + ', '.join(scans)) if scans else self.style.SUCCESS('ok')
+            self.stdout.write(f'{label:<40} {status}{" (sort)" if sort else ""}')
+            if scans or options['verbose_plans']:
+                self.stdout.write('    ' + plan.replace('\n', '\n    '))
+            if scans:
+                failures.append(label)
+
+        if failures:
+            raise CommandError(f'{len(failures)} queries without a supporting index: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS(f'All query plans use indexes ({connection.vendor})'))
+
+    def _queries(self):
+        """(label, queryset) như trong views; text search (icontains) không dùng được B-tree index nên không có ở đây"""
+        now = timezone.now()
+        since = now - timedelta(days=30)
+        cursor = {'k': now.isoformat(), 'pk': 1000}
+        trade_cursor = {'k': now.date().isoformat(), 'pk': 1000}
+        return [
+            ('details: trades by symbol', Trade.objects.filter(symbol='EURUSD').order_by('-date')),
+            ('portfolio: trades by type', _trades_prefetch('Live').queryset.filter(portfolio_id__in=[1, 2])),
+            ('portfolio: all trades', _trades_prefetch('All').queryset.filter(portfolio_id__in=[1, 2])),
+            ('filter_trades: by type', _filtered_trades('Live')),
+            ('insights: latest page', filter_insights()[:6]),
+            ('insights: category', filter_insights(category='currency')[:6]),
+            ('insights: category + result', filter_insights(category='currency', result='positive')[:6]),
+            ('insights: result', filter_insights(result='positive')[:6]),
+            ('insights: date range', filter_insights(date_from=since, date_to=now)[:6]),
+            ('insights: category + date range', filter_insights(category='stock', date_from=since, date_to=now)[:6]),
+            # Keyset pagination (services/keyset.py): trang sau cursor
+            ('insights: keyset page', keyset_queryset(filter_insights(), cursor)[:7]),
+            ('insights: category keyset page', keyset_queryset(filter_insights(category='currency'), cursor)[:7]),
+            ('filter_trades: keyset page', keyset_queryset(_filtered_trades('Live'), trade_cursor)[:51]),
+        ]
+
+    def _explain(self, queryset):
+        if connection.vendor == 'sqlite':
+            return queryset.explain()
+        # Bảng nhỏ / chưa ANALYZE thì Postgres luôn chọn Seq Scan -> tắt để xem index có dùng được không
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+
+    def _full_scans(self, plan):
+        pattern = SQLITE_SCAN_RE if connection.vendor == 'sqlite' else POSTGRES_SCAN_RE
+        return sorted({match.group(1) for match in pattern.finditer(plan)})
@@ -0,0 +1,67 @@
+import sys
+import time
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from finance_dashboard.services.trade_export import (
+    CHUNK_SIZE, FORMATS, ExportUnavailable, export_chunks, export_queryset,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Streams a user's trades as CSV or Parquet (pnl, risk, running equity / drawdown per portfolio) "
+        'in constant memory; same filters as the portfolio page'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Owner of the portfolios')
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv', help='Output format (default: csv)')
+        parser.add_argument('--output', default='-', help='Output file (default: stdout)')
+        parser.add_argument('--type', default='All', help='Trade type: Live / Backtest / All')
+        parser.add_argument('--portfolio', type=int, help='Only this portfolio id')
+        parser.add_argument('--symbol', help='Only this symbol')
+        parser.add_argument('--date-from', type=date.fromisoformat, help='First trade date (YYYY-MM-DD)')
+        parser.add_argument('--date-to', type=date.fromisoformat, help='Last trade date (YYYY-MM-DD)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows per database fetch / write')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['username'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['username']} does not exist")
+
+        trades = export_queryset(
+            user,
+            trade_type=options['type'],
+            portfolio_id=options['portfolio'],
+            symbol=options['symbol'],
+            date_from=options['date_from'],
+            date_to=options['date_to'],
+        )
+        try:
+            chunks = export_chunks(trades, options['format'], options['chunk_size'])
+        except ExportUnavailable as e:
+            raise CommandError(str(e))
+
+        started = time.perf_counter()
+        size = 0
+        output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            for chunk in chunks:
+                data = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+                output.write(data)
+                size += len(data)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+            else:
+                output.flush()
+
+        # stdout có thể là file export -> tổng kết ra stderr
+        self.stderr.write(
+            f"Exported {options['format']} ({size / 1e6:.1f} MB) in {time.perf_counter() - started:.2f}s",
+            style_func=self.style.SUCCESS,
+        )
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from finance_dashboard.models import Portfolio, PortfolioAnalytics
+from finance_dashboard.services.portfolio_analytics import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the materialized PortfolioAnalytics rows from trades (backfill / after bulk imports)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('portfolio_ids', nargs='*', type=int, help='Only these portfolios (default: all)')
+
+    def handle(self, *args, **options):
+        portfolio_ids = options['portfolio_ids'] or list(Portfolio.objects.values_list('pk', flat=True))
+
+        started = time.perf_counter()
+        for portfolio_id in portfolio_ids:
+            if rebuild(portfolio_id) is None:
+                self.stdout.write(self.style.WARNING(f'Portfolio {portfolio_id} does not exist'))
+        if not options['portfolio_ids']:
+            # Row của portfolio đã xóa bị CASCADE; còn lại là row mồ côi nếu có
+            PortfolioAnalytics.objects.exclude(portfolio_id__in=portfolio_ids).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt analytics for {len(portfolio_ids)} portfolios in {time.perf_counter() - started:.2f}s'
+        ))
@@ -0,0 +1,145 @@
+import logging
+import random
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from finance_dashboard.services import quote_service
+from finance_dashboard.services.analysis_service import (
+    AnalysisService, GAINERS_LOSERS_PAIRS, MACRO_TICKERS, TECHNICAL_PAIRS,
+)
+from finance_dashboard.services.bar_store import get_bar_store
+
+logger = logging.getLogger(__name__)
+
+
+def default_universe():
+    """Các symbols mà views đang đọc: forex lists, macro tickers, ETFs, indices."""
+    symbols = list(quote_service.HOME_INDICES.values())
+    symbols += [pair + "=X" for pair in quote_service.CHART_PAIRS + quote_service.FOREX_SYMBOLS]
+    symbols += list(quote_service.STOCK_SYMBOLS)
+    symbols += list(quote_service.ETF_FLOW_TICKERS) + [quote_service.RISK_TICKER]
+    symbols += list(MACRO_TICKERS.values()) + ["^TNX"]
+    symbols += list(TECHNICAL_PAIRS) + list(GAINERS_LOSERS_PAIRS)
+    return list(dict.fromkeys(symbols))
+
+
+class Command(BaseCommand):
+    help = (
+        'Keeps the PriceBar store and market caches warm so views only read local data. '
+        'Runs forever on MARKET_DATA_REFRESH_SCHEDULE ({interval: seconds}); use --once for cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run every schedule once and exit')
+        parser.add_argument('--symbols', help='Comma separated symbols (default: MARKET_DATA_UNIVERSE)')
+        parser.add_argument('--intervals', help='Comma separated intervals to refresh (default: all in schedule)')
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help='Max parallel upstream downloads (default: MARKET_DATA_REFRESH_CONCURRENCY)')
+        parser.add_argument('--chunk-size', type=int, default=10, help='Symbols per download')
+        parser.add_argument('--jitter', type=float, default=None,
+                            help='Random fraction added to each sleep, e.g. 0.1 = up to +10%%')
+        parser.add_argument('--skip-cache', action='store_true', help='Only refresh the bar store')
+
+    def handle(self, *args, **options):
+        if options['symbols']:
+            universe = [s.strip() for s in options['symbols'].split(',') if s.strip()]
+        else:
+            universe = getattr(settings, 'MARKET_DATA_UNIVERSE', None) or default_universe()
+
+        schedule = dict(getattr(settings, 'MARKET_DATA_REFRESH_SCHEDULE', {'1d': 900}))
+        if options['intervals']:
+            wanted = [i.strip() for i in options['intervals'].split(',')]
+            schedule = {interval: schedule.get(interval, 900) for interval in wanted}
+
+        self.universe = universe
+        self.concurrency = max(1, options['concurrency'] or getattr(settings, 'MARKET_DATA_REFRESH_CONCURRENCY', 4))
+        self.chunk_size = max(1, options['chunk_size'])
+        self.jitter = options['jitter'] if options['jitter'] is not None else getattr(settings, 'MARKET_DATA_REFRESH_JITTER', 0.1)
+        self.skip_cache = options['skip_cache']
+        self.stop_event = threading.Event()
+
+        self.stdout.write(f'Universe: {len(universe)} symbols, schedule: {schedule}, concurrency: {self.concurrency}')
+
+        if options['once']:
+            for interval in schedule:
+                self.run_interval(interval)
+            return
+
+        self._install_signal_handlers()
+        # Lệch pha lần chạy đầu để nhiều instance không cùng gọi upstream
+        next_run = {interval: time.monotonic() + random.uniform(0, self.jitter * seconds)
+                    for interval, seconds in schedule.items()}
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            for interval, seconds in schedule.items():
+                if now >= next_run[interval]:
+                    self.run_interval(interval)
+                    next_run[interval] = time.monotonic() + seconds * (1 + random.uniform(0, self.jitter))
+            self.stop_event.wait(max(0.5, min(next_run.values()) - time.monotonic()))
+        self.stdout.write('Stopped.')
+
+    def _install_signal_handlers(self):
+        def stop(signum, frame):
+            self.stdout.write(f'Received signal {signum}, stopping after current run...')
+            self.stop_event.set()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, stop)
+
+    def run_interval(self, interval):
+        started = time.monotonic()
+        written = self.refresh_bars(interval)
+        if interval == '1d' and not self.skip_cache:
+            self.warm_caches()
+        self.stdout.write(self.style.SUCCESS(
+            f'[{interval}] {written} bars written in {time.monotonic() - started:.1f}s'
+        ))
+
+    def refresh_bars(self, interval):
+        """Refresh bar store theo từng chunk, tối đa ``concurrency`` download song song."""
+        store = get_bar_store()
+        chunks = [self.universe[i:i + self.chunk_size] for i in range(0, len(self.universe), self.chunk_size)]
+
+        def work(chunk):
+            try:
+                return store.refresh(chunk, interval=interval)
+            finally:
+                close_old_connections()
+
+        written = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='market-refresh') as pool:
+            futures = {pool.submit(work, chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                try:
+                    written += future.result()
+                except Exception as e:
+                    logger.error(f"Bar refresh failed for {futures[future]} ({interval}): {e}")
+        return written
+
+    def warm_caches(self):
+        """Tính lại các payload mà views đọc (force=True ghi đè cache)."""
+        analysis_service = AnalysisService()
+        chart_pairs = list(quote_service.CHART_PAIRS)
+        home_symbols = (list(quote_service.HOME_INDICES.values())
+                        + [pair + "=X" for pair in chart_pairs] + [quote_service.RISK_TICKER])
+        tasks = [
+            ('symbols', lambda: quote_service.get_symbols_data(home_symbols, force=True)),
+            ('sparklines', lambda: quote_service.get_sparklines(home_symbols, 20, force=True)),
+            ('charts', lambda: quote_service.get_multiple_chart_data(chart_pairs, force=True)),
+            ('etf_flows', lambda: quote_service.get_etf_flows(quote_service.ETF_FLOW_TICKERS, force=True)),
+            ('macro', lambda: analysis_service.get_macro_data(force=True)),
+            ('technical', lambda: analysis_service.get_technical_analyses(list(TECHNICAL_PAIRS), force=True)),
+            ('gainers_losers', lambda: analysis_service.get_forex_gainers_losers(force=True)),
+        ]
+        for name, task in tasks:
+            if self.stop_event.is_set():
+                break
+            try:
+                task()
+            except Exception as e:
+                logger.error(f"Cache warm-up failed for {name}: {e}")
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_dashboard', '0017_portfolio_is_public'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceBar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=20)),
+                ('interval', models.CharField(default='1d', max_length=5)),
+                ('ts', models.DateTimeField()),
+                ('open', models.FloatField(null=True)),
+                ('high', models.FloatField(null=True)),
+                ('low', models.FloatField(null=True)),
+                ('close', models.FloatField(null=True)),
+                ('volume', models.FloatField(null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Price Bars',
+                'ordering': ['symbol', 'interval', 'ts'],
+                'constraints': [models.UniqueConstraint(fields=('symbol', 'interval', 'ts'), name='unique_price_bar')],
+            },
+        ),
+    ]
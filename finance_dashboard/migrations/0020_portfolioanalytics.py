@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_dashboard', '0019_insight_updated_at_trade_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioAnalytics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_trades', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('net_pnl', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('gross_win', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('gross_loss', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('risk_sum', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('risk_count', models.IntegerField(default=0)),
+                ('equity', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('peak_equity', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('max_drawdown', models.FloatField(default=0)),
+                ('last_trade_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('portfolio', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='analytics', to='finance_dashboard.portfolio')),
+            ],
+            options={
+                'verbose_name_plural': 'Portfolio Analytics',
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:32
+
+from django.db import migrations, models
+
+
+def clear_analytics(apps, schema_editor):
+    # Các rows cũ chưa có risk metrics -> xóa để được rebuild lazily khi đọc
+    apps.get_model('finance_dashboard', 'PortfolioAnalytics').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_dashboard', '0020_portfolioanalytics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='portfolioanalytics',
+            name='downside_sq_sum',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='portfolioanalytics',
+            name='longest_drawdown',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='portfolioanalytics',
+            name='return_sq_sum',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='portfolioanalytics',
+            name='return_sum',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='portfolioanalytics',
+            name='underwater_trades',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(clear_analytics, migrations.RunPython.noop),
+    ]
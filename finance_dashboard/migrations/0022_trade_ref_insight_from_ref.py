@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+def _insight_ref_id(ref):
+    # Như views._insight_ref_id (migration không import code của app)
+    if not ref or 'Insight #' not in ref:
+        return None
+    insight_id = ref.replace('Insight #', '').strip()
+    return int(insight_id) if insight_id.isdigit() else None
+
+
+def ref_to_fk(apps, schema_editor):
+    """Trade.ref "Insight #<id>" -> Trade.ref_insight (ref giữ nguyên; id không tồn tại -> bỏ qua)"""
+    Trade = apps.get_model('finance_dashboard', 'Trade')
+    Insight = apps.get_model('finance_dashboard', 'Insight')
+
+    pending = {}
+    for pk, ref, ref_insight_id in Trade.objects.filter(ref__contains='Insight #').values_list('pk', 'ref', 'ref_insight_id'):
+        insight_id = _insight_ref_id(ref)
+        if insight_id is not None and insight_id != ref_insight_id:
+            pending.setdefault(insight_id, []).append(pk)
+
+    existing = set(Insight.objects.filter(pk__in=pending).values_list('pk', flat=True))
+    for insight_id, trade_ids in pending.items():
+        if insight_id in existing:
+            # update(): không gửi signals (analytics không phụ thuộc ref_insight)
+            Trade.objects.filter(pk__in=trade_ids).update(ref_insight_id=insight_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_dashboard', '0021_portfolioanalytics_risk_metrics'),
+    ]
+
+    operations = [
+        migrations.RunPython(ref_to_fk, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_dashboard', '0022_trade_ref_insight_from_ref'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='insight',
+            index=models.Index(fields=['category', 'result', 'date'], name='insight_cat_result_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='insight',
+            index=models.Index(fields=['category', 'date'], name='insight_category_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='insight',
+            index=models.Index(fields=['result', 'date'], name='insight_result_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='insight',
+            index=models.Index(fields=['date'], name='insight_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['symbol', 'date'], name='trade_symbol_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['portfolio', 'trade_type', 'date'], name='trade_portfolio_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['trade_type', 'date'], name='trade_type_date_idx'),
+        ),
+    ]
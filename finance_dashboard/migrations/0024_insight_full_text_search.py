@@ -0,0 +1,61 @@
+from django.db import migrations
+
+# DDL chép vào migration (migration không import code của app, xem services/insight_search.py)
+FTS_TABLE = 'finance_dashboard_insight_fts'
+INSIGHT_TABLE = 'finance_dashboard_insight'
+COLUMNS = 'title, summary, reason, analysis, lessons, tags'
+NEW_VALUES = 'new.title, new.summary, new.reason, new.analysis, new.lessons, new.tags'
+OLD_VALUES = 'old.title, old.summary, old.reason, old.analysis, old.lessons, old.tags'
+
+FTS_INSERT = f"INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) VALUES (new.id, {NEW_VALUES});"
+FTS_DELETE = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES});"
+
+SQLITE_SCHEMA = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({COLUMNS}, content='{INSIGHT_TABLE}', "
+    f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {INSIGHT_TABLE} BEGIN {FTS_INSERT} END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {INSIGHT_TABLE} BEGIN {FTS_DELETE} END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {INSIGHT_TABLE} BEGIN {FTS_DELETE} {FTS_INSERT} END",
+    # index các insights hiện có
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+POSTGRES_SCHEMA = [
+    f"ALTER TABLE {INSIGHT_TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(tags, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(summary, '') || ' ' || coalesce(reason, '') || ' ' || "
+    "coalesce(analysis, '') || ' ' || coalesce(lessons, '')), 'C')"
+    ") STORED",
+    f"CREATE INDEX IF NOT EXISTS insight_search_vector_idx ON {INSIGHT_TABLE} USING GIN (search_vector)",
+]
+
+
+def install(apps, schema_editor):
+    # SQLite: FTS5 + triggers; Postgres: tsvector generated + GIN; database khác: icontains
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_SCHEMA, 'postgresql': POSTGRES_SCHEMA}.get(vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def uninstall(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS insight_search_vector_idx")
+        schema_editor.execute(f"ALTER TABLE {INSIGHT_TABLE} DROP COLUMN IF EXISTS search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_dashboard', '0023_trade_insight_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
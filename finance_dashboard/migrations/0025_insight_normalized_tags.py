@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:43
+
+import re
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def backfill_tags(apps, schema_editor):
+    # Như services/insight_tags.parse_tags: tách theo , ; # xuống dòng -> slug lowercase
+    Insight = apps.get_model('finance_dashboard', 'Insight')
+    Tag = apps.get_model('finance_dashboard', 'Tag')
+    Link = Insight.normalized_tags.through
+
+    names_by_insight = {}
+    for pk, tags in Insight.objects.exclude(tags='').values_list('pk', 'tags'):
+        names = []
+        for part in re.split(r'[,;#\n]+', tags or ''):
+            name = slugify(part, allow_unicode=True)[:50]
+            if name and name not in names:
+                names.append(name)
+        if names:
+            names_by_insight[pk] = names
+
+    all_names = {name for names in names_by_insight.values() for name in names}
+    Tag.objects.bulk_create([Tag(name=name) for name in all_names], ignore_conflicts=True)
+    tag_ids = dict(Tag.objects.filter(name__in=all_names).values_list('name', 'pk'))
+    Link.objects.bulk_create(
+        [Link(insight_id=pk, tag_id=tag_ids[name]) for pk, names in names_by_insight.items() for name in names],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_dashboard', '0024_insight_full_text_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.SlugField(allow_unicode=True, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='insight',
+            name='normalized_tags',
+            field=models.ManyToManyField(blank=True, related_name='insights', to='finance_dashboard.tag'),
+        ),
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Avg, Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import Round
 from django.contrib.auth.models import User
 from decimal import Decimal
 
@@ -36,7 +38,39 @@ class MacroData(models.Model):
         ordering = ["date"]  
         verbose_name_plural = "Macro Data"  
 
+class PriceBar(models.Model):
+    """Một nến OHLCV lưu local (bar store), key theo symbol + interval + thời điểm"""
+    symbol = models.CharField(max_length=20) # Vi du: EURUSD=X, ^VIX, SPY
+    interval = models.CharField(max_length=5, default="1d")
+    ts = models.DateTimeField()
+    open = models.FloatField(null=True)
+    high = models.FloatField(null=True)
+    low = models.FloatField(null=True)
+    close = models.FloatField(null=True)
+    volume = models.FloatField(null=True)
+
+    def __str__(self):
+        return f"{self.symbol} {self.interval} {self.ts:%Y-%m-%d %H:%M}"
+
+    class Meta:
+        ordering = ["symbol", "interval", "ts"]
+        verbose_name_plural = "Price Bars"
+        constraints = [
+            models.UniqueConstraint(fields=["symbol", "interval", "ts"], name="unique_price_bar"),
+        ]
+
 # --- Phase 3 ---  
+class Tag(models.Model):
+    """Tag chuẩn hóa (slug lowercase, unique) parse từ Insight.tags"""
+    name = models.SlugField(max_length=50, unique=True, allow_unicode=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ["name"]
+
+
 class Insight(models.Model):
     CATEGORY_CHOICES = [
         ("currency", "Currency"),
@@ -61,11 +95,13 @@ class Insight(models.Model):
     lessons = models.TextField(blank=True)
     metrics = models.JSONField(blank=True, null=True)
     portfolio_ref = models.ForeignKey("Portfolio", on_delete=models.SET_NULL, null=True, blank=True, related_name="insights")
-    tags = models.TextField(blank=True, default="")
+    tags = models.TextField(blank=True, default="")  # nhập tự do "forex, breakout"; đồng bộ sang normalized_tags
+    normalized_tags = models.ManyToManyField(Tag, blank=True, related_name="insights")
     content = models.TextField(blank=True, null=True)
     author = models.CharField(max_length=100, blank=True, null=True)
     slug = models.SlugField(unique=True, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # ETag / Last-Modified cho insight lists
     
     # THÊM FIELD MỚI CHO FILE UPLOAD
     attached_file = models.FileField(upload_to='insight_attachments/%Y/%m/%d/', blank=True, null=True)
@@ -105,6 +141,13 @@ class Insight(models.Model):
     class Meta:
         ordering = ["-date"]  
         verbose_name_plural = "Insights"
+        # Trang insights / search_insights: filter category, result, khoảng date + order_by -date
+        indexes = [
+            models.Index(fields=["category", "result", "date"], name="insight_cat_result_date_idx"),
+            models.Index(fields=["category", "date"], name="insight_category_date_idx"),
+            models.Index(fields=["result", "date"], name="insight_result_date_idx"),
+            models.Index(fields=["date"], name="insight_date_idx"),
+        ]
 
 class Portfolio(models.Model):
     CATEGORY_CHOICES = [
@@ -125,34 +168,65 @@ class Portfolio(models.Model):
     
     # THÊM FIELD ref_insight VÀO PORTFOLIO
     ref_insight = models.ForeignKey(Insight, on_delete=models.SET_NULL, null=True, blank=True, related_name="portfolio_references")
+    updated_at = models.DateTimeField(auto_now=True)  # ETag cho trade tables / insight lists (tên portfolio)
 
     def __str__(self):
         return f"{self.name} {self.symbol or ''}"
 
     @property
     def max_drawdown(self):
-        """Tinh Max Drawdown dựa trên equity curve từ trades"""
-        from decimal import Decimal
-        trades = self.trades.order_by("date")
-        if not trades.exists():
+        """Max Drawdown (%) của equity curve, đọc từ PortfolioAnalytics đã materialize"""
+        from .services.portfolio_analytics import analytics_row
+        row = analytics_row(self)
+        if not row or not row.total_trades:
             return 0
-
-        equity = Decimal(self.amount)
-        peak = equity
-        max_dd = Decimal("0")
-
-        for t in trades:
-            equity += Decimal(str(t.pnl))
-            peak = max(peak, equity)
-            dd = (peak - equity) / peak
-            max_dd = max(max_dd, dd)
-
-        return round(max_dd * 100, 2)
+        return round(Decimal(str(row.max_drawdown)) * 100, 2)
 
     class Meta:
         ordering = ["date_added"]
         verbose_name_plural = "Portfolios"
 
+class TradeQuerySet(models.QuerySet):
+    """PnL / risk tính trong DB (cùng công thức với Trade.pnl / Trade.risk)"""
+
+    AMOUNT = models.DecimalField(max_digits=20, decimal_places=2)
+
+    def with_pnl(self):
+        """Annotate pnl_amount và risk_amount (NULL nếu không có stoploss)"""
+        direction = Case(When(side="BUY", then=Value(1)), default=Value(-1))
+        return self.annotate(
+            pnl_amount=Round(direction * (F("exit") - F("entry")) * F("qty"), 2, output_field=self.AMOUNT),
+            risk_amount=Case(
+                When(Q(stoploss__isnull=True) | Q(stoploss=0), then=Value(None)),
+                default=Round(direction * (F("stoploss") - F("entry")) * F("qty"), 2),
+                output_field=self.AMOUNT,
+            ),
+        )
+
+    @staticmethod
+    def summary_aggregates():
+        return {
+            "total_trades": Count("pk"),
+            "net_pnl": Sum("pnl_amount"),
+            "wins": Count("pk", filter=Q(pnl_amount__gt=0)),
+            "losses": Count("pk", filter=Q(pnl_amount__lt=0)),
+            "gross_win": Sum("pnl_amount", filter=Q(pnl_amount__gt=0)),
+            "gross_loss": Sum("pnl_amount", filter=Q(pnl_amount__lt=0)),
+            "avg_risk": Avg("risk_amount"),
+            "risk_sum": Sum("risk_amount"),
+            "risk_count": Count("risk_amount"),
+        }
+
+    def pnl_summary(self):
+        """Một aggregate query: totals, wins/losses, gross win/loss, avg risk"""
+        return self.order_by().with_pnl().aggregate(**self.summary_aggregates())
+
+    def pnl_summary_by_portfolio(self):
+        """{portfolio_id: summary} trong một grouped query"""
+        rows = self.order_by().with_pnl().values("portfolio").annotate(**self.summary_aggregates())
+        return {row.pop("portfolio"): row for row in rows}
+
+
 class Trade(models.Model):
     SIDE_CHOICES = [("BUY", "BUY"), ("SELL", "SELL")]
     TYPE_CHOICES = [("Live", "Live"), ("Backtest", "Backtest")]
@@ -171,6 +245,9 @@ class Trade(models.Model):
     
     # THÊM FIELD ref_insight VÀO TRADE
     ref_insight = models.ForeignKey(Insight, on_delete=models.SET_NULL, null=True, blank=True, related_name="trade_references")
+    updated_at = models.DateTimeField(auto_now=True)  # ETag / Last-Modified cho trade tables
+
+    objects = TradeQuerySet.as_manager()
 
     @property
     def pnl(self):
@@ -191,4 +268,44 @@ class Trade(models.Model):
     
     class Meta:
         ordering = ["date"]
-        verbose_name_plural = "Trades"
\ No newline at end of file
+        verbose_name_plural = "Trades"
+        # details (symbol), portfolio (portfolio + trade_type), filter_trades (trade_type); order theo date
+        indexes = [
+            models.Index(fields=["symbol", "date"], name="trade_symbol_date_idx"),
+            models.Index(fields=["portfolio", "trade_type", "date"], name="trade_portfolio_type_date_idx"),
+            models.Index(fields=["trade_type", "date"], name="trade_type_date_idx"),
+        ]
+
+
+class PortfolioAnalytics(models.Model):
+    """
+    Analytics đã materialize của một portfolio (services/portfolio_analytics.py).
+    Cập nhật khi trade được tạo / sửa / xóa (signals.py); rebuild toàn bộ:
+    manage.py rebuild_portfolio_analytics.
+    """
+    portfolio = models.OneToOneField(Portfolio, on_delete=models.CASCADE, related_name="analytics")
+    total_trades = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    net_pnl = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    gross_win = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    gross_loss = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    risk_sum = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    risk_count = models.IntegerField(default=0)  # số trades có stoploss (avg risk = risk_sum / risk_count)
+    equity = models.DecimalField(max_digits=16, decimal_places=2, default=0)  # amount + net_pnl
+    peak_equity = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    max_drawdown = models.FloatField(default=0)  # (peak - equity) / peak lớn nhất, >= 0
+    # Sharpe / Sortino theo trade (services/equity_engine.py): tổng r, r^2, min(r, 0)^2
+    return_sum = models.FloatField(default=0)
+    return_sq_sum = models.FloatField(default=0)
+    downside_sq_sum = models.FloatField(default=0)
+    underwater_trades = models.IntegerField(default=0)  # số trades cuối đang dưới peak
+    longest_drawdown = models.IntegerField(default=0)  # số trades liên tiếp dưới peak dài nhất
+    last_trade_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Analytics {self.portfolio_id}"
+
+    class Meta:
+        verbose_name_plural = "Portfolio Analytics"
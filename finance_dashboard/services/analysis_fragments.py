@@ -0,0 +1,75 @@
+# finance_dashboard/services/analysis_fragments.py
+"""
+JSON fragments cho trang analysis và analysis_ajax (xem json_fragments).
+
+Mỗi component được cache dạng bytes theo data version:
+- macro: refreshed_at của các macro_tile_* + tile đang thiếu
+  (analysis_service.macro_version; một fragment cho mỗi tile, full macro data
+  là phép ghép các tile);
+- technical (cả payload): refreshed_at của technical_{pair}_{period};
+- technical theo indicators (ajax) và signals: version cửa sổ bars trong bar
+  store (+ version macro cho signals).
+"""
+from django.conf import settings
+
+from .analysis_service import SIGNAL_INDICATORS, macro_version
+from .indicators import INDICATORS
+from .json_fragments import cached_fragment, dumps
+from .market_cache import payload_version
+
+SIGNAL_PAIRS = ['EURUSD=X', 'GBPUSD=X', 'USDJPY=X', 'USDCHF=X', 'AUDUSD=X']
+
+
+def _bar_fragment_timeout(cache_timeout):
+    # Nến cuối chưa đóng có thể đổi mà không đổi version -> giống indicator memo
+    return min(cache_timeout, getattr(settings, 'BAR_STORE_MAX_AGE', 900) or cache_timeout)
+
+
+def macro_fragments(service, cache_timeout=3600):
+    """{name: Fragment} cho từng macro tile (kể cả COT)."""
+    return cached_fragment(
+        'macro',
+        macro_version,
+        lambda: service.get_macro_data(cache_timeout),
+        cache_timeout,
+        encode=lambda macro_data: {name: dumps(tile) for name, tile in macro_data.items()},
+    )
+
+
+def technical_fragment(service, pair, period="3mo", cache_timeout=1800):
+    """Payload technical đầy đủ của ``pair`` (trang analysis)."""
+    key = f"technical_{pair}_{period}"
+    return cached_fragment(
+        key,
+        lambda: payload_version([key]),
+        lambda: service.get_technical_analyses([pair], period=period, cache_timeout=cache_timeout).get(pair),
+        cache_timeout,
+    )
+
+
+def indicator_fragment(service, pair, indicators, versions, period="3mo", cache_timeout=1800):
+    """Payload technical chỉ gồm ``indicators`` (ajax); ``versions`` từ service.bar_versions."""
+    names = [name for name in dict.fromkeys(indicators) if name in INDICATORS]
+    version = versions.get(pair)
+    return cached_fragment(
+        f"indicators_{pair}_{period}_{'_'.join(names)}",
+        lambda: version,
+        lambda: service.get_technical_analysis(pair, period=period, indicators=names, cache_timeout=cache_timeout),
+        _bar_fragment_timeout(cache_timeout),
+    )
+
+
+def signals_fragment(service, versions, pairs=SIGNAL_PAIRS, cache_timeout=1800):
+    """Signals & alerts cho ``pairs`` (phụ thuộc bars của các pairs + macro data)."""
+    def version():
+        macro = macro_version()
+        if macro is None or any(pair not in versions for pair in pairs):
+            return None
+        return "|".join([macro] + [versions[pair] for pair in pairs])
+
+    def build():
+        technical_by_pair = service.get_technical_analyses(list(pairs), indicators=SIGNAL_INDICATORS)
+        technical_data_list = [technical_by_pair[pair] for pair in pairs if technical_by_pair.get(pair)]
+        return service.generate_signals_alerts(service.get_macro_data(), technical_data_list)
+
+    return cached_fragment('signals_' + '_'.join(pairs), version, build, _bar_fragment_timeout(cache_timeout))
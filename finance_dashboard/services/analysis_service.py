@@ -1,133 +1,244 @@
 # finance_dashboard/services/analysis_service.py
-import yfinance as yf
 import pandas as pd
-import ta  # ĐÃ ĐỔI TỪ pandas_ta sang ta
-import requests
 from fredapi import Fred
 from django.core.cache import cache
 from django.conf import settings
 import logging
-from datetime import datetime, timedelta
-import numpy as np
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from django.db import close_old_connections
+from .bar_store import get_bar_store
+from .circuit_breaker import get_guard
+from .indicators import INDICATORS, compute_indicators, display_indicators, required_bars
+from .market_cache import cached, cached_many, payload_version
+from .market_data import since, symbol_frame
+from .streaming_indicators import IndicatorSet, technical_indicator_set
 
 logger = logging.getLogger(__name__)
 
+# Tickers cho macro dashboard (tên tile -> Yahoo symbol)
+MACRO_TICKERS = {
+    'VIX': '^VIX',
+    'SP500': '^GSPC',
+    'SPY': 'SPY',
+    'Gold': 'GC=F',
+    'TLT': 'TLT',
+}
+
+# Các tile của macro panel (thứ tự hiển thị), mỗi tile một cache key
+MACRO_TILES = list(MACRO_TICKERS) + ['US10Y']
+
+
+def macro_cache_keys():
+    return {name: f"macro_tile_{name}" for name in MACRO_TILES}
+
+
+def macro_missing_keys():
+    """Negative cache: tile lần fetch gần nhất không có dữ liệu (nguồn lỗi, FRED chưa có key)"""
+    return {name: f"macro_tile_missing_{name}" for name in MACRO_TILES}
+
+
+def macro_version():
+    """
+    Version của macro panel cho fragments / ETag. Tile thiếu được tính vào version bằng
+    marker macro_tile_missing_* thay vì làm version None; marker hết hạn
+    (MACRO_MISSING_TILE_TTL) -> None -> request sau fetch lại tile.
+    """
+    keys, missing_keys = macro_cache_keys(), macro_missing_keys()
+    missing = cache.get_many(list(missing_keys.values()))
+    present = [keys[name] for name in MACRO_TILES if missing_keys[name] not in missing]
+    version = payload_version(present)
+    if version is None:
+        return None
+    return "|".join([version] + [f"{key}:{missing[key]:.6f}" for key in sorted(missing)])
+
+
+def _remember_missing_tiles(names, tiles):
+    missing_keys = macro_missing_keys()
+    missing = {missing_keys[name]: time.time() for name in names if name not in tiles}
+    if missing:
+        cache.set_many(missing, timeout=getattr(settings, 'MACRO_MISSING_TILE_TTL', 300))
+    loaded = [missing_keys[name] for name in names if name in tiles]
+    if loaded:
+        cache.delete_many(loaded)
+
+
+_macro_pool = None
+_macro_pool_lock = threading.Lock()
+
+
+def _macro_executor():
+    """Executor dùng chung, giới hạn số fetch macro đồng thời (MACRO_FETCH_WORKERS)"""
+    global _macro_pool
+    if _macro_pool is None:
+        with _macro_pool_lock:
+            if _macro_pool is None:
+                _macro_pool = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'MACRO_FETCH_WORKERS', 4),
+                    thread_name_prefix="macro-fetch",
+                )
+    return _macro_pool
+
+
+def _in_worker(fn, *args):
+    try:
+        return fn(*args)
+    finally:
+        close_old_connections()
+
+# Technical analysis / signals cho các pairs chính
+TECHNICAL_PAIRS = ('EURUSD=X', 'GBPUSD=X', 'USDJPY=X', 'USDCHF=X', 'AUDUSD=X')
+
+GAINERS_LOSERS_PAIRS = ("EURUSD=X", "GBPUSD=X", "USDJPY=X", "USDCHF=X", "AUDUSD=X",
+                        "NZDUSD=X", "USDCAD=X", "EURJPY=X", "GBPJPY=X", "EURGBP=X")
+
+# Payload đầy đủ cần đủ bars cho indicator dài nhất (SMA_50)
+MIN_TECHNICAL_BARS = 50
+
+# Indicators mà generate_signals_alerts đọc
+SIGNAL_INDICATORS = ('RSI_14', 'MACD_12_26_9', 'SMA_20', 'SMA_50')
+
+
+def _safe_float(value, decimals=2):
+    """Convert an toàn sang float đã làm tròn (NaN/None -> None)"""
+    try:
+        if pd.notna(value):
+            return round(float(value), decimals)
+        return None
+    except (ValueError, TypeError):
+        return None
+
+
+def _safe_history(series, length=30):
+    """``length`` giá trị cuối, NaN -> None để serialize JSON"""
+    try:
+        history = series.tail(length).tolist()
+        return [float(x) if pd.notna(x) else None for x in history]
+    except Exception:
+        return []
+
+
 class AnalysisService:
     def __init__(self):
         # FRED API key - bạn cần đăng ký tại https://fred.stlouisfed.org/docs/api/api_key.html
         self.fred = Fred(api_key=getattr(settings, 'FRED_API_KEY', 'your_fred_api_key_here'))
         
-    def get_macro_data(self, cache_timeout=3600):
-        """Fetch real macro economic data"""
-        cache_key = "macro_data_analysis"
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return cached_data
-            
-        macro_data = {}
-        
-        try:
-            # VIX - Volatility Index
-            vix = yf.Ticker("^VIX")
-            vix_hist = vix.history(period="30d")
-            if not vix_hist.empty:
-                vix_current = float(vix_hist['Close'].iloc[-1])
-                vix_change = float(((vix_hist['Close'].iloc[-1] - vix_hist['Close'].iloc[-2]) / vix_hist['Close'].iloc[-2]) * 100)
-                macro_data['VIX'] = {
-                    'value': round(vix_current, 2),
-                    'change': round(vix_change, 2),
-                    'signal': 'Low' if vix_current < 20 else 'High' if vix_current > 30 else 'Medium',
-                    'history': [float(x) for x in vix_hist['Close'].tail(30).tolist()]
-                }
-                
-            # S&P 500
-            sp500 = yf.Ticker("^GSPC")
-            sp500_hist = sp500.history(period="30d")
-            if not sp500_hist.empty:
-                sp500_current = float(sp500_hist['Close'].iloc[-1])
-                sp500_change = float(((sp500_hist['Close'].iloc[-1] - sp500_hist['Close'].iloc[-2]) / sp500_hist['Close'].iloc[-2]) * 100)
-                macro_data['SP500'] = {
-                    'value': round(sp500_current, 2),
-                    'change': round(sp500_change, 2),
-                    'signal': 'Bullish' if sp500_change > 0 else 'Bearish',
-                    'history': [float(x) for x in sp500_hist['Close'].tail(30).tolist()]
-                }
-                
-            # SPY ETF
-            spy = yf.Ticker("SPY")
-            spy_hist = spy.history(period="30d")
-            if not spy_hist.empty:
-                spy_current = float(spy_hist['Close'].iloc[-1])
-                spy_change = float(((spy_hist['Close'].iloc[-1] - spy_hist['Close'].iloc[-2]) / spy_hist['Close'].iloc[-2]) * 100)
-                macro_data['SPY'] = {
-                    'value': round(spy_current, 2),
-                    'change': round(spy_change, 2),
-                    'signal': 'Bullish' if spy_change > 0 else 'Bearish',
-                    'history': [float(x) for x in spy_hist['Close'].tail(30).tolist()]
-                }
-                
-            # Gold
-            gold = yf.Ticker("GC=F")
-            gold_hist = gold.history(period="30d")
-            if not gold_hist.empty:
-                gold_current = float(gold_hist['Close'].iloc[-1])
-                gold_change = float(((gold_hist['Close'].iloc[-1] - gold_hist['Close'].iloc[-2]) / gold_hist['Close'].iloc[-2]) * 100)
-                macro_data['Gold'] = {
-                    'value': round(gold_current, 2),
-                    'change': round(gold_change, 2),
-                    'signal': 'Bullish' if gold_change > 0 else 'Bearish',
-                    'history': [float(x) for x in gold_hist['Close'].tail(30).tolist()]
-                }
-                
-            # TLT - Long-term Treasury ETF
-            tlt = yf.Ticker("TLT")
-            tlt_hist = tlt.history(period="30d")
-            if not tlt_hist.empty:
-                tlt_current = float(tlt_hist['Close'].iloc[-1])
-                tlt_change = float(((tlt_hist['Close'].iloc[-1] - tlt_hist['Close'].iloc[-2]) / tlt_hist['Close'].iloc[-2]) * 100)
-                macro_data['TLT'] = {
-                    'value': round(tlt_current, 2),
-                    'change': round(tlt_change, 2),
-                    'signal': 'Bullish' if tlt_change > 0 else 'Bearish',
-                    'history': [float(x) for x in tlt_hist['Close'].tail(30).tolist()]
-                }
-                
-            # US10Y Yield from FRED
-            try:
-                us10y_data = self.fred.get_series('DGS10', limit=30)
-                if not us10y_data.empty:
-                    us10y_current = float(us10y_data.iloc[-1])
-                    us10y_prev = float(us10y_data.iloc[-2]) if len(us10y_data) > 1 else us10y_current
-                    us10y_change = us10y_current - us10y_prev
-                    macro_data['US10Y'] = {
-                        'value': round(us10y_current, 2),
-                        'change': round(us10y_change, 2),
-                        'signal': 'Rising' if us10y_change > 0 else 'Falling',
-                        'history': [float(x) for x in us10y_data.tail(30).tolist()]
-                    }
-            except Exception as e:
-                logger.warning(f"FRED US10Y error: {e}")
-                # Fallback to Yahoo Finance TNX
-                tnx = yf.Ticker("^TNX")
-                tnx_hist = tnx.history(period="5d")
-                if not tnx_hist.empty:
-                    tnx_current = float(tnx_hist['Close'].iloc[-1])
-                    tnx_change = float(tnx_hist['Close'].iloc[-1] - tnx_hist['Close'].iloc[-2])
-                    macro_data['US10Y'] = {
-                        'value': round(tnx_current, 2),
-                        'change': round(tnx_change, 2),
-                        'signal': 'Rising' if tnx_change > 0 else 'Falling',
-                        'history': [float(x) for x in tnx_hist['Close'].tail(30).tolist()]
-                    }
-                    
-        except Exception as e:
-            logger.error(f"Error fetching macro data: {e}")
-            
+    def get_macro_data(self, cache_timeout=3600, force=False):
+        """
+        Fetch real macro economic data.
+        Mỗi tile được cache riêng (macro_tile_*): tile lỗi chỉ thiếu tile đó và được
+        thử lại ở lần sau, các tile còn lại không phải fetch lại. Tile mà nguồn trả lời
+        là không có dữ liệu chỉ được thử lại sau MACRO_MISSING_TILE_TTL.
+        """
+        keys = macro_cache_keys()
+        missing_keys = macro_missing_keys()
+        missing = cache.get_many(list(missing_keys.values()))
+        keys = {name: key for name, key in keys.items() if missing_keys[name] not in missing}
+        tiles = cached_many(keys, self._load_macro_tiles, cache_timeout, force=force)
+        macro_data = {name: tiles[name] for name in keys if name in tiles}
+
         # COT Data (simplified version - real implementation would parse CFTC reports)
         macro_data['COT'] = self.get_cot_summary()
-        
-        cache.set(cache_key, macro_data, cache_timeout)
+
         return macro_data
+
+    def _load_macro_tiles(self, names):
+        """
+        Fan-out theo nguồn trên executor có giới hạn: Yahoo (một download cho tất cả
+        tickers, kèm ^TNX làm fallback cho US10Y) và FRED chạy song song, mỗi nguồn
+        có timeout riêng (MACRO_SOURCE_TIMEOUTS). Nguồn lỗi/timeout -> thiếu tile của nguồn đó.
+        """
+        tickers = [name for name in names if name in MACRO_TICKERS]
+        jobs = {}
+        if tickers or 'US10Y' in names:
+            jobs['yahoo'] = _macro_executor().submit(_in_worker, self._load_ticker_tiles, tickers)
+        if 'US10Y' in names:
+            jobs['fred'] = _macro_executor().submit(_in_worker, self._load_fred_us10y)
+
+        timeouts = getattr(settings, 'MACRO_SOURCE_TIMEOUTS', {})
+        started = time.monotonic()
+        results = {}
+        for source, future in jobs.items():
+            remaining = timeouts.get(source, 10) - (time.monotonic() - started)
+            try:
+                results[source] = future.result(timeout=max(remaining, 0))
+            except FuturesTimeoutError:
+                logger.warning(f"Macro source {source} timed out")
+            except Exception as e:
+                logger.error(f"Macro source {source} error: {e}")
+
+        tiles = dict(results.get('yahoo', {}))
+        # US10Y Yield from FRED, fallback to Yahoo Finance TNX
+        us10y = results.get('fred') or tiles.pop('_TNX', None)
+        tiles.pop('_TNX', None)
+        if us10y:
+            tiles['US10Y'] = us10y
+        # Chỉ nhớ tile thiếu khi nguồn đã trả lời (không lỗi/timeout) mà không có dữ liệu
+        answered = tickers if 'yahoo' in results else []
+        if 'US10Y' in names and 'yahoo' in results and 'fred' in results:
+            answered = answered + ['US10Y']
+        _remember_missing_tiles(answered, tiles)
+        return tiles
+
+    def _load_ticker_tiles(self, names):
+        """Tiles cho MACRO_TICKERS + '_TNX' (fallback US10Y, 5 ngày gần nhất)"""
+        frame = get_bar_store().history([MACRO_TICKERS[name] for name in names] + ["^TNX"], period="30d")
+        tiles = {}
+        for name in names:
+            tile = self._ticker_tile(name, symbol_frame(frame, MACRO_TICKERS[name]))
+            if tile is None:
+                logger.warning(f"No macro data for {name}")
+                continue
+            tiles[name] = tile
+
+        tnx_hist = symbol_frame(frame, "^TNX").tail(5)
+        if len(tnx_hist) >= 2:
+            tnx_current = float(tnx_hist['Close'].iloc[-1])
+            tnx_change = float(tnx_hist['Close'].iloc[-1] - tnx_hist['Close'].iloc[-2])
+            tiles['_TNX'] = {
+                'value': round(tnx_current, 2),
+                'change': round(tnx_change, 2),
+                'signal': 'Rising' if tnx_change > 0 else 'Falling',
+                'history': [float(x) for x in tnx_hist['Close'].tail(30).tolist()]
+            }
+        return tiles
+
+    def _ticker_tile(self, name, hist):
+        """Tile {value, change, signal, history} từ nến ngày của một macro ticker"""
+        if len(hist) < 2:
+            return None
+        current = float(hist['Close'].iloc[-1])
+        change = float(((hist['Close'].iloc[-1] - hist['Close'].iloc[-2]) / hist['Close'].iloc[-2]) * 100)
+        if name == 'VIX':
+            signal = 'Low' if current < 20 else 'High' if current > 30 else 'Medium'
+        else:
+            signal = 'Bullish' if change > 0 else 'Bearish'
+        return {
+            'value': round(current, 2),
+            'change': round(change, 2),
+            'signal': signal,
+            'history': [float(x) for x in hist['Close'].tail(30).tolist()]
+        }
+
+    def _load_fred_us10y(self):
+        try:
+            us10y_data = get_guard('fred').call(self.fred.get_series, 'DGS10', limit=30)
+        except Exception as e:
+            logger.warning(f"FRED US10Y error: {e}")
+            return None
+        us10y_data = us10y_data.dropna()
+        if us10y_data.empty:
+            return None
+        us10y_current = float(us10y_data.iloc[-1])
+        us10y_prev = float(us10y_data.iloc[-2]) if len(us10y_data) > 1 else us10y_current
+        us10y_change = us10y_current - us10y_prev
+        return {
+            'value': round(us10y_current, 2),
+            'change': round(us10y_change, 2),
+            'signal': 'Rising' if us10y_change > 0 else 'Falling',
+            'history': [float(x) for x in us10y_data.tail(30).tolist()]
+        }
     
     def get_cot_summary(self):
         """Get COT (Commitment of Traders) summary - simplified version"""
@@ -143,128 +254,166 @@ class AnalysisService:
     
     def get_technical_analysis(self, pair="EURUSD=X", period="3mo", indicators=None, cache_timeout=1800):
         """Get technical analysis for forex pair with real indicators"""
-        cache_key = f"technical_{pair}_{period}"
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return cached_data
-            
+        return self.get_technical_analyses([pair], period=period, indicators=indicators,
+                                           cache_timeout=cache_timeout).get(pair)
+
+    def get_technical_analyses(self, pairs, period="3mo", indicators=None, cache_timeout=1800, force=False):
+        """
+        Technical analysis cho nhiều pairs: đọc cache trước, các pair bị miss
+        được lấy trong một lần download (coalesced).
+        ``indicators``: chỉ tính các indicators này (xem get_indicator_analyses);
+        None là tất cả indicators hiển thị được.
+        Indicators được tính trên toàn bộ lịch sử đã lưu của pair, payload chỉ lấy
+        các bar trong cửa sổ period.
+        - Pair đã có streaming state (technical_state_*) và lịch sử vẫn bắt đầu ở cùng bar:
+          chỉ đưa các bar mới vào state.
+        - Pair chưa có state: tính indicators cho tất cả cùng lúc
+          (indicators.compute_indicators) và bootstrap state cho lần sau.
+        Pair không có dữ liệu sẽ không có trong kết quả.
+        """
+        def load(missing):
+            store = get_bar_store()
+            start = store.window_start(period)
+            try:
+                store.ensure_fresh(missing, interval="1d", start=start)
+                # Toàn bộ lịch sử: state neo vào bar đầu tiên, không trượt theo cửa sổ period
+                frame = store.read(missing, interval="1d")
+            except Exception as e:
+                logger.error(f"Error fetching technical data for {missing}: {e}")
+                return {}
+
+            state_keys = {pair: f"technical_state_{pair}_1d" for pair in missing}
+            stored = cache.get_many(list(state_keys.values()))
+            payloads, states, cold = {}, {}, []
+            for pair in missing:
+                df = symbol_frame(frame, pair)
+                data = stored.get(state_keys[pair])
+                state = IndicatorSet.from_dict(data) if data else None
+                if state is None or not state.can_advance(df):
+                    cold.append(pair)
+                    continue
+                live = state.advance(df)
+                states[state_keys[pair]] = state.to_dict()
+                payloads[pair] = self._build_technical_analysis(pair, live.frame(start), bars=len(since(df, start)))
+
+            if cold:
+                try:
+                    frames = compute_indicators(frame, cold)
+                except Exception as e:
+                    logger.error(f"Error calculating technical indicators for {cold}: {e}")
+                    frames = {}
+                for pair, df in frames.items():
+                    payloads[pair] = self._build_technical_analysis(pair, since(df, start))
+                    if payloads[pair]:
+                        state = technical_indicator_set()
+                        state.advance(df)
+                        states[state_keys[pair]] = state.to_dict()
+
+            if states:
+                cache.set_many(states, timeout=getattr(settings, 'INDICATOR_STATE_TIMEOUT', 7 * 24 * 3600))
+            return payloads
+
+        if indicators is not None:
+            return self.get_indicator_analyses(pairs, indicators, period=period, cache_timeout=cache_timeout)
+
+        keys = {pair: f"technical_{pair}_{period}" for pair in pairs}
+        return cached_many(keys, load, cache_timeout, force=force)
+
+    def get_indicator_analyses(self, pairs, indicators, period="3mo", interval="1d", cache_timeout=1800):
+        """
+        Payload technical chỉ gồm ``indicators`` (tên lạ bị bỏ qua). Chỉ các indicators
+        được hỏi + dependencies của chúng được tính, và kết quả từng indicator được
+        memoize theo (symbol, interval, period, bar cuối) nên request sau chỉ tính phần còn thiếu.
+        Trong bar store mỗi symbol chỉ có một bar trên mỗi timestamp nên (ts cuối, số bars)
+        xác định cửa sổ dữ liệu.
+        """
+        names = [name for name in dict.fromkeys(indicators) if name in INDICATORS and INDICATORS[name].display]
+        store = get_bar_store()
+        start = store.window_start(period)
+        # Memo key từ một query aggregate; bars chỉ được đọc khi có indicator phải tính
+        memo_keys = {
+            pair: f"indicator_memo_{pair}_{interval}_{period}_{version}"
+            for pair, version in self.bar_versions(pairs, period, interval).items()
+        }
+        memos = cache.get_many(list(memo_keys.values()))
+
+        todo = {}
+        for pair, key in memo_keys.items():
+            memo = memos.get(key) or {'indicators': {}}
+            memos[key] = memo
+            missing = [name for name in names if name not in memo['indicators']]
+            if missing or 'price' not in memo:
+                todo[pair] = missing
+
+        if todo:
+            wanted = list(dict.fromkeys(name for missing in todo.values() for name in missing))
+            try:
+                frame = store.read(list(todo), interval=interval, start=start)
+                computed = compute_indicators(frame, list(todo), names=wanted)
+            except Exception as e:
+                logger.error(f"Error calculating {wanted} for {list(todo)}: {e}")
+                computed = {}
+            updated = {}
+            for pair, df in computed.items():
+                memo = memos[memo_keys[pair]]
+                if len(df) < max(required_bars(todo[pair]), 2):
+                    logger.warning(f"Insufficient data for {pair}: only {len(df)} days")
+                    continue
+                memo.update(self._price_payload(pair, df))
+                memo['indicators'].update(self._indicator_payloads(df, todo[pair]))
+                updated[memo_keys[pair]] = memo
+            if updated:
+                # Nến cuối chưa đóng có thể bị ghi đè mà không đổi key -> memo sống tối đa BAR_STORE_MAX_AGE
+                cache.set_many(updated, timeout=min(cache_timeout, store.max_age or cache_timeout))
+
+        result = {}
+        for pair, key in memo_keys.items():
+            memo = memos[key]
+            if 'price' in memo and all(name in memo['indicators'] for name in names):
+                result[pair] = {
+                    'pair': memo['pair'],
+                    'price': memo['price'],
+                    'indicators': {name: memo['indicators'][name] for name in names},
+                    'labels': memo['labels'],
+                }
+        return result
+
+    def bar_versions(self, pairs, period="3mo", interval="1d"):
+        """
+        {pair: version} của cửa sổ bars (ts cuối + số bars) sau khi refresh bar store nếu cần;
+        pair không có dữ liệu bị bỏ qua.
+        """
+        store = get_bar_store()
+        try:
+            start = store.window_start(period)
+            store.ensure_fresh(pairs, interval=interval, start=start)
+            return {
+                pair: f"{last_ts:%Y%m%d%H%M}_{bars}"
+                for pair, (last_ts, bars) in store.last_bars(pairs, interval=interval, start=start).items()
+            }
+        except Exception as e:
+            logger.error(f"Error fetching technical data for {pairs}: {e}")
+            return {}
+
+    def _build_technical_analysis(self, pair, df, bars=None, names=None):
+        """
+        Payload cho một pair từ DataFrame OHLCV + các cột indicator.
+        ``bars``: số bars trong cửa sổ period (khi df chỉ là history của streaming state).
+        ``names``: indicators đưa vào payload (mặc định tất cả indicators hiển thị được).
+        """
         try:
-            # Fetch data from yfinance
-            ticker = yf.Ticker(pair)
-            df = ticker.history(period=period, interval="1d")
-            
             if df.empty:
                 logger.warning(f"No data available for {pair}")
                 return None
                 
             # Ensure we have enough data for calculations
-            if len(df) < 50:
-                logger.warning(f"Insufficient data for {pair}: only {len(df)} days")
+            bars = len(df) if bars is None else bars
+            if bars < max(required_bars(names), MIN_TECHNICAL_BARS if names is None else 0):
+                logger.warning(f"Insufficient data for {pair}: only {bars} days")
                 return None
-                
-            # Calculate technical indicators using ta library
-            try:
-                # SMA
-                df['SMA_20'] = ta.trend.SMAIndicator(close=df['Close'], window=20).sma_indicator()
-                df['SMA_50'] = ta.trend.SMAIndicator(close=df['Close'], window=50).sma_indicator()
-                
-                # EMA
-                df['EMA_12'] = ta.trend.EMAIndicator(close=df['Close'], window=12).ema_indicator()
-                df['EMA_26'] = ta.trend.EMAIndicator(close=df['Close'], window=26).ema_indicator()
-                
-                # RSI
-                df['RSI_14'] = ta.momentum.RSIIndicator(close=df['Close'], window=14).rsi()
-                
-                # MACD
-                macd = ta.trend.MACD(close=df['Close'], window_fast=12, window_slow=26, window_sign=9)
-                df['MACD_12_26_9'] = macd.macd()
-                df['MACDs_12_26_9'] = macd.macd_signal()
-                
-                # Bollinger Bands
-                bb = ta.volatility.BollingerBands(close=df['Close'], window=20, window_dev=2)
-                df['BBU_20_2.0'] = bb.bollinger_hband()
-                df['BBL_20_2.0'] = bb.bollinger_lband()
-                
-                # Stochastic
-                stoch = ta.momentum.StochasticOscillator(high=df['High'], low=df['Low'], close=df['Close'], window=14, smooth_window=3)
-                df['STOCHk_14_3_3'] = stoch.stoch()
-                
-                # ATR
-                df['ATR_14'] = ta.volatility.AverageTrueRange(high=df['High'], low=df['Low'], close=df['Close'], window=14).average_true_range()
-                
-            except Exception as ta_error:
-                logger.error(f"Error calculating technical indicators for {pair}: {ta_error}")
-                return None
-            
-            # Get latest values for indicators
-            latest = df.iloc[-1]
-            
-            # Helper function to safely convert values
-            def safe_float(value, decimals=2):
-                try:
-                    if pd.notna(value):
-                        return round(float(value), decimals)
-                    return None
-                except (ValueError, TypeError):
-                    return None
-            
-            # Helper function to safely get history
-            def safe_history(series, length=30):
-                try:
-                    history = series.tail(length).tolist()
-                    # Convert any NaN values to None for JSON serialization
-                    return [float(x) if pd.notna(x) else None for x in history]
-                except Exception:
-                    return []
-            
-            technical_data = {
-                'pair': pair.replace('=X', ''),
-                'price': {
-                    'current': safe_float(latest['Close'], 5),
-                    'change': safe_float((latest['Close'] - df['Close'].iloc[-2]) / df['Close'].iloc[-2] * 100, 2) if len(df) > 1 else 0,
-                    'history': safe_history(df['Close'])
-                },
-                'indicators': {
-                    'SMA_20': {
-                        'value': safe_float(latest.get('SMA_20'), 5),
-                        'signal': self._get_ma_signal(latest['Close'], latest.get('SMA_20')),
-                        'history': safe_history(df.get('SMA_20', pd.Series()))
-                    },
-                    'SMA_50': {
-                        'value': safe_float(latest.get('SMA_50'), 5),
-                        'signal': self._get_ma_signal(latest['Close'], latest.get('SMA_50')),
-                        'history': safe_history(df.get('SMA_50', pd.Series()))
-                    },
-                    'RSI_14': {
-                        'value': safe_float(latest.get('RSI_14'), 2),
-                        'signal': self._get_rsi_signal(latest.get('RSI_14')),
-                        'history': safe_history(df.get('RSI_14', pd.Series()))
-                    },
-                    'MACD_12_26_9': {
-                        'value': safe_float(latest.get('MACD_12_26_9'), 6),
-                        'signal': self._get_macd_signal(latest.get('MACD_12_26_9'), latest.get('MACDs_12_26_9')),
-                        'history': safe_history(df.get('MACD_12_26_9', pd.Series()))
-                    },
-                    'BBU_20_2.0': {
-                        'value': safe_float(latest.get('BBU_20_2.0'), 5),
-                        'signal': self._get_bb_signal(latest['Close'], latest.get('BBL_20_2.0'), latest.get('BBU_20_2.0')),
-                        'history': safe_history(df.get('BBU_20_2.0', pd.Series()))
-                    },
-                    'STOCHk_14_3_3': {
-                        'value': safe_float(latest.get('STOCHk_14_3_3'), 2),
-                        'signal': self._get_stoch_signal(latest.get('STOCHk_14_3_3')),
-                        'history': safe_history(df.get('STOCHk_14_3_3', pd.Series()))
-                    },
-                    'ATR_14': {
-                        'value': safe_float(latest.get('ATR_14'), 6),
-                        'signal': 'High' if pd.notna(latest.get('ATR_14')) and latest.get('ATR_14', 0) > 0.01 else 'Low',
-                        'history': safe_history(df.get('ATR_14', pd.Series()))
-                    }
-                },
-                'labels': [d.strftime('%Y-%m-%d') for d in df.index[-30:]]
-            }
-            
-            cache.set(cache_key, technical_data, cache_timeout)
+
+            technical_data = self._price_payload(pair, df)
+            technical_data['indicators'] = self._indicator_payloads(df, names or display_indicators())
             return technical_data
             
         except Exception as e:
@@ -272,6 +421,32 @@ class AnalysisService:
             import traceback
             logger.error(f"Traceback: {traceback.format_exc()}")
             return None
+
+    def _price_payload(self, pair, df):
+        latest = df.iloc[-1]
+        return {
+            'pair': pair.replace('=X', ''),
+            'price': {
+                'current': _safe_float(latest['Close'], 5),
+                'change': _safe_float((latest['Close'] - df['Close'].iloc[-2]) / df['Close'].iloc[-2] * 100, 2) if len(df) > 1 else 0,
+                'history': _safe_history(df['Close'])
+            },
+            'labels': [d.strftime('%Y-%m-%d') for d in df.index[-30:]]
+        }
+
+    def _indicator_payloads(self, df, names):
+        """{name: {value, signal, history}} theo khai báo trong registry"""
+        latest = df.iloc[-1]
+        payloads = {}
+        for name in names:
+            spec = INDICATORS[name]
+            signal = getattr(self, f"_get_{spec.signal}_signal")
+            payloads[name] = {
+                'value': _safe_float(latest.get(name), spec.decimals),
+                'signal': signal(*[latest.get(column) for column in spec.signal_inputs]),
+                'history': _safe_history(df.get(name, pd.Series()))
+            }
+        return payloads
     
     def _get_ma_signal(self, price, ma):
         """Get moving average signal"""
@@ -307,6 +482,10 @@ class AnalysisService:
         else:
             return 'Neutral'
     
+    def _get_atr_signal(self, atr):
+        """Get ATR (volatility) signal"""
+        return 'High' if pd.notna(atr) and atr > 0.01 else 'Low'
+
     def _get_stoch_signal(self, stoch):
         """Get Stochastic signal"""
         if pd.isna(stoch):
@@ -318,22 +497,19 @@ class AnalysisService:
         else:
             return 'Neutral'
     
-    def get_forex_gainers_losers(self, cache_timeout=1800):
+    def get_forex_gainers_losers(self, cache_timeout=1800, force=False):
         """Get forex pairs performance for gainers/losers analysis"""
-        cache_key = "forex_gainers_losers"
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return cached_data
-            
-        pairs = ["EURUSD=X", "GBPUSD=X", "USDJPY=X", "USDCHF=X", "AUDUSD=X", 
-                "NZDUSD=X", "USDCAD=X", "EURJPY=X", "GBPJPY=X", "EURGBP=X"]
+        return cached("forex_gainers_losers", self._load_forex_gainers_losers, cache_timeout, force=force) or []
+
+    def _load_forex_gainers_losers(self):
+        pairs = list(GAINERS_LOSERS_PAIRS)
         
         forex_data = []
         
         try:
+            frame = get_bar_store().history(pairs, period="5d", interval="1d")
             for pair in pairs:
-                ticker = yf.Ticker(pair)
-                hist = ticker.history(period="5d", interval="1d")
+                hist = symbol_frame(frame, pair)
                 
                 if not hist.empty and len(hist) >= 2:
                     current = float(hist['Close'].iloc[-1])
@@ -366,7 +542,6 @@ class AnalysisService:
         # Sort by daily change (descending for gainers first)
         forex_data.sort(key=lambda x: x['daily_change'], reverse=True)
         
-        cache.set(cache_key, forex_data, cache_timeout)
         return forex_data
     
     def _calculate_volatility(self, prices):
@@ -0,0 +1,59 @@
+# finance_dashboard/services/async_market.py
+"""
+Chạy các service market data (blocking: yfinance, FRED, bar store ORM) từ async views.
+
+- ``run_blocking``: chạy hàm sync trong executor giới hạn (ASYNC_UPSTREAM_WORKERS
+  threads) thay vì thread mặc định của loop -> số call upstream/ORM đồng thời có
+  trần, các request chỉ chờ (await) chứ không giữ worker;
+- các phần dữ liệu của một trang được lấy đồng thời bằng asyncio.gather.
+
+Kết nối DB của worker thread được đóng sau mỗi call (như _in_worker của macro fetch).
+Circuit breaker / rate limiter / single-flight vẫn áp dụng bên trong các service.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+_pool = None
+_pool_lock = threading.Lock()
+_stats = {"calls": 0, "in_flight": 0, "max_in_flight": 0}
+
+
+def _executor():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "ASYNC_UPSTREAM_WORKERS", 16),
+                    thread_name_prefix="async-upstream",
+                )
+    return _pool
+
+
+def _in_worker(fn):
+    try:
+        return fn()
+    finally:
+        close_old_connections()
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """await fn(*args, **kwargs) chạy trong executor upstream."""
+    _stats["calls"] += 1
+    _stats["in_flight"] += 1
+    _stats["max_in_flight"] = max(_stats["max_in_flight"], _stats["in_flight"])
+    try:
+        return await sync_to_async(_in_worker, thread_sensitive=False, executor=_executor())(
+            partial(fn, *args, **kwargs)
+        )
+    finally:
+        _stats["in_flight"] -= 1
+
+
+def executor_stats():
+    return dict(_stats, workers=getattr(settings, "ASYNC_UPSTREAM_WORKERS", 16))
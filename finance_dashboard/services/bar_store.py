@@ -0,0 +1,285 @@
+# finance_dashboard/services/bar_store.py
+"""
+Bar store: lưu OHLCV local (bảng PriceBar) theo symbol + interval.
+
+- ``refresh()`` chỉ lấy các nến sau timestamp cuối đã lưu rồi append/upsert
+  (nến cuối được ghi đè vì có thể là nến chưa đóng).
+- ``history()`` có cùng signature với ``MarketDataProvider.history`` nhưng đọc
+  period bất kỳ như một lát cắt của dữ liệu local; chỉ gọi provider khi dữ liệu
+  đã cũ hơn ``BAR_STORE_MAX_AGE`` giây hoặc chưa đủ dài cho period được hỏi.
+- ``MARKET_DATA_READ_ONLY_VIEWS = True``: ``history()`` không bao giờ gọi
+  provider, dữ liệu do command ``refresh_market_data`` giữ ấm.
+"""
+import hashlib
+import logging
+import threading
+import time
+from datetime import timezone as dt_timezone
+
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from finance_dashboard.models import PriceBar
+from .market_data import OHLCV_FIELDS, get_provider, normalize_frame, period_to_timedelta, symbol_frame
+from .singleflight import get_singleflight
+
+logger = logging.getLogger(__name__)
+
+DB_FIELDS = ["open", "high", "low", "close", "volume"]
+
+# SQLite chỉ cho một writer: download chạy song song, upsert thì lần lượt
+_sqlite_write_lock = threading.Lock()
+
+# Nến đầu tiên có thể trễ vài ngày so với start của period (cuối tuần, ngày lễ)
+COVERAGE_SLACK_DAYS = 7
+
+
+class BarStore:
+    def __init__(self, provider=None, max_age=None, backfill_period=None, read_only=None):
+        self._provider = provider
+        self.max_age = max_age if max_age is not None else getattr(settings, "BAR_STORE_MAX_AGE", 3600)
+        self.backfill_period = backfill_period or getattr(settings, "BAR_STORE_BACKFILL_PERIOD", "1y")
+        self.read_only = read_only if read_only is not None else getattr(settings, "MARKET_DATA_READ_ONLY_VIEWS", False)
+
+    @property
+    def provider(self):
+        return self._provider or get_provider()
+
+    # ------------------------------------------------------------------ read
+
+    def history(self, symbols, period="1mo", interval="1d", start=None):
+        """Slice local của ``period`` cho các symbols, refresh những symbol đã cũ."""
+        symbols = list(dict.fromkeys(symbols))
+        start = self.window_start(period, start)
+        self.ensure_fresh(symbols, interval=interval, start=start)
+        return self.read(symbols, interval=interval, start=start)
+
+    def window_start(self, period="1mo", start=None):
+        """Thời điểm bắt đầu (UTC, aware) của ``period``; None nghĩa là toàn bộ lịch sử."""
+        if start is None:
+            delta = period_to_timedelta(period)
+            return timezone.now() - delta if delta is not None else None
+        start = pd.Timestamp(start)
+        return (start.tz_localize("UTC") if start.tzinfo is None else start).to_pydatetime()
+
+    def ensure_fresh(self, symbols, interval="1d", start=None):
+        """Refresh (một lần download) các symbols đã cũ hoặc chưa đủ lịch sử từ ``start``."""
+        if self.read_only:
+            return
+        stale = [symbol for symbol in symbols if not self._is_fresh(symbol, interval)]
+        # Period dài hơn backfill mặc định: symbol còn fresh nhưng thiếu lịch sử cũng phải refresh
+        default = period_to_timedelta(self.backfill_period)
+        if start is None or (default is not None and start < timezone.now() - default):
+            fresh = [symbol for symbol in symbols if symbol not in stale]
+            coverage = self.coverage(fresh, interval) if fresh else {}
+            backfilled = self._backfilled_since(fresh, interval)
+            stale += [
+                symbol for symbol in fresh
+                if not self._covers(coverage.get(symbol), start, backfilled.get(symbol))
+            ]
+        if stale:
+            # Nhiều request cùng refresh một nhóm symbol -> chỉ một lần download
+            flight_key = f"bar_refresh_{interval}_{start.date() if start else 'max'}_{','.join(sorted(stale))}"
+            get_singleflight().do(flight_key, lambda: self.refresh(stale, interval=interval, since=start))
+
+    def read(self, symbols, interval="1d", start=None):
+        """Đọc bars đã lưu, trả về frame cột ``(symbol, field)`` như provider."""
+        qs = PriceBar.objects.filter(symbol__in=symbols, interval=interval)
+        if start is not None:
+            qs = qs.filter(ts__gte=start)
+        rows = list(qs.order_by().values_list("symbol", "ts", *DB_FIELDS))
+        if not rows:
+            return normalize_frame(None, symbols)
+
+        df = pd.DataFrame.from_records(rows, columns=["Symbol", "Date"] + OHLCV_FIELDS)
+        df["Date"] = pd.to_datetime(df["Date"], utc=True).dt.tz_localize(None)
+        wide = df.set_index(["Date", "Symbol"])[OHLCV_FIELDS].unstack("Symbol")
+        return normalize_frame(wide, symbols)
+
+    def coverage(self, symbols, interval="1d"):
+        """{symbol: (first_ts, last_ts)} trong một query aggregate."""
+        rows = (
+            PriceBar.objects.filter(symbol__in=symbols, interval=interval)
+            .values("symbol")
+            .annotate(first_ts=Min("ts"), last_ts=Max("ts"))
+            .order_by()
+        )
+        return {row["symbol"]: (row["first_ts"], row["last_ts"]) for row in rows}
+
+    def last_bars(self, symbols, interval="1d", start=None):
+        """{symbol: (ts bar cuối, số bars từ ``start``)} trong một query aggregate, không đọc bars."""
+        qs = PriceBar.objects.filter(symbol__in=symbols, interval=interval, close__isnull=False)
+        if start is not None:
+            qs = qs.filter(ts__gte=start)
+        rows = qs.values("symbol").annotate(last_ts=Max("ts"), bars=Count("id")).order_by()
+        return {row["symbol"]: (row["last_ts"], row["bars"]) for row in rows}
+
+    def data_version(self, symbols, interval="1d", start=None):
+        """
+        (token, refreshed_at) cho bars của ``symbols``: chỉ đọc DB + cache, không gọi provider.
+        Token đổi khi có bar mới hoặc khi symbol được refresh (nến cuối chưa đóng có thể
+        bị ghi đè mà không đổi ts cuối / số bars). None nếu có symbol đã cũ: request
+        tiếp theo sẽ refresh nên không được coi là "không đổi".
+        """
+        symbols = list(dict.fromkeys(symbols))
+        keys = {symbol: self._fresh_key(symbol, interval) for symbol in symbols}
+        stamps = cache.get_many(list(keys.values()))
+        if not self.read_only and len(stamps) < len(symbols):
+            return None
+        bars = self.last_bars(symbols, interval=interval, start=start)
+        parts = [f"{symbol}:{bars.get(symbol)}:{stamps.get(keys[symbol])}" for symbol in symbols]
+        refreshed = [stamp for stamp in stamps.values() if isinstance(stamp, float)]
+        return hashlib.md5("|".join(parts).encode()).hexdigest(), max(refreshed, default=None)
+
+    # ----------------------------------------------------------------- write
+
+    def refresh(self, symbols, interval="1d", since=None):
+        """
+        Incremental refresh: symbols đã có dữ liệu đủ dài chỉ lấy từ nến cuối trở đi
+        (một download cho cả nhóm); symbols mới hoặc thiếu lịch sử được backfill.
+        Trả về số bars đã ghi.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        coverage = self.coverage(symbols, interval)
+
+        backfilled = self._backfilled_since(symbols, interval)
+        backfill, incremental = [], []
+        for symbol in symbols:
+            if self._covers(coverage.get(symbol), since, backfilled.get(symbol)):
+                incremental.append(symbol)
+            else:
+                backfill.append(symbol)
+
+        written = {}
+        if backfill:
+            period = self._backfill_period(since)
+            frame = self.provider.history(backfill, period=period, interval=interval)
+            written.update(self._store(frame, backfill, interval))
+            # Upstream có ít lịch sử hơn period (symbol mới niêm yết): không backfill lại mỗi lần đọc
+            self._mark_backfilled([symbol for symbol in backfill if symbol in written], interval, since)
+        if incremental:
+            start = min(coverage[symbol][1] for symbol in incremental)
+            frame = self.provider.history(incremental, interval=interval, start=start.date())
+            last_seen = {symbol: coverage[symbol][1] for symbol in incremental}
+            written.update(self._store(frame, incremental, interval, last_seen=last_seen))
+
+        # Symbol không nhận được bar nào (upstream lỗi) sẽ được thử lại ở lần đọc sau;
+        # ticker không có dữ liệu thì provider đã nhớ (MARKET_DATA_NO_DATA_TTL), không download lại
+        self._mark_fresh(list(written), interval)
+        return sum(written.values())
+
+    @staticmethod
+    def _covers(coverage, since, backfilled_since=None):
+        """Bars đã lưu (first_ts, last_ts) đủ cho cửa sổ từ ``since`` (None: chỉ cần có bars)"""
+        if coverage is None or coverage[1] is None:
+            return False
+        if since is None or coverage[0] <= since + pd.Timedelta(days=COVERAGE_SLACK_DAYS):
+            return True
+        # Đã backfill từ since (hoặc sớm hơn) mà upstream không có thêm
+        return backfilled_since is not None and backfilled_since <= since.timestamp()
+
+    def _backfill_period(self, since):
+        default = period_to_timedelta(self.backfill_period)
+        if since is None or default is None:
+            return self.backfill_period
+        needed = timezone.now() - since - pd.Timedelta(days=COVERAGE_SLACK_DAYS)
+        if needed <= default:
+            return self.backfill_period
+        # Period được hỏi dài hơn backfill mặc định -> lấy period nhỏ nhất đủ dài
+        for period in ("2y", "5y", "10y"):
+            if period_to_timedelta(period) >= needed:
+                return period
+        return "max"
+
+    def _store(self, frame, symbols, interval, last_seen=None):
+        """Upsert bars trả về từ provider; trả về {symbol: số bars đã ghi}."""
+        bars = []
+        written = {}
+        for symbol in symbols:
+            hist = symbol_frame(frame, symbol)
+            if hist.empty:
+                logger.warning(f"Bar store: no bars returned for {symbol} ({interval})")
+                continue
+            written[symbol] = 0
+            for ts, row in hist.iterrows():
+                ts = timezone.make_aware(ts.to_pydatetime(), dt_timezone.utc)
+                if last_seen and ts < last_seen[symbol]:
+                    continue
+                bars.append(PriceBar(
+                    symbol=symbol,
+                    interval=interval,
+                    ts=ts,
+                    open=_float_or_none(row["Open"]),
+                    high=_float_or_none(row["High"]),
+                    low=_float_or_none(row["Low"]),
+                    close=_float_or_none(row["Close"]),
+                    volume=_float_or_none(row["Volume"]),
+                ))
+                written[symbol] += 1
+        if bars:
+            if connection.vendor == "sqlite":
+                with _sqlite_write_lock:
+                    self._upsert(bars)
+            else:
+                self._upsert(bars)
+        return written
+
+    def _upsert(self, bars):
+        PriceBar.objects.bulk_create(
+            bars,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=["symbol", "interval", "ts"],
+            update_fields=DB_FIELDS,
+        )
+
+    # ------------------------------------------------------------- freshness
+
+    def _fresh_key(self, symbol, interval):
+        return f"bar_store_fresh_{symbol}_{interval}"
+
+    def _is_fresh(self, symbol, interval):
+        return bool(cache.get(self._fresh_key(symbol, interval)))
+
+    def _backfilled_key(self, symbol, interval):
+        return f"bar_store_backfilled_{symbol}_{interval}"
+
+    def _backfilled_since(self, symbols, interval):
+        """{symbol: timestamp của since sớm nhất đã backfill} (hết hạn cùng freshness)"""
+        keys = {self._backfilled_key(symbol, interval): symbol for symbol in symbols}
+        return {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+
+    def _mark_backfilled(self, symbols, interval, since):
+        if symbols and since is not None:
+            cache.set_many(
+                {self._backfilled_key(symbol, interval): since.timestamp() for symbol in symbols},
+                timeout=self.max_age,
+            )
+
+    def _mark_fresh(self, symbols, interval):
+        if not symbols:
+            return
+        # Giá trị là thời điểm refresh (dùng cho data_version / Last-Modified)
+        refreshed_at = time.time()
+        cache.set_many({self._fresh_key(symbol, interval): refreshed_at for symbol in symbols}, timeout=self.max_age)
+
+
+def _float_or_none(value):
+    return None if pd.isna(value) else float(value)
+
+
+_bar_store = None
+_bar_store_lock = threading.Lock()
+
+
+def get_bar_store():
+    global _bar_store
+    if _bar_store is None:
+        with _bar_store_lock:
+            if _bar_store is None:
+                _bar_store = BarStore()
+    return _bar_store
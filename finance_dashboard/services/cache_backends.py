@@ -0,0 +1,323 @@
+# finance_dashboard/services/cache_backends.py
+"""
+Cache backends dùng chung giữa các gunicorn workers mà không cần service ngoài.
+
+- ``SQLiteCache``: một file SQLite (WAL) dùng chung cho mọi process trên máy;
+  giá trị được pickle, hết hạn theo cột ``expires``, cull theo ``MAX_ENTRIES``
+  (kiểm tra sau mỗi ``MAX_ENTRIES / CULL_CHECK_FRACTION`` dòng ghi, không phải mỗi set).
+- ``TieredCache``: L1 LocMem nhỏ trong process (TTL ngắn, chỉ cho các key hot
+  theo ``L1_PREFIXES``) đặt trước L2 ``SQLiteCache``. ``add``/lock keys luôn đi
+  thẳng xuống L2 để vẫn đúng giữa các process.
+- ``StatsLocMemCache``: LocMemCache có đếm hit/miss/eviction (mode ``locmem``).
+
+Counter theo tier (``locmem``, ``l1``, ``shared``) là theo process, xem ``cache_stats()``.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+
+_MISSING = object()
+
+# Đếm số entries (COUNT(*)) sau mỗi max_entries / CULL_CHECK_FRACTION dòng ghi của một connection
+CULL_CHECK_FRACTION = 20
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def _count(tier, name, n=1):
+    if n:
+        with _stats_lock:
+            _stats.setdefault(tier, Counter())[name] += n
+
+
+def cache_stats():
+    """Hit/miss/eviction counters của từng tier trong process này."""
+    with _stats_lock:
+        result = {}
+        for tier, counts in _stats.items():
+            lookups = counts["hits"] + counts["misses"]
+            result[tier] = dict({"hits": 0, "misses": 0, "evictions": 0}, **counts, hit_rate=round(counts["hits"] / lookups, 3) if lookups else None)
+        return result
+
+
+class StatsLocMemCache(LocMemCache):
+    """LocMemCache + counters (tier mặc định ``locmem``)."""
+
+    def __init__(self, name, params, tier="locmem"):
+        super().__init__(name, params)
+        self.tier = tier
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        _count(self.tier, "misses" if value is _MISSING else "hits")
+        return default if value is _MISSING else value
+
+    def _cull(self):
+        before = len(self._cache)
+        super()._cull()
+        _count(self.tier, "evictions", before - len(self._cache))
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache trong một file SQLite ở chế độ WAL: reader không chặn writer, mọi
+    worker cùng đọc một bản payload. LOCATION là đường dẫn file.
+    """
+
+    def __init__(self, location, params, tier="shared"):
+        super().__init__(params)
+        self.path = str(location)
+        self.tier = tier
+        self._conn = None
+        # Số entries có thể vượt MAX_ENTRIES tối đa cull_every dòng mỗi connection trước khi cull
+        self._cull_every = max(1, self._max_entries // CULL_CHECK_FRACTION)
+        self._written = 0
+
+    def _connection(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Django tạo một backend instance cho mỗi thread -> một connection mỗi thread
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with _init_lock:
+                if self.path not in _initialized:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS cache_entries "
+                        "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)"
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS cache_entries_expires ON cache_entries (expires)")
+                    _initialized.add(self.path)
+            self._conn = conn
+        return self._conn
+
+    def _expires(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    @staticmethod
+    def _live(expires, now):
+        return expires is None or expires > now
+
+    # ---- đọc ----
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            "SELECT value, expires FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or not self._live(row[1], time.time()):
+            _count(self.tier, "misses")
+            return default
+        _count(self.tier, "hits")
+        return pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not key_map:
+            return {}
+        now = time.time()
+        placeholders = ",".join("?" * len(key_map))
+        rows = self._connection().execute(
+            f"SELECT key, value, expires FROM cache_entries WHERE key IN ({placeholders})", list(key_map)
+        ).fetchall()
+        found = {key_map[key]: pickle.loads(value) for key, value, expires in rows if self._live(expires, now)}
+        _count(self.tier, "hits", len(found))
+        _count(self.tier, "misses", len(key_map) - len(found))
+        return found
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute("SELECT expires FROM cache_entries WHERE key = ?", (key,)).fetchone()
+        return row is not None and self._live(row[0], time.time())
+
+    # ---- ghi ----
+
+    def _write(self, rows, replace=True):
+        conn = self._connection()
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not replace:
+                # Key đã hết hạn coi như không tồn tại
+                conn.execute("DELETE FROM cache_entries WHERE key = ? AND expires <= ?", (rows[0][0], time.time()))
+            cursor = conn.executemany(f"{verb} INTO cache_entries (key, value, expires) VALUES (?, ?, ?)", rows)
+            written = cursor.rowcount
+            self._written += max(written, 0)
+            if self._written >= self._cull_every:
+                self._written = 0
+                self._cull(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        _count(self.tier, "sets", written)
+        return written
+
+    def _row(self, key, value, timeout, version):
+        key = self.make_and_validate_key(key, version=version)
+        return key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expires(timeout)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write([self._row(key, value, timeout, version)])
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if data:
+            self._write([self._row(key, value, timeout, version) for key, value in data.items()])
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._write([self._row(key, value, timeout, version)], replace=False) == 1
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute(
+            "UPDATE cache_entries SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (self._expires(timeout), key, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connection().execute("DELETE FROM cache_entries WHERE key = ?", (key,)).rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if keys:
+            self._connection().execute(
+                f"DELETE FROM cache_entries WHERE key IN ({','.join('?' * len(keys))})", keys
+            )
+
+    def clear(self):
+        self._connection().execute("DELETE FROM cache_entries")
+
+    def _cull(self, conn):
+        count = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+        if count <= self._max_entries:
+            return
+        expired = conn.execute("DELETE FROM cache_entries WHERE expires <= ?", (time.time(),)).rowcount
+        _count(self.tier, "expired", expired)
+        count -= expired
+        if count <= self._max_entries:
+            return
+        # Như db cache của Django: bỏ 1/CULL_FREQUENCY entries sắp hết hạn nhất
+        cull = count if self._cull_frequency == 0 else count // self._cull_frequency
+        evicted = conn.execute(
+            "DELETE FROM cache_entries WHERE key IN "
+            "(SELECT key FROM cache_entries ORDER BY expires IS NULL, expires LIMIT ?)",
+            (cull,),
+        ).rowcount
+        _count(self.tier, "evictions", evicted)
+
+    def close(self, **kwargs):
+        # request_finished: đóng connection của thread này (thread ASGI / executor có thể
+        # không quay lại), request sau mở lại
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class TieredCache(BaseCache):
+    """
+    L1 LocMem (TTL ``L1_TIMEOUT`` giây, ``L1_MAX_ENTRIES``) trước L2 SQLiteCache.
+
+    Chỉ các key bắt đầu bằng ``L1_PREFIXES`` được giữ ở L1; giá trị ở L1 có thể
+    cũ hơn L2 tối đa ``L1_TIMEOUT`` giây nếu process khác vừa ghi đè.
+    """
+
+    def __init__(self, location, params):
+        options = dict(params.get("OPTIONS", {}))
+        l1_timeout = options.pop("L1_TIMEOUT", 5)
+        l1_max_entries = options.pop("L1_MAX_ENTRIES", 200)
+        self.l1_prefixes = tuple(options.pop("L1_PREFIXES", ()))
+        params = dict(params, OPTIONS=options)
+        super().__init__(params)
+        self.l1_timeout = l1_timeout
+        self.l1 = StatsLocMemCache(
+            f"l1:{location}", dict(params, TIMEOUT=l1_timeout, OPTIONS={"MAX_ENTRIES": l1_max_entries}), tier="l1"
+        )
+        self.l2 = SQLiteCache(location, params)
+
+    def _hot(self, key):
+        return key.startswith(self.l1_prefixes)
+
+    def _l1_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self.l1_timeout
+        return min(timeout, self.l1_timeout)
+
+    def get(self, key, default=None, version=None):
+        if self._hot(key):
+            value = self.l1.get(key, _MISSING, version)
+            if value is not _MISSING:
+                return value
+        value = self.l2.get(key, _MISSING, version)
+        if value is _MISSING:
+            return default
+        if self._hot(key):
+            self.l1.set(key, value, self.l1_timeout, version)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = {}
+        hot = [key for key in keys if self._hot(key)]
+        if hot:
+            found.update(self.l1.get_many(hot, version))
+        missing = [key for key in keys if key not in found]
+        if missing:
+            from_l2 = self.l2.get_many(missing, version)
+            found.update(from_l2)
+            hot_values = {key: value for key, value in from_l2.items() if self._hot(key)}
+            if hot_values:
+                self.l1.set_many(hot_values, self.l1_timeout, version)
+        return found
+
+    def has_key(self, key, version=None):
+        return self.l2.has_key(key, version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, timeout, version)
+        if self._hot(key):
+            self.l1.set(key, value, self._l1_timeout(timeout), version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set_many(data, timeout, version)
+        hot_values = {key: value for key, value in data.items() if self._hot(key)}
+        if hot_values:
+            self.l1.set_many(hot_values, self._l1_timeout(timeout), version)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l1.delete(key, version)
+        return self.l2.add(key, value, timeout, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self.l1.delete(key, version)
+        return self.l2.delete(key, version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.l1.delete_many(keys, version)
+        self.l2.delete_many(keys, version)
+
+    def clear(self):
+        self.l1.clear()
+        self.l2.clear()
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
@@ -0,0 +1,217 @@
+# finance_dashboard/services/circuit_breaker.py
+"""
+Circuit breaker + token-bucket rate limiter cho từng upstream (yahoo, fred...).
+
+- Breaker: closed -> open sau ``failure_threshold`` lỗi liên tiếp; khi open mọi
+  call bị từ chối ngay (CircuitOpenError) thay vì retry/chờ; sau
+  ``recovery_timeout`` giây chuyển half-open và cho một call thử: thành công ->
+  closed, lỗi -> open lại.
+- Rate limiter: token bucket thích nghi (AIMD) - lỗi thì giảm nửa rate, thành
+  công thì tăng dần lại tới rate cấu hình. Chờ token tối đa ``max_wait`` giây.
+
+State dùng chung trong process (mọi thread), cấu hình bởi ``settings.UPSTREAM_LIMITS``.
+Caller bắt ``UpstreamUnavailable`` và trả về dữ liệu đã cache / bar store.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+DEFAULT_LIMITS = {
+    "failure_threshold": 5,
+    "recovery_timeout": 30,
+    "rate": 2.0,
+    "burst": 5,
+    "min_rate": 0.1,
+    "max_wait": 2.0,
+}
+
+
+class UpstreamUnavailable(Exception):
+    """Call bị từ chối mà không gọi upstream (circuit open hoặc hết token)."""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    pass
+
+
+class RateLimitedError(UpstreamUnavailable):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._stats = {"calls": 0, "successes": 0, "failures": 0, "rejections": 0, "opened": 0}
+
+    def before_call(self):
+        """Raise CircuitOpenError nếu call không được phép; trả về True nếu đây là call thử half-open."""
+        with self._lock:
+            self._stats["calls"] += 1
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self.state = HALF_OPEN
+                logger.info(f"Circuit {self.name}: half-open, allowing a trial call")
+            if self.state == CLOSED:
+                return False
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._stats["rejections"] += 1
+            raise CircuitOpenError(f"Circuit {self.name} is {self.state}")
+
+    def record_success(self):
+        with self._lock:
+            self._stats["successes"] += 1
+            if self.state != CLOSED:
+                logger.info(f"Circuit {self.name}: closed")
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._stats["failures"] += 1
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self._stats["opened"] += 1
+                    logger.warning(f"Circuit {self.name}: open after {self.failures} failure(s)")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(0.0, round(self.recovery_timeout - (time.monotonic() - self.opened_at), 1))
+            return dict(self._stats, state=self.state, consecutive_failures=self.failures, retry_in=retry_in)
+
+
+class TokenBucket:
+    """Token bucket với rate thích nghi (AIMD)."""
+
+    def __init__(self, name, rate=2.0, burst=5, min_rate=0.1, max_wait=2.0):
+        self.name = name
+        self.max_rate = float(rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.rate = self.max_rate
+        self.capacity = float(burst)
+        self.max_wait = max_wait
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = {"acquired": 0, "rejections": 0, "waited_seconds": 0.0}
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, max_wait=None):
+        """Lấy một token, chờ tối đa ``max_wait`` giây; hết thời gian -> RateLimitedError."""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self._stats["acquired"] += 1
+                    self._stats["waited_seconds"] += waited
+                    return
+                wait = (1 - self.tokens) / self.rate
+                if now + wait > deadline:
+                    self._stats["rejections"] += 1
+                    raise RateLimitedError(f"Rate limit for {self.name} exceeded")
+            time.sleep(wait)
+            waited += wait
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.1)
+
+    def on_failure(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def stats(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return dict(self._stats, rate=round(self.rate, 3), tokens=round(self.tokens, 2),
+                        waited_seconds=round(self._stats["waited_seconds"], 3))
+
+
+class UpstreamGuard:
+    """Breaker + limiter cho một upstream."""
+
+    def __init__(self, name, **options):
+        limits = dict(DEFAULT_LIMITS, **options)
+        self.name = name
+        self.breaker = CircuitBreaker(name, limits["failure_threshold"], limits["recovery_timeout"])
+        self.limiter = TokenBucket(name, limits["rate"], limits["burst"], limits["min_rate"], limits["max_wait"])
+
+    def call(self, fn, *args, is_failure=None, **kwargs):
+        """
+        Gọi ``fn`` qua breaker và limiter. Exception của ``fn`` được tính là lỗi và
+        raise lại; ``is_failure(result)`` cho phép coi một kết quả (ví dụ response báo lỗi) là lỗi.
+        """
+        trial = self.breaker.before_call()
+        if not trial:
+            # Call thử half-open không chờ token: rate đã bị giảm về min khi circuit open
+            self.limiter.acquire()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self._failed()
+            raise
+        if is_failure is not None and is_failure(result):
+            self._failed()
+        else:
+            self.breaker.record_success()
+            self.limiter.on_success()
+        return result
+
+    def _failed(self):
+        self.breaker.record_failure()
+        self.limiter.on_failure()
+
+    def stats(self):
+        return {"circuit": self.breaker.stats(), "rate_limiter": self.limiter.stats()}
+
+
+_guards = {}
+_guards_lock = threading.Lock()
+
+
+def get_guard(name):
+    """Guard dùng chung trong process cho upstream ``name``."""
+    guard = _guards.get(name)
+    if guard is None:
+        with _guards_lock:
+            guard = _guards.get(name)
+            if guard is None:
+                options = getattr(settings, "UPSTREAM_LIMITS", {}).get(name, {})
+                guard = _guards[name] = UpstreamGuard(name, **options)
+    return guard
+
+
+def guard_stats():
+    with _guards_lock:
+        guards = list(_guards.values())
+    return {guard.name: guard.stats() for guard in guards}
@@ -0,0 +1,101 @@
+# finance_dashboard/services/conditional_get.py
+"""
+Conditional GET (ETag / Last-Modified -> 304) theo version của dữ liệu.
+
+Version được tính rẻ và không gọi upstream:
+- bars: ts cuối + số bars + thời điểm refresh trong bar store (``BarStore.data_version``);
+- querysets: số dòng + max(updated_at) trong một query aggregate;
+- payload cache: refreshed_at (``market_cache.payload_version``).
+
+``conditional(version_func)`` bọc ``django.views.decorators.http.condition``;
+``version_func(request, *args, **kwargs)`` chạy một lần mỗi request và trả về
+DataVersion (etag None -> không có validator, view render bình thường).
+Với async views version được tính trong executor (ORM/cache) trước khi vào condition().
+"""
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+from typing import NamedTuple, Optional
+
+from asgiref.sync import iscoroutinefunction
+from django.db.models import Count, Max
+from django.views.decorators.http import condition
+
+from .async_market import run_blocking
+from .bar_store import get_bar_store
+from .market_cache import payload_version as cached_payload_version
+
+
+class DataVersion(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[datetime] = None
+
+
+UNKNOWN = DataVersion(None)
+
+
+def _digest(*parts):
+    return hashlib.md5("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def combine(*versions, extra=()):
+    """Gộp nhiều versions (và tham số của response); một phần chưa biết -> UNKNOWN."""
+    if any(version.etag is None for version in versions):
+        return UNKNOWN
+    modified = [version.last_modified for version in versions if version.last_modified]
+    return DataVersion(_digest(*[version.etag for version in versions], *extra), max(modified, default=None))
+
+
+def bars_version(symbols, period, interval="1d"):
+    """Version của cửa sổ ``period`` bars cho ``symbols`` (DB + cache)."""
+    store = get_bar_store()
+    version = store.data_version(symbols, interval=interval, start=store.window_start(period))
+    if version is None:
+        return UNKNOWN
+    token, refreshed_at = version
+    return DataVersion(token, datetime.fromtimestamp(refreshed_at, tz=dt_timezone.utc) if refreshed_at else None)
+
+
+def queryset_version(queryset, field="updated_at"):
+    """Số dòng + max(``field``): đổi khi có dòng thêm/xóa/sửa."""
+    row = queryset.order_by().aggregate(rows=Count("pk"), updated=Max(field))
+    return DataVersion(_digest(row["rows"], row["updated"]), row["updated"])
+
+
+def payload_version(keys):
+    """Version của các payload market cache (refreshed_at); thiếu/cũ -> UNKNOWN."""
+    token = cached_payload_version(keys)
+    return DataVersion(token) if token else UNKNOWN
+
+
+def conditional(version_func):
+    """condition() với ETag và Last-Modified lấy từ cùng một lần tính version."""
+    def decorator(view):
+        def version(request, *args, **kwargs):
+            if not hasattr(request, "_data_version"):
+                request._data_version = version_func(request, *args, **kwargs)
+            return request._data_version
+
+        conditional_view = condition(
+            etag_func=lambda request, *args, **kwargs: version(request, *args, **kwargs).etag,
+            last_modified_func=lambda request, *args, **kwargs: version(request, *args, **kwargs).last_modified,
+        )(view)
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ("GET", "HEAD"):
+                    return await view(request, *args, **kwargs)
+                # condition() gọi etag_func đồng bộ -> tính (và memo) version trong thread trước
+                await run_blocking(version, request, *args, **kwargs)
+                return await conditional_view(request, *args, **kwargs)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            # Chỉ GET/HEAD: POST của analysis_ajax... không có validator
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+            return conditional_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,105 @@
+# finance_dashboard/services/equity_engine.py
+"""
+Equity curve / drawdown / risk metrics vectorized (NumPy) từ mảng PnL của các trades.
+
+Quy ước dùng chung cho view, Portfolio.max_drawdown và PortfolioAnalytics:
+- float64, equity bắt đầu từ ``initial`` (Portfolio.amount);
+- drawdown = (peak - equity) / peak, >= 0 (0 khi peak <= 0);
+- return của trade = pnl / equity trước trade;
+- Sharpe / Sortino tính theo trade (không annualize): mean / std (ddof=1) và
+  mean / downside deviation (sqrt(mean(min(r, 0)^2)));
+- profit factor = gross win / |gross loss| (None khi không có trade lỗ);
+- longest drawdown = số trades liên tiếp nhiều nhất nằm dưới peak.
+
+``equity_curve(..., peak=...)`` cho phép nối tiếp một curve đã có (cập nhật
+incremental của PortfolioAnalytics dùng cùng công thức với rebuild).
+"""
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+
+class EquityCurve(NamedTuple):
+    equity: np.ndarray    # equity sau mỗi trade
+    peak: np.ndarray      # running peak (tính cả equity ban đầu)
+    drawdown: np.ndarray  # (peak - equity) / peak
+    returns: np.ndarray   # pnl / equity trước trade
+
+
+def equity_curve(pnls, initial, peak=None):
+    """Curve cho ``pnls`` (theo thứ tự thời gian), bắt đầu từ equity ``initial`` và peak ``peak``"""
+    pnls = np.asarray(pnls, dtype=np.float64)
+    initial = float(initial)
+    start_peak = initial if peak is None else max(float(peak), initial)
+
+    equity = initial + np.cumsum(pnls)
+    running_peak = np.maximum(np.maximum.accumulate(equity), start_peak)
+    drawdown = np.zeros_like(equity)
+    np.divide(running_peak - equity, running_peak, out=drawdown, where=running_peak > 0)
+
+    before = np.concatenate(([initial], equity[:-1])) if equity.size else equity
+    returns = np.zeros_like(pnls)
+    np.divide(pnls, before, out=returns, where=before > 0)
+    return EquityCurve(equity, running_peak, drawdown, returns)
+
+
+def max_drawdown(curve):
+    return float(curve.drawdown.max()) if curve.drawdown.size else 0.0
+
+
+def drawdown_runs(curve, underwater_before=0):
+    """
+    (longest, current): số trades liên tiếp dưới peak dài nhất và của đoạn cuối.
+    ``underwater_before``: số trades đang dưới peak trước curve này (nối tiếp).
+    """
+    underwater = curve.drawdown > 0
+    if not underwater.size:
+        return underwater_before, underwater_before
+    index = np.arange(underwater.size)
+    # Vị trí gần nhất không ở dưới peak; -1 - underwater_before = trước curve
+    last_reset = np.maximum.accumulate(np.where(underwater, -1 - underwater_before, index))
+    runs = np.where(underwater, index - last_reset, 0)
+    return int(max(runs.max(), underwater_before)), int(runs[-1])
+
+
+def return_sums(returns):
+    """(sum r, sum r^2, sum min(r, 0)^2): đủ để tính Sharpe / Sortino và cộng dồn incremental"""
+    returns = np.asarray(returns, dtype=np.float64)
+    downside = np.minimum(returns, 0.0)
+    return float(returns.sum()), float(np.dot(returns, returns)), float(np.dot(downside, downside))
+
+
+def sharpe_ratio(count, total, total_sq):
+    if count < 2:
+        return None
+    variance = (total_sq - total * total / count) / (count - 1)
+    if variance <= 0:
+        return None
+    return (total / count) / math.sqrt(variance)
+
+
+def sortino_ratio(count, total, downside_sq):
+    if count < 1 or downside_sq <= 0:
+        return None
+    return (total / count) / math.sqrt(downside_sq / count)
+
+
+def profit_factor(gross_win, gross_loss):
+    gross_loss = abs(float(gross_loss))
+    return float(gross_win) / gross_loss if gross_loss else None
+
+
+def risk_metrics(pnls, initial):
+    """Tất cả metrics cho một mảng PnL"""
+    pnls = np.asarray(pnls, dtype=np.float64)
+    curve = equity_curve(pnls, initial)
+    total, total_sq, downside_sq = return_sums(curve.returns)
+    longest, _ = drawdown_runs(curve)
+    return {
+        "max_drawdown": max_drawdown(curve),
+        "sharpe": sharpe_ratio(pnls.size, total, total_sq),
+        "sortino": sortino_ratio(pnls.size, total, downside_sq),
+        "profit_factor": profit_factor(pnls[pnls > 0].sum(), pnls[pnls < 0].sum()),
+        "longest_drawdown": longest,
+    }
@@ -1,6 +1,57 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
+from django.core.cache import cache
+from .bar_store import get_bar_store
+from .market_data import since, symbol_frame
+from .streaming_indicators import EMA, MACD, RSI, SMA, IndicatorSet
+
+# State streaming của get_forex_data được giữ trong cache (giây)
+FOREX_STATE_TIMEOUT = 7 * 24 * 3600
+FOREX_STATE_HISTORY = 400
+
+
+def forex_indicator_set(indicators, history=FOREX_STATE_HISTORY):
+    """
+    Indicators của get_forex_data, cùng công thức pandas như trước:
+    SMA min_periods=1, EMA/MACD ``ewm(span=...)`` (adjust=True), RSI rolling mean 14.
+    """
+    items = []
+    if "sma" in indicators:
+        items += [SMA(20, min_periods=1, columns=["SMA20"]),
+                  SMA(50, min_periods=1, columns=["SMA50"]),
+                  SMA(200, min_periods=1, columns=["SMA200"])]
+    if "ema" in indicators:
+        items += [EMA(12, adjust=True, columns=["EMA12"]),
+                  EMA(26, adjust=True, columns=["EMA26"])]
+    if "rsi" in indicators:
+        items.append(RSI(14, smoothing="sma", columns=["RSI"]))
+    if "macd" in indicators:
+        items.append(MACD(12, 26, 9, adjust=True, warmup=False, columns=["MACD", "MACD_signal"]))
+    return IndicatorSet(items, history=history)
+
+
+def _apply_indicators(df, symbol, interval, indicators, start=None, persist=True):
+    """
+    Indicators trên ``df`` (toàn bộ lịch sử đã lưu của symbol), trả về các dòng từ ``start``.
+    State neo vào bar đầu của lịch sử nên mỗi bar mới chỉ cần cập nhật state.
+    """
+    key = f"forex_state_{symbol}_{interval}_{'-'.join(sorted(indicators))}"
+    window = since(df, start)
+    data = cache.get(key) if persist else None
+    state = IndicatorSet.from_dict(data) if data else None
+    if state is None or len(window) > state.history or not state.can_advance(df):
+        state = forex_indicator_set(indicators, history=max(FOREX_STATE_HISTORY, len(window)))
+    live = state.advance(df)
+    if persist:
+        cache.set(key, state.to_dict(), FOREX_STATE_TIMEOUT)
+
+    df = window.join(live.frame(start)[live.columns])
+    if "RSI" in df:
+        df["RSI"] = df["RSI"].fillna(50)
+    if "MACD" in df:
+        df["MACD_histogram"] = df["MACD"] - df["MACD_signal"]
+    return df
+
 
 def get_forex_data(symbol="EURUSD=X", period="3mo", interval="1d", indicators=None):
     """
@@ -8,8 +59,11 @@ def get_forex_data(symbol="EURUSD=X", period="3mo", interval="1d", indicators=No
     indicators: list ["sma", "ema", "rsi", "macd"]
     """
     try:
-        ticker = yf.Ticker(symbol)
-        df = ticker.history(period=period, interval=interval)
+        store = get_bar_store()
+        start = store.window_start(period)
+        store.ensure_fresh([symbol], interval=interval, start=start)
+        df = symbol_frame(store.read([symbol], interval=interval), symbol)
+        fallback = since(df, start).empty
         
         if df.empty:
             # Fallback data nếu không lấy được dữ liệu
@@ -21,34 +75,13 @@ def get_forex_data(symbol="EURUSD=X", period="3mo", interval="1d", indicators=No
                 'Low': [1.07 + 0.01 * np.sin(i/10) for i in range(30)],
                 'Volume': [1000000] * 30
             }, index=dates)
+            start = None
 
-        # Tính toán indicators
+        # Tính toán indicators (streaming: nếu đã có state thì chỉ xử lý các bar mới)
         if indicators:
-            if "sma" in indicators:
-                df["SMA20"] = df["Close"].rolling(window=20, min_periods=1).mean()
-                df["SMA50"] = df["Close"].rolling(window=50, min_periods=1).mean()
-                df["SMA200"] = df["Close"].rolling(window=200, min_periods=1).mean()
-            
-            if "ema" in indicators:
-                df["EMA12"] = df["Close"].ewm(span=12).mean()
-                df["EMA26"] = df["Close"].ewm(span=26).mean()
-            
-            if "rsi" in indicators:
-                # Tính RSI
-                delta = df["Close"].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                rs = gain / loss
-                df["RSI"] = 100 - (100 / (1 + rs))
-                df["RSI"] = df["RSI"].fillna(50)
-            
-            if "macd" in indicators:
-                # Tính MACD
-                ema12 = df["Close"].ewm(span=12).mean()
-                ema26 = df["Close"].ewm(span=26).mean()
-                df["MACD"] = ema12 - ema26
-                df["MACD_signal"] = df["MACD"].ewm(span=9).mean()
-                df["MACD_histogram"] = df["MACD"] - df["MACD_signal"]
+            df = _apply_indicators(df, symbol, interval, indicators, start=start, persist=not fallback)
+        else:
+            df = since(df, start)
 
         return df
     except Exception as e:
@@ -0,0 +1,292 @@
+# finance_dashboard/services/indicators.py
+"""
+Indicator engine vectorized: tính tất cả indicators cho N symbols cùng lúc
+trên ma trận giá 2-D (thời gian x symbol) bằng NumPy.
+
+- Mỗi symbol được căn phải (bar cuối cùng ở dòng cuối), phần thiếu ở đầu là NaN,
+  nên symbols có lịch giao dịch khác nhau (forex / cổ phiếu) vẫn dùng chung ma trận.
+- Rolling windows dùng ``sliding_window_view`` trên cả ma trận; EWM / Wilder
+  smoothing là một vòng lặp theo thời gian, mỗi bước là phép toán vector trên
+  tất cả symbols.
+- Kết quả khớp với thư viện ``ta`` (fillna=False) tới sai số float; riêng ATR
+  trả NaN trong giai đoạn warm-up thay vì 0 như ``ta``.
+- Mỗi indicator được khai báo trong registry ``INDICATORS`` (dependencies, warm-up,
+  cột output); chỉ những indicator được hỏi và dependencies của chúng được tính.
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .market_data import OHLCV_FIELDS, empty_frame, normalize_frame
+
+# ---------------------------------------------------------------- primitives
+
+def rolling_window(values, window):
+    """View (T, N, window) căn về cuối; dòng t chứa values[t-window+1 : t+1]."""
+    out_shape = (window - 1,) + values.shape[1:] + (window,)
+    pad = np.full(out_shape, np.nan)
+    if len(values) < window:
+        return pad[: len(values)]
+    return np.concatenate([pad, sliding_window_view(values, window, axis=0)], axis=0)
+
+
+def rolling_mean(values, window):
+    return rolling_window(values, window).mean(axis=-1)
+
+
+def rolling_std(values, window, ddof=0):
+    return rolling_window(values, window).std(axis=-1, ddof=ddof)
+
+
+def rolling_min(values, window):
+    return rolling_window(values, window).min(axis=-1)
+
+
+def rolling_max(values, window):
+    return rolling_window(values, window).max(axis=-1)
+
+
+def ewm_mean(values, alpha, min_periods):
+    """
+    Tương đương ``ewm(alpha=alpha, adjust=False, min_periods=min_periods).mean()``
+    cho từng cột; NaN ở đầu cột được bỏ qua (cột bắt đầu ở giá trị hợp lệ đầu tiên).
+    """
+    out = np.full(values.shape, np.nan)
+    state = np.full(values.shape[1:], np.nan)
+    count = np.zeros(values.shape[1:], dtype=int)
+    for t in range(len(values)):
+        x = values[t]
+        valid = ~np.isnan(x)
+        state = np.where(valid, np.where(np.isnan(state), x, alpha * x + (1 - alpha) * state), state)
+        count += valid
+        out[t] = np.where(count >= min_periods, state, np.nan)
+    return out
+
+
+def ema(values, window):
+    return ewm_mean(values, 2.0 / (window + 1), window)
+
+
+def wilder_mean(values, window):
+    """Wilder smoothing khởi tạo bằng trung bình ``window`` giá trị đầu (như ATR của ``ta``)."""
+    out = np.full(values.shape, np.nan)
+    state = np.full(values.shape[1:], np.nan)
+    total = np.zeros(values.shape[1:])
+    count = np.zeros(values.shape[1:], dtype=int)
+    for t in range(len(values)):
+        x = values[t]
+        valid = ~np.isnan(x)
+        count += valid
+        total = np.where(valid & (count <= window), total + np.nan_to_num(x), total)
+        seeded = valid & (count == window)
+        state = np.where(seeded, total / window, state)
+        step = valid & (count > window)
+        state = np.where(step, (state * (window - 1) + np.where(step, x, 0.0)) / window, state)
+        out[t] = np.where(count >= window, state, np.nan)
+    return out
+
+
+def shift(values, periods=1):
+    out = np.full(values.shape, np.nan)
+    out[periods:] = values[:-periods]
+    return out
+
+
+# ---------------------------------------------------------------- indicators
+
+def rsi(close, window=14):
+    diff = close - shift(close)
+    # Như ``ta``: bar đầu tiên (diff NaN) tính là up = down = 0
+    diff = np.where(np.isnan(diff) & ~np.isnan(close), 0.0, diff)
+    up = np.where(diff > 0, diff, np.where(np.isnan(diff), np.nan, 0.0))
+    down = np.where(diff < 0, -diff, np.where(np.isnan(diff), np.nan, 0.0))
+    alpha = 1.0 / window
+    emaup = ewm_mean(up, alpha, window)
+    emadn = ewm_mean(down, alpha, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(emadn == 0, 100.0, 100 - 100 / (1 + emaup / emadn))
+
+
+def true_range(high, low, close):
+    prev_close = shift(close)
+    # fmax bỏ qua NaN: bar đầu tiên dùng high - low
+    return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+
+# ------------------------------------------------------------------ registry
+
+class IndicatorSpec:
+    """
+    Khai báo một indicator: ``compute(ctx)`` nhận ctx {tên cột: ma trận (T, N)} đã có
+    OHLC và các cột của ``depends``, trả về {cột output: ma trận}.
+    ``warmup``: số bars cần để có giá trị đầu tiên; ``display=False`` là indicator
+    chỉ dùng làm dependency (không có trong payload).
+    ``signal`` / ``signal_inputs``: tên hàm ``AnalysisService._get_<signal>_signal`` và các cột truyền vào.
+    """
+
+    def __init__(self, name, compute, columns=None, depends=(), warmup=0, decimals=5,
+                 signal=None, signal_inputs=(), display=True):
+        self.name = name
+        self.compute = compute
+        self.columns = tuple(columns or (name,))
+        self.depends = tuple(depends)
+        self.warmup = warmup
+        self.decimals = decimals
+        self.signal = signal
+        self.signal_inputs = tuple(signal_inputs)
+        self.display = display
+
+
+INDICATORS = {}
+
+
+def register(name, **options):
+    def decorator(compute):
+        INDICATORS[name] = IndicatorSpec(name, compute, **options)
+        return compute
+    return decorator
+
+
+@register("SMA_20", warmup=20, decimals=5, signal="ma", signal_inputs=("Close", "SMA_20"))
+def _sma_20(ctx):
+    return {"SMA_20": rolling_mean(ctx["Close"], 20)}
+
+
+@register("SMA_50", warmup=50, decimals=5, signal="ma", signal_inputs=("Close", "SMA_50"))
+def _sma_50(ctx):
+    return {"SMA_50": rolling_mean(ctx["Close"], 50)}
+
+
+@register("EMA_12", warmup=12, display=False)
+def _ema_12(ctx):
+    return {"EMA_12": ema(ctx["Close"], 12)}
+
+
+@register("EMA_26", warmup=26, display=False)
+def _ema_26(ctx):
+    return {"EMA_26": ema(ctx["Close"], 26)}
+
+
+@register("RSI_14", warmup=14, decimals=2, signal="rsi", signal_inputs=("RSI_14",))
+def _rsi_14(ctx):
+    return {"RSI_14": rsi(ctx["Close"], 14)}
+
+
+@register("MACD_12_26_9", columns=("MACD_12_26_9", "MACDs_12_26_9"), depends=("EMA_12", "EMA_26"),
+          warmup=34, decimals=6, signal="macd", signal_inputs=("MACD_12_26_9", "MACDs_12_26_9"))
+def _macd(ctx):
+    macd = ctx["EMA_12"] - ctx["EMA_26"]
+    return {"MACD_12_26_9": macd, "MACDs_12_26_9": ema(macd, 9)}
+
+
+@register("BBU_20_2.0", columns=("BBU_20_2.0", "BBL_20_2.0"), depends=("SMA_20",),
+          warmup=20, decimals=5, signal="bb", signal_inputs=("Close", "BBL_20_2.0", "BBU_20_2.0"))
+def _bollinger(ctx):
+    std = rolling_std(ctx["Close"], 20)
+    return {"BBU_20_2.0": ctx["SMA_20"] + 2 * std, "BBL_20_2.0": ctx["SMA_20"] - 2 * std}
+
+
+@register("STOCHk_14_3_3", warmup=14, decimals=2, signal="stoch", signal_inputs=("STOCHk_14_3_3",))
+def _stochastic(ctx):
+    low_14 = rolling_min(ctx["Low"], 14)
+    high_14 = rolling_max(ctx["High"], 14)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {"STOCHk_14_3_3": 100 * (ctx["Close"] - low_14) / (high_14 - low_14)}
+
+
+@register("ATR_14", warmup=14, decimals=6, signal="atr", signal_inputs=("ATR_14",))
+def _atr_14(ctx):
+    return {"ATR_14": wilder_mean(true_range(ctx["High"], ctx["Low"], ctx["Close"]), 14)}
+
+
+# Tất cả cột output (kể cả dependency), theo thứ tự đăng ký
+TECHNICAL_INDICATORS = [column for spec in INDICATORS.values() for column in spec.columns]
+
+
+def display_indicators():
+    """Các indicators hiển thị được (danh sách chọn trên trang Analysis, keys của payload)."""
+    return [name for name, spec in INDICATORS.items() if spec.display]
+
+
+def resolve(names=None):
+    """``names`` + dependencies bắc cầu, theo thứ tự tính (dependency trước). Tên lạ -> KeyError."""
+    order, seen = [], set()
+
+    def visit(name):
+        if name in seen:
+            return
+        seen.add(name)
+        for dependency in INDICATORS[name].depends:
+            visit(dependency)
+        order.append(name)
+
+    for name in (INDICATORS if names is None else names):
+        visit(name)
+    return order
+
+
+def required_bars(names=None):
+    return max((INDICATORS[name].warmup for name in resolve(names)), default=0)
+
+
+def compute_matrices(open_, high, low, close, names=None):
+    """Các indicators ``names`` (mặc định: tất cả) + dependencies trên ma trận (T, N) -> {cột: ma trận}."""
+    ctx = {"Open": open_, "High": high, "Low": low, "Close": close}
+    columns = []
+    for name in resolve(names):
+        spec = INDICATORS[name]
+        ctx.update(spec.compute(ctx))
+        columns.extend(spec.columns)
+    return {column: ctx[column] for column in columns}
+
+
+# ------------------------------------------------------------------ frames
+
+def price_matrix(frame, symbols, fields=OHLCV_FIELDS):
+    """
+    frame cột ``(symbol, field)`` -> ({field: ma trận (T, N)}, counts, positions).
+
+    Mỗi symbol chỉ giữ các dòng có Close và được căn phải: ``counts[j]`` là số bar
+    của symbol j, ``positions[:, j]`` là vị trí dòng tương ứng trong ``frame.index``.
+    Việc "dồn" các dòng hợp lệ xuống cuối làm bằng một argsort ổn định cho cả ma trận.
+    """
+    frame = normalize_frame(frame, symbols) if frame is None or frame.empty else frame
+    raw = {field: frame.xs(field, axis=1, level=1).reindex(columns=symbols).to_numpy(dtype=float) for field in fields}
+    valid = ~np.isnan(raw["Close"])
+    counts = valid.sum(axis=0)
+    length = int(counts.max()) if len(symbols) else 0
+
+    # False (NaN) trước, True sau, giữ nguyên thứ tự thời gian trong mỗi nhóm
+    positions = np.argsort(valid, axis=0, kind="stable")[len(valid) - length:]
+    padding = np.arange(length)[:, None] < (length - counts)[None, :]
+    matrices = {}
+    for field, values in raw.items():
+        packed = np.take_along_axis(values, positions, axis=0)
+        packed[padding] = np.nan
+        matrices[field] = packed
+    return matrices, counts, positions
+
+
+def compute_indicators(frame, symbols, names=None):
+    """
+    Indicators cho nhiều symbols trong một lần tính.
+    Trả về {symbol: DataFrame OHLCV + các cột của ``names`` và dependencies}
+    (mặc định tất cả INDICATORS), index theo ngày của symbol.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    matrices, counts, positions = price_matrix(frame, symbols)
+    length = len(matrices["Close"])
+    if not length:
+        return {symbol: empty_frame([symbol])[symbol] for symbol in symbols}
+
+    results = compute_matrices(matrices["Open"], matrices["High"], matrices["Low"], matrices["Close"], names)
+    columns = OHLCV_FIELDS + list(results)
+    # (T, N, cột): mỗi symbol là một lát 2-D -> DataFrame một block
+    stacked = np.stack([matrices[field] for field in OHLCV_FIELDS] + list(results.values()), axis=-1)
+    index = frame.index
+    out = {}
+    for j, symbol in enumerate(symbols):
+        rows = int(counts[j])
+        dates = index[positions[length - rows:, j]] if rows else index[:0]
+        out[symbol] = pd.DataFrame(stacked[length - rows:, j, :], index=dates, columns=columns)
+    return out
@@ -0,0 +1,149 @@
+# finance_dashboard/services/insight_search.py
+"""
+Full-text search cho Insight (title, summary, reason, analysis, lessons, tags).
+
+- SQLite: bảng FTS5 external content ``finance_dashboard_insight_fts`` (tokenizer
+  unicode61, bỏ dấu, prefix index 2/3 ký tự), đồng bộ bằng triggers insert / update /
+  delete trên bảng insight -> cả bulk_create / QuerySet.update / delete đều được index;
+- PostgreSQL: cột generated ``search_vector`` (tsvector 'simple', title > tags > nội dung)
+  + GIN index, Postgres tự cập nhật khi ghi;
+- ``search``: mỗi từ của q là một prefix (gõ tới đâu tìm tới đó), tất cả phải khớp;
+  kết quả xếp theo relevance (bm25 / ts_rank) rồi date mới nhất.
+
+Schema được tạo bởi migration 0024 (bản chép DDL riêng, sửa ở đây không đổi migration).
+SQLite remake bảng insight khi AlterField (drop cả triggers) -> post_migrate gọi lại
+``install`` (idempotent) để tạo lại triggers.
+Database khác hoặc q không có từ nào -> icontains như trước.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+FTS_TABLE = "finance_dashboard_insight_fts"
+INSIGHT_TABLE = "finance_dashboard_insight"
+COLUMNS = ["title", "summary", "reason", "analysis", "lessons", "tags"]
+# bm25: trọng số theo thứ tự COLUMNS
+BM25_WEIGHTS = [10.0, 3.0, 1.0, 1.0, 1.0, 5.0]
+
+WORD_RE = re.compile(r"\w+")
+
+
+def _sqlite_schema():
+    columns = ", ".join(COLUMNS)
+    new_values = ", ".join(f"new.{column}" for column in COLUMNS)
+    old_values = ", ".join(f"old.{column}" for column in COLUMNS)
+    insert = f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});"
+    delete = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({columns}, content='{INSIGHT_TABLE}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {INSIGHT_TABLE} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {INSIGHT_TABLE} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {INSIGHT_TABLE} BEGIN {delete} {insert} END",
+    ]
+
+
+def _postgres_schema():
+    def weighted(columns, weight):
+        text = " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+        return f"setweight(to_tsvector('simple', {text}), '{weight}')"
+
+    vector = " || ".join([
+        weighted(["title"], "A"),
+        weighted(["tags"], "B"),
+        weighted(["summary", "reason", "analysis", "lessons"], "C"),
+    ])
+    return [
+        f"ALTER TABLE {INSIGHT_TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({vector}) STORED",
+        f"CREATE INDEX IF NOT EXISTS insight_search_vector_idx ON {INSIGHT_TABLE} USING GIN (search_vector)",
+    ]
+
+
+def _triggers_missing(cursor):
+    cursor.execute(
+        "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s", [f"{FTS_TABLE}_a_"]
+    )
+    return cursor.fetchone()[0] < 3
+
+
+def install(conn=None):
+    """Tạo index + đồng bộ (idempotent); SQLite: rebuild FTS nếu triggers vừa được tạo lại"""
+    conn = conn or connection
+    with conn.cursor() as cursor:
+        if conn.vendor == "sqlite":
+            rebuild = _triggers_missing(cursor)
+            for sql in _sqlite_schema():
+                cursor.execute(sql)
+            if rebuild:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif conn.vendor == "postgresql":
+            for sql in _postgres_schema():
+                cursor.execute(sql)
+
+
+def uninstall(conn=None):
+    conn = conn or connection
+    with conn.cursor() as cursor:
+        if conn.vendor == "sqlite":
+            for suffix in ("ai", "ad", "au"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        elif conn.vendor == "postgresql":
+            cursor.execute("DROP INDEX IF EXISTS insight_search_vector_idx")
+            cursor.execute(f"ALTER TABLE {INSIGHT_TABLE} DROP COLUMN IF EXISTS search_vector")
+
+
+def rebuild_index(conn=None):
+    """Đọc lại toàn bộ insights vào FTS5 (Postgres: generated column, không cần)"""
+    conn = conn or connection
+    install(conn)
+    if conn.vendor == "sqlite":
+        with conn.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def search_terms(q):
+    return WORD_RE.findall(q or "")
+
+
+def contains_filter(q):
+    """Filter cũ (LIKE '%q%' trên 6 cột): fallback và baseline của benchmark"""
+    condition = Q()
+    for column in COLUMNS:
+        condition |= Q(**{f"{column}__icontains": q})
+    return condition
+
+
+def is_ranked(queryset):
+    """True nếu ``queryset`` đã xếp theo relevance (cursor theo rank, xem services/keyset.py)"""
+    return "search_rank" in queryset.query.extra_select
+
+
+def search(queryset, q):
+    """``queryset`` (Insight) lọc theo q, xếp theo relevance rồi -date"""
+    terms = search_terms(q)
+    if not terms or connection.vendor not in ("sqlite", "postgresql"):
+        return queryset.filter(contains_filter(q))
+
+    if connection.vendor == "sqlite":
+        match = " ".join('"%s"*' % term for term in terms)
+        weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+        return queryset.extra(
+            select={"search_rank": f"bm25({FTS_TABLE}, {weights})"},
+            tables=[FTS_TABLE],
+            where=[f"{FTS_TABLE}.rowid = {INSIGHT_TABLE}.id", f"{FTS_TABLE} MATCH %s"],
+            params=[match],
+            order_by=["search_rank", "-date", "-id"],
+        )
+
+    # ts_rank: lớn hơn = liên quan hơn -> đổi dấu để cùng thứ tự tăng dần với bm25
+    tsquery = " & ".join(f"{term}:*" for term in terms)
+    return queryset.extra(
+        select={"search_rank": "-ts_rank(search_vector, to_tsquery('simple', %s))"},
+        select_params=[tsquery],
+        where=["search_vector @@ to_tsquery('simple', %s)"],
+        params=[tsquery],
+        order_by=["search_rank", "-date", "-id"],
+    )
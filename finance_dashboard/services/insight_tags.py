@@ -0,0 +1,61 @@
+# finance_dashboard/services/insight_tags.py
+"""
+Tags của Insight: ``Insight.tags`` là chuỗi nhập tự do, ``Insight.normalized_tags`` là
+bản chuẩn hóa (bảng Tag, name unique) dùng để lọc và đếm bằng index thay vì
+tags__icontains ("eur" không còn khớp "euro").
+
+- ``parse_tags``: tách theo , ; # xuống dòng; mỗi phần -> slug lowercase ("Risk Mgmt" -> "risk-mgmt");
+- ``sync_insight_tags``: gọi sau mỗi lần lưu insight (finance_dashboard/signals.py);
+- ``tag_counts``: [(name, số insights)] từ một query GROUP BY, cache tới lần ghi insight kế tiếp.
+
+Migration 0025 backfill từ các chuỗi tags hiện có.
+"""
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils.text import slugify
+
+from finance_dashboard.models import Tag
+
+TAG_SPLIT_RE = re.compile(r"[,;#\n]+")
+TAG_COUNTS_KEY = "insight_tag_counts"
+
+
+def normalize_tag(value):
+    return slugify(value or "", allow_unicode=True)[:50]
+
+
+def parse_tags(text):
+    names = []
+    for part in TAG_SPLIT_RE.split(text or ""):
+        name = normalize_tag(part)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def sync_insight_tags(insight):
+    """normalized_tags = parse_tags(insight.tags); tạo Tag còn thiếu trong một query"""
+    names = parse_tags(insight.tags)
+    if names:
+        Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+    insight.normalized_tags.set(Tag.objects.filter(name__in=names) if names else [])
+
+
+def tag_counts():
+    counts = cache.get(TAG_COUNTS_KEY)
+    if counts is None:
+        counts = list(
+            Tag.objects.annotate(insight_count=Count("insights"))
+            .filter(insight_count__gt=0)
+            .order_by("-insight_count", "name")
+            .values_list("name", "insight_count")
+        )
+        cache.set(TAG_COUNTS_KEY, counts, getattr(settings, "INSIGHT_TAG_COUNTS_TIMEOUT", 3600))
+    return counts
+
+
+def invalidate_tag_counts():
+    cache.delete(TAG_COUNTS_KEY)
@@ -0,0 +1,96 @@
+# finance_dashboard/services/json_fragments.py
+"""
+Ghép JSON response từ các fragment đã encode sẵn.
+
+- ``dumps``: encoder nhanh (orjson nếu có, serialize được numpy/datetime),
+  fallback json + DjangoJSONEncoder như JsonResponse.
+- ``Fragment``: bytes JSON đã encode, được chèn nguyên vào response.
+- ``cached_fragment``: fragment của một component được cache theo data
+  version (``json_fragment_{name}_{version}``); khi version không đổi thì
+  không cần đọc/decode payload hay encode lại.
+- ``FragmentResponse``: HttpResponse JSON ghép từ dict chứa Fragment.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # orjson là optional
+    orjson = None
+
+_django_default = DjangoJSONEncoder().default
+
+
+class Fragment(bytes):
+    """JSON đã encode sẵn."""
+
+    @property
+    def is_null(self):
+        return self == b"null"
+
+    def text(self):
+        return self.decode()
+
+
+def _default(value):
+    if isinstance(value, Fragment):
+        raise TypeError("Fragment must be spliced with join()")
+    return _django_default(value)
+
+
+def dumps(value):
+    """value -> JSON bytes (dict lồng Fragment dùng ``join``)."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+
+
+def join(value):
+    """Encode ``value``, chèn nguyên các Fragment (ở bất kỳ mức dict nào)."""
+    if isinstance(value, Fragment):
+        return bytes(value)
+    if isinstance(value, dict) and any(isinstance(item, (Fragment, dict)) for item in value.values()):
+        parts = [dumps(str(key)) + b":" + join(item) for key, item in value.items()]
+        return b"{" + b",".join(parts) + b"}"
+    return dumps(value)
+
+
+def fragment_key(name, version):
+    return f"json_fragment_{name}_{hashlib.md5(str(version).encode()).hexdigest()}"
+
+
+def _wrap(encoded):
+    if isinstance(encoded, dict):
+        return {key: Fragment(item) for key, item in encoded.items()}
+    return Fragment(encoded)
+
+
+def cached_fragment(name, version, build, timeout, encode=dumps):
+    """
+    Fragment JSON của ``build()`` cho ``version`` (callable trả về version hiện
+    tại của dữ liệu, None nếu dữ liệu thiếu/cũ -> luôn build lại và không cache).
+    ``encode`` có thể trả về {key: bytes} -> kết quả là {key: Fragment}.
+    """
+    # Version lấy một lần trước build(): đọc lại sau build có thể gắn fragment cũ vào
+    # version mới hơn (dữ liệu đổi giữa lúc build). Dữ liệu vừa được build() load -> lần sau cache.
+    current = version()
+    if current is not None:
+        hit = cache.get(fragment_key(name, current))
+        if hit is not None:
+            return _wrap(hit)
+    encoded = encode(build())
+    if current is not None:
+        cache.set(fragment_key(name, current), encoded, timeout)
+    return _wrap(encoded)
+
+
+class FragmentResponse(HttpResponse):
+    """Như JsonResponse nhưng các Fragment trong ``data`` được chèn nguyên."""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=join(data), **kwargs)
@@ -0,0 +1,115 @@
+# finance_dashboard/services/keyset.py
+"""
+Keyset (cursor) pagination cho insights / trades thay cho Paginator (COUNT(*) + OFFSET).
+
+- thứ tự (field, id) giảm dần (mới nhất trước); trang sau = WHERE (field, id) < cursor,
+  dùng index date (insight_date_idx, trade_type_date_idx...) nên trang sâu không chậm hơn trang đầu;
+- cursor là chuỗi opaque (base64 JSON) của dòng cuối trang; cursor hỏng -> trang đầu;
+- queryset đã xếp theo relevance (full-text search: search_rank tăng dần, rồi field, id giảm
+  dần) -> cursor là (rank, field, id) của dòng cuối, trang sau so sánh trên biểu thức rank;
+- tổng số dòng là tùy chọn: ``capped_count`` đếm tối đa ``cap`` + 1 dòng ("1000+").
+"""
+import base64
+import binascii
+import json
+from typing import NamedTuple, Optional
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+
+COUNT_CAP = 1000
+RANK = "search_rank"  # extra select của services/insight_search.search
+
+
+class Page(NamedTuple):
+    items: list
+    next_cursor: Optional[str]
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(state):
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    return state if isinstance(state, dict) else None
+
+
+def paginate(queryset, cursor=None, per_page=20, field="date", ranked=False):
+    """Trang ``per_page`` dòng sau ``cursor``; ``ranked``: giữ thứ tự relevance của queryset"""
+    state = decode_cursor(cursor) or {}
+
+    if ranked:
+        rows = list(ranked_queryset(queryset, state, field)[:per_page + 1])
+    else:
+        rows = list(keyset_queryset(queryset, state, field)[:per_page + 1])
+
+    if len(rows) <= per_page:
+        return Page(rows, None)
+    last = rows[per_page - 1]
+    next_state = {"k": getattr(last, field).isoformat(), "pk": last.pk}
+    if ranked:
+        next_state["r"] = getattr(last, RANK)
+    return Page(rows[:per_page], encode_cursor(next_state))
+
+
+def keyset_queryset(queryset, state, field="date"):
+    """``queryset`` xếp theo (field, id) giảm dần, chỉ các dòng sau cursor ``state`` (dict đã decode)"""
+    queryset = queryset.order_by(f"-{field}", "-pk")
+    key = _cursor_key(queryset.model, field, state or {})
+    if key is None:
+        return queryset
+    value, pk = key
+    # (field, id) < (value, pk); điều kiện field <= value đứng riêng để index seek thay vì scan từ đầu
+    return queryset.filter(Q(**{f"{field}__lte": value}), Q(**{f"{field}__lt": value}) | Q(pk__lt=pk))
+
+
+def ranked_queryset(queryset, state, field="date"):
+    """
+    ``queryset`` (đã có extra select ``search_rank`` và xếp theo search_rank, -field, -pk),
+    chỉ các dòng sau cursor ``state``: (rank, -field, -pk) > (r, -k, -pk) của cursor.
+    """
+    key = _cursor_key(queryset.model, field, state or {})
+    rank = (state or {}).get("r")
+    if key is None or not isinstance(rank, (int, float)) or isinstance(rank, bool):
+        return queryset
+    value, pk = key
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    meta = queryset.model._meta
+    column = f"{quote(meta.db_table)}.{quote(meta.get_field(field).column)}"
+    pk_column = f"{quote(meta.db_table)}.{quote(meta.pk.column)}"
+    rank_sql, rank_params = queryset.query.extra_select[RANK]
+    # Biểu thức rank (bm25 / ts_rank) lặp lại trong WHERE: alias của SELECT không dùng được ở đây
+    condition = (
+        f"(({rank_sql}) > %s OR (({rank_sql}) = %s AND "
+        f"({column} < %s OR ({column} = %s AND {pk_column} < %s))))"
+    )
+    value = meta.get_field(field).get_db_prep_value(value, connection)
+    return queryset.extra(where=[condition], params=[*rank_params, rank, *rank_params, rank, value, value, pk])
+
+
+def _cursor_key(model, field, state):
+    if "k" not in state or not isinstance(state.get("pk"), int):
+        return None
+    try:
+        value = model._meta.get_field(field).to_python(state["k"])
+    except (ValidationError, TypeError):
+        return None
+    return (value, state["pk"]) if value is not None else None
+
+
+def capped_count(queryset, cap=COUNT_CAP):
+    """(số dòng, True nếu nhiều hơn ``cap``): COUNT trên tối đa cap + 1 dòng"""
+    count = queryset.order_by()[:cap + 1].count()
+    return min(count, cap), count > cap
@@ -1,7 +1,6 @@
 import pandas as pd
-import yfinance as yf
-import requests
-from datetime import datetime, timedelta
+from .bar_store import get_bar_store
+from .market_data import symbol_frame
 
 def get_cot_data():
     """
@@ -51,8 +50,7 @@ def get_us10y_yield():
     """
     try:
         # Lấy dữ liệu từ yfinance
-        ticker = yf.Ticker("^TNX")  # US 10Y yield
-        hist = ticker.history(period="6mo", interval="1d")
+        hist = symbol_frame(get_bar_store().history(["^TNX"], period="6mo", interval="1d"), "^TNX")  # US 10Y yield
         
         if not hist.empty:
             # Lấy 10 giá trị gần nhất
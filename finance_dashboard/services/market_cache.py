@@ -0,0 +1,208 @@
+# finance_dashboard/services/market_cache.py
+"""
+Helpers cache cho market payloads (symbol_*, chart_data_*, technical_*, macro_tile_*...).
+
+Mỗi payload được lưu trong một envelope ``{value, refreshed_at, source, soft_ttl}``:
+- tuổi < soft TTL: trả về luôn;
+- soft TTL < tuổi < hard TTL (= timeout của cache): trả về giá trị cũ ngay và
+  lên lịch MỘT lần refresh ở background worker (stale-while-revalidate);
+- không có giá trị: request thread load (qua single-flight, nên khi một key hot
+  hết hạn chỉ một caller gọi upstream).
+"""
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from .market_data import get_provider
+from .singleflight import get_singleflight
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+_scheduled = set()
+
+
+def _hard_timeout(timeout, hard_timeout):
+    if hard_timeout is not None:
+        return hard_timeout
+    return int(timeout * getattr(settings, "MARKET_CACHE_HARD_TTL_FACTOR", 6))
+
+
+def _envelope(value, timeout, source):
+    return {"swr": 1, "value": value, "refreshed_at": time.time(), "source": source, "soft_ttl": timeout}
+
+
+def _unwrap(entry):
+    """Giá trị cũ (trước envelope) được coi là stale để tự chuyển sang envelope."""
+    if entry is None:
+        return None
+    if isinstance(entry, dict) and entry.get("swr") == 1:
+        # Value bytes (payload codec cũ, đã bỏ) trong shared cache -> load lại
+        return None if isinstance(entry["value"], bytes) else entry
+    return {"swr": 1, "value": entry, "refreshed_at": 0, "source": None, "soft_ttl": 0}
+
+
+def _store(keys, values, timeout, hard_timeout, source):
+    to_cache = {keys[item]: _envelope(value, timeout, source) for item, value in values.items() if value}
+    if to_cache:
+        cache.set_many(to_cache, timeout=hard_timeout)
+    return {item: value for item, value in values.items() if value}
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "MARKET_CACHE_REFRESH_WORKERS", 2),
+                    thread_name_prefix="market-cache-refresh",
+                )
+    return _executor
+
+
+def _schedule_refresh(keys, items, loader, timeout, hard_timeout, source):
+    flight_key = "|".join(sorted(keys[item] for item in items))
+    marker = "swr_refreshing_" + hashlib.md5(flight_key.encode()).hexdigest()
+
+    with _executor_lock:
+        if flight_key in _scheduled:
+            return
+        # Một worker (process) refresh cho cả cluster nếu cache là shared; marker có timeout
+        # riêng (thời gian tối đa của một lần refresh), không theo soft TTL: worker chết giữa
+        # chừng thì worker khác refresh được ngay sau đó
+        lock_timeout = getattr(settings, "MARKET_CACHE_REFRESH_LOCK_TIMEOUT", 60)
+        if not cache.add(marker, 1, timeout=lock_timeout):
+            return
+        _scheduled.add(flight_key)
+
+    def release():
+        with _executor_lock:
+            _scheduled.discard(flight_key)
+        cache.delete(marker)
+
+    def refresh():
+        try:
+            _store(keys, loader(items), timeout, hard_timeout, source)
+        except Exception as e:
+            logger.error(f"Background refresh failed for {flight_key}: {e}")
+        finally:
+            release()
+            close_old_connections()
+
+    if not getattr(settings, "MARKET_CACHE_BACKGROUND_REFRESH", True):
+        refresh()
+        return
+    try:
+        _get_executor().submit(refresh)
+    except RuntimeError as e:
+        # Executor đã shutdown (process đang tắt): vẫn trả giá trị cũ, không giữ marker
+        logger.warning(f"Background refresh not scheduled for {flight_key}: {e}")
+        release()
+
+
+def cached_many(keys, loader, timeout, hard_timeout=None, source=None, force=False):
+    """
+    keys: {item: cache_key}. loader(items) -> {item: value}; value None/rỗng
+    nghĩa là lỗi và không được cache. ``timeout`` là soft TTL, ``hard_timeout``
+    (mặc định timeout * MARKET_CACHE_HARD_TTL_FACTOR) là thời gian sống trong cache.
+    ``force=True`` load lại tất cả và ghi đè cache (refresher daemon).
+    Trả về {item: value} cho các item có dữ liệu.
+    """
+    hard_timeout = _hard_timeout(timeout, hard_timeout)
+    source = source or get_provider().name
+    if force:
+        return _store(keys, loader(list(keys)), timeout, hard_timeout, source)
+    entries = cache.get_many(list(keys.values()))
+    now = time.time()
+
+    result, stale, missing = {}, [], []
+    for item, key in keys.items():
+        entry = _unwrap(entries.get(key))
+        if entry is None or not entry["value"]:
+            missing.append(item)
+            continue
+        result[item] = entry["value"]
+        if now - entry["refreshed_at"] > entry["soft_ttl"]:
+            stale.append(item)
+
+    if stale:
+        _schedule_refresh(keys, stale, loader, timeout, hard_timeout, source)
+    if not missing:
+        return result
+
+    def load():
+        # Double-check: caller khác (hoặc process khác) có thể vừa set xong
+        fresh = cache.get_many([keys[item] for item in missing])
+        loaded = {}
+        for item in missing:
+            entry = _unwrap(fresh.get(keys[item]))
+            if entry is not None and entry["value"]:
+                loaded[item] = entry["value"]
+        todo = [item for item in missing if item not in loaded]
+        if todo:
+            loaded.update(_store(keys, loader(todo), timeout, hard_timeout, source))
+        return loaded
+
+    flight_key = "|".join(sorted(keys[item] for item in missing))
+    result.update(get_singleflight().do(flight_key, load))
+    return result
+
+
+def cached(key, loader, timeout, hard_timeout=None, source=None, force=False):
+    """Bản một key của cached_many: loader() -> value."""
+    return cached_many({key: key}, lambda items: {key: loader()}, timeout, hard_timeout, source, force).get(key)
+
+
+def payload_version(keys):
+    """
+    Version (hash của refreshed_at) của các payload đang cache, không decode value.
+    None nếu có payload thiếu hoặc quá soft TTL (caller đi qua cached_many để refresh).
+    """
+    keys = list(keys)
+    entries = cache.get_many(keys)
+    now = time.time()
+    parts = []
+    for key in keys:
+        entry = _unwrap(entries.get(key))
+        if entry is None or not entry["value"] or now - entry["refreshed_at"] > entry["soft_ttl"]:
+            return None
+        parts.append(f"{key}:{entry['refreshed_at']:.6f}")
+    return hashlib.md5("|".join(parts).encode()).hexdigest()
+
+
+def get_freshness(keys):
+    """
+    Metadata của các payload đang cache: {key: {age, source, refreshed_at, stale}}.
+    Key không có trong cache bị bỏ qua.
+    """
+    now = time.time()
+    freshness = {}
+    for key, entry in cache.get_many(list(keys)).items():
+        entry = _unwrap(entry)
+        if entry is None:
+            continue
+        refreshed_at = entry["refreshed_at"]
+        freshness[key] = {
+            "age": int(now - refreshed_at) if refreshed_at else None,
+            "source": entry["source"],
+            "refreshed_at": datetime.fromtimestamp(refreshed_at, tz=dt_timezone.utc) if refreshed_at else None,
+            "stale": now - refreshed_at > entry["soft_ttl"],
+        }
+    return freshness
+
+
+def oldest_freshness(keys):
+    """Freshness của payload cũ nhất trong ``keys`` (dùng cho một panel gồm nhiều payload)."""
+    entries = [meta for meta in get_freshness(keys).values() if meta["refreshed_at"]]
+    if not entries:
+        return None
+    return min(entries, key=lambda meta: meta["refreshed_at"])
@@ -0,0 +1,291 @@
+# finance_dashboard/services/market_data.py
+"""
+Market data provider dùng chung cho views và services.
+
+Mọi lần lấy OHLCV đều đi qua ``get_provider().history(symbols, period, interval)``:
+một list symbol -> một lần download (batched), trả về một DataFrame đã căn chỉnh
+theo ngày với cột MultiIndex ``(symbol, field)``.
+
+Provider có thể đổi qua setting ``MARKET_DATA_PROVIDER`` (dotted path), ví dụ
+``FixtureMarketDataProvider`` để chạy offline với dữ liệu CSV / synthetic.
+"""
+import importlib
+import logging
+import os
+import threading
+import zlib
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+
+from .circuit_breaker import UpstreamUnavailable, get_guard
+
+logger = logging.getLogger(__name__)
+
+OHLCV_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+DEFAULT_PROVIDER = "finance_dashboard.services.market_data.MarketDataProvider"
+
+# Số ngày lịch tương ứng với các period của yfinance
+PERIOD_DAYS = {
+    "1d": 1, "2d": 2, "5d": 5, "7d": 7, "30d": 30, "60d": 60, "90d": 90,
+    "1mo": 31, "3mo": 92, "6mo": 183, "1y": 366, "2y": 731, "5y": 1827, "10y": 3653,
+}
+
+
+def period_to_timedelta(period):
+    """'3mo' -> timedelta(days=92). Period không hỗ trợ ('max', 'ytd') -> None."""
+    if period in PERIOD_DAYS:
+        return timedelta(days=PERIOD_DAYS[period])
+    if period == "ytd":
+        now = datetime.now()
+        return now - datetime(now.year, 1, 1)
+    return None
+
+
+def empty_frame(symbols=()):
+    columns = pd.MultiIndex.from_product([list(symbols), OHLCV_FIELDS], names=["Symbol", "Field"])
+    return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name="Date"), dtype=float)
+
+
+def normalize_frame(raw, symbols):
+    """
+    Chuẩn hoá output của provider về dạng cột ``(symbol, field)`` cho đủ tất cả
+    symbols và OHLCV_FIELDS. Symbol không có dữ liệu -> cột NaN.
+    """
+    if raw is None or raw.empty:
+        return empty_frame(symbols)
+
+    if not isinstance(raw.columns, pd.MultiIndex):
+        # Một symbol, cột phẳng (Open, High, ...)
+        raw = pd.concat({symbols[0]: raw}, axis=1)
+    elif raw.columns.get_level_values(0).isin(OHLCV_FIELDS).all():
+        # group_by="column" -> (field, symbol)
+        raw = raw.swaplevel(0, 1, axis=1)
+
+    index = pd.DatetimeIndex(raw.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    raw = raw.set_axis(index, axis=0)
+
+    columns = pd.MultiIndex.from_product([list(symbols), OHLCV_FIELDS], names=["Symbol", "Field"])
+    frame = raw.reindex(columns=columns).astype(float).sort_index()
+    frame.index.name = "Date"
+    return frame[~frame.index.duplicated(keep="last")]
+
+
+def symbol_frame(frame, symbol):
+    """
+    Lấy OHLCV của một symbol từ frame đã căn chỉnh, bỏ các dòng không có giá
+    (ngày symbol không giao dịch nhưng symbol khác có).
+    """
+    if frame is None or symbol not in frame.columns.get_level_values(0):
+        return pd.DataFrame(columns=OHLCV_FIELDS, dtype=float)
+    df = frame[symbol].dropna(subset=["Close"])
+    df.columns.name = None
+    return df
+
+
+def since(df, start):
+    """Các dòng của ``df`` (index ngày naive UTC) từ ``start``; None là toàn bộ."""
+    if start is None:
+        return df
+    start = pd.Timestamp(start)
+    if start.tzinfo is not None:
+        start = start.tz_convert("UTC").tz_localize(None)
+    return df[df.index >= start]
+
+
+class UpstreamError(Exception):
+    """Download lỗi ở upstream (HTTP, mạng, rate limit) cho mọi symbol: tính là lỗi của breaker."""
+
+
+# yfinance: ticker không tồn tại / không có giá -> "không có dữ liệu", không phải upstream lỗi
+MISSING_ERRORS = ("YFTickerMissingError", "YFTzMissingError", "YFPricesMissingError")
+
+# Chỉ nhớ "không có dữ liệu" khi cửa sổ đủ dài để symbol thật chắc chắn có nến
+NO_DATA_MIN_DAYS = 7
+
+
+# yfinance giữ lỗi download trong một dict global (yf.shared._ERRORS) dùng chung giữa các thread
+_download_lock = threading.Lock()
+
+
+class MarketDataProvider:
+    """Provider mặc định: Yahoo Finance, một ``yf.download`` cho cả list symbol."""
+
+    name = "yahoo"
+
+    def history(self, symbols, period="1mo", interval="1d", start=None):
+        symbols = list(dict.fromkeys(symbols))
+        # Symbol đã biết là không có dữ liệu (ticker sai / delisted) không gọi upstream nữa
+        no_data = self._no_data(symbols, interval)
+        pending = [symbol for symbol in symbols if symbol not in no_data]
+        if not pending:
+            return normalize_frame(None, symbols)
+        try:
+            # Breaker + rate limiter: upstream lỗi liên tục thì fail fast (frame rỗng),
+            # caller dùng dữ liệu đã cache / bar store thay vì retry. Chỉ exception / lỗi
+            # HTTP là lỗi; frame rỗng (ticker không tồn tại) là kết quả bình thường.
+            raw, failed = get_guard(self.name).call(
+                self._download, pending, period=period, interval=interval, start=start,
+            )
+        except UpstreamUnavailable as e:
+            logger.warning(f"{self.name} download skipped for {pending}: {e}")
+            return normalize_frame(None, symbols)
+        except Exception as e:
+            logger.error(f"{self.name} download error for {pending}: {e}")
+            return normalize_frame(None, symbols)
+
+        frame = normalize_frame(raw, symbols)
+        if _window_days(period, start) >= NO_DATA_MIN_DAYS:
+            empty = [symbol for symbol in pending if symbol not in failed and symbol_frame(frame, symbol).empty]
+            self._remember_no_data(empty, interval)
+        return frame
+
+    def _download(self, symbols, period, interval, start):
+        """(raw frame, symbols lỗi upstream); mọi symbol lỗi upstream -> UpstreamError"""
+        import yfinance as yf
+        kwargs = {
+            "tickers": symbols,
+            "interval": interval,
+            "group_by": "ticker",
+            "auto_adjust": True,
+            "threads": True,
+            "progress": False,
+        }
+        if start is not None:
+            kwargs["start"] = start
+        else:
+            kwargs["period"] = period
+        # yf.download nuốt exception của từng ticker vào shared._ERRORS ({TICKER: repr(e)}),
+        # dict global bị reset ở mỗi download -> download + snapshot phải đi cùng nhau
+        with _download_lock:
+            raw = yf.download(**kwargs)
+            errors = dict(getattr(yf.shared, "_ERRORS", {}) or {})
+        failed = {
+            symbol for symbol in symbols
+            if symbol.upper() in errors and not errors[symbol.upper()].startswith(MISSING_ERRORS)
+        }
+        if failed and len(failed) == len(symbols):
+            raise UpstreamError(f"{self.name}: {errors[next(iter(failed)).upper()]}")
+        return raw, failed
+
+    def _no_data_key(self, symbol, interval):
+        return f"market_data_no_data_{self.name}_{symbol}_{interval}"
+
+    def _no_data(self, symbols, interval):
+        keys = {self._no_data_key(symbol, interval): symbol for symbol in symbols}
+        return {keys[key] for key in cache.get_many(list(keys))}
+
+    def _remember_no_data(self, symbols, interval):
+        if not symbols:
+            return
+        logger.info(f"{self.name}: no data for {symbols} ({interval}), skipping them for a while")
+        timeout = getattr(settings, "MARKET_DATA_NO_DATA_TTL", 3600)
+        cache.set_many({self._no_data_key(symbol, interval): True for symbol in symbols}, timeout=timeout)
+
+
+def _window_days(period, start):
+    """Số ngày lịch của cửa sổ được hỏi; period không giới hạn ('max') -> vô hạn"""
+    if start is not None:
+        return (pd.Timestamp.now() - pd.Timestamp(start).tz_localize(None)).days
+    delta = period_to_timedelta(period)
+    return float("inf") if delta is None else delta.days
+
+
+class FixtureMarketDataProvider(MarketDataProvider):
+    """
+    Provider offline cho dev/test.
+    Đọc ``<fixture_dir>/<symbol>.csv`` (cột Date, Open, High, Low, Close, Volume);
+    nếu không có file thì sinh dữ liệu synthetic cố định theo symbol.
+    """
+
+    name = "fixture"
+
+    def __init__(self, fixture_dir=None, latency=0.0):
+        self.fixture_dir = fixture_dir
+        self.latency = float(latency or 0.0)
+
+    def _download(self, symbols, period, interval, start):
+        if self.latency:
+            import time
+            time.sleep(self.latency)
+
+        frames = {}
+        for symbol in symbols:
+            df = self._load_csv(symbol)
+            if df is None:
+                df = self._synthetic(symbol)
+            if start is not None:
+                df = df[df.index >= pd.Timestamp(start)]
+            else:
+                delta = period_to_timedelta(period)
+                if delta is not None and not df.empty:
+                    df = df[df.index > df.index[-1] - delta]
+            frames[symbol] = df
+        return pd.concat(frames, axis=1), set()
+
+    def _load_csv(self, symbol):
+        if not self.fixture_dir:
+            return None
+        path = os.path.join(self.fixture_dir, f"{symbol}.csv")
+        if not os.path.exists(path):
+            return None
+        df = pd.read_csv(path, index_col="Date", parse_dates=True)
+        return df.reindex(columns=OHLCV_FIELDS)
+
+    def _synthetic(self, symbol, days=800):
+        return _synthetic_frame(symbol, days, pd.Timestamp.today().normalize())
+
+
+@lru_cache(maxsize=256)
+def _synthetic_frame(symbol, days, end):
+    """Dữ liệu synthetic cố định theo (symbol, ngày); cache vì bdate_range + random khá tốn"""
+    seed = zlib.crc32(symbol.encode())
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=end, periods=days, name="Date")
+    is_fx = symbol.endswith("=X")
+    base = (0.6 + (seed % 100) / 100.0) if is_fx else (20.0 + seed % 400)
+    if is_fx and "JPY" in symbol:
+        base *= 100
+    vol = 0.004 if is_fx else 0.012
+    close = base * np.exp(np.cumsum(rng.normal(0, vol, days)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, vol, days)) * close
+    return pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) + spread,
+        "Low": np.minimum(open_, close) - spread,
+        "Close": close,
+        "Volume": 0.0 if is_fx else rng.integers(1_000_000, 50_000_000, days).astype(float),
+    }, index=index)
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """Provider dùng chung trong process, cấu hình bởi ``settings.MARKET_DATA_PROVIDER``."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                path = getattr(settings, "MARKET_DATA_PROVIDER", DEFAULT_PROVIDER)
+                options = getattr(settings, "MARKET_DATA_PROVIDER_OPTIONS", {})
+                module_name, class_name = path.rsplit(".", 1)
+                provider_cls = getattr(importlib.import_module(module_name), class_name)
+                _provider = provider_cls(**options)
+    return _provider
+
+
+def set_provider(provider):
+    """Thay provider đang dùng (ví dụ FixtureMarketDataProvider khi test offline)."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
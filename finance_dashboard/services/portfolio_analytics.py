@@ -0,0 +1,179 @@
+# finance_dashboard/services/portfolio_analytics.py
+"""
+Analytics của portfolio được materialize trong bảng PortfolioAnalytics.
+
+- ``record_new_trade``: trade mới có date >= last_trade_date (trường hợp thường gặp)
+  -> cập nhật O(1): counters, equity, peak, drawdown; trade backdated -> rebuild;
+- ``schedule_rebuild``: trade sửa / xóa, portfolio đổi amount -> rebuild portfolio đó
+  sau commit, mỗi portfolio một lần trong một transaction (vd. cascade delete);
+- ``rebuild``: một aggregate query (TradeQuerySet.pnl_summary) + equity curve
+  (services/equity_engine.py) trên cột pnl_amount; manage.py
+  rebuild_portfolio_analytics cho backfill;
+- ``portfolio_analytics``: đọc O(1) mỗi portfolio (row thiếu -> rebuild lazily).
+
+Hooks trong finance_dashboard/signals.py. bulk_create / QuerySet.update không gửi
+signals -> chạy rebuild_portfolio_analytics sau khi import dữ liệu.
+"""
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+
+from finance_dashboard.models import Portfolio, PortfolioAnalytics, Trade
+from .equity_engine import (
+    drawdown_runs, equity_curve, max_drawdown, profit_factor, return_sums, sharpe_ratio, sortino_ratio,
+)
+
+EMPTY_ANALYTICS = {
+    "total_trades": 0,
+    "win_rate": 0,
+    "expectancy": 0,
+    "net_pnl": 0,
+    "max_drawdown": 0,
+    "avg_risk": 0,
+    "avg_trade": 0,
+    "sharpe": None,
+    "sortino": None,
+    "profit_factor": None,
+    "longest_drawdown": 0,
+}
+
+
+def _money(value):
+    return Decimal(str(round(float(value), 2)))
+
+
+def rebuild(portfolio_id):
+    """Tính lại analytics của một portfolio từ trades; None nếu portfolio không còn"""
+    amount = Portfolio.objects.filter(pk=portfolio_id).values_list("amount", flat=True).first()
+    if amount is None:
+        return None
+
+    trades = Trade.objects.filter(portfolio_id=portfolio_id)
+    summary = trades.pnl_summary()
+    rows = list(trades.order_by("date", "pk").with_pnl().values_list("pnl_amount", "date"))
+    curve = equity_curve(np.fromiter((pnl or 0 for pnl, _ in rows), dtype=np.float64, count=len(rows)), amount)
+    return_sum, return_sq_sum, downside_sq_sum = return_sums(curve.returns)
+    longest, underwater = drawdown_runs(curve)
+    row, _ = PortfolioAnalytics.objects.update_or_create(
+        portfolio_id=portfolio_id,
+        defaults={
+            "total_trades": summary["total_trades"],
+            "wins": summary["wins"],
+            "losses": summary["losses"],
+            "net_pnl": summary["net_pnl"] or 0,
+            "gross_win": summary["gross_win"] or 0,
+            "gross_loss": summary["gross_loss"] or 0,
+            "risk_sum": summary["risk_sum"] or 0,
+            "risk_count": summary["risk_count"],
+            "equity": amount + (summary["net_pnl"] or 0),
+            "peak_equity": _money(curve.peak[-1]) if rows else amount,
+            "max_drawdown": max_drawdown(curve),
+            "return_sum": return_sum,
+            "return_sq_sum": return_sq_sum,
+            "downside_sq_sum": downside_sq_sum,
+            "underwater_trades": underwater,
+            "longest_drawdown": longest,
+            "last_trade_date": rows[-1][1] if rows else None,
+        },
+    )
+    return row
+
+
+@transaction.atomic
+def record_new_trade(trade):
+    """Cập nhật incremental cho trade vừa tạo (đã có trong DB)"""
+    row = PortfolioAnalytics.objects.select_for_update().filter(portfolio_id=trade.portfolio_id).first()
+    values = Trade.objects.with_pnl().values("pnl_amount", "risk_amount", "date").get(pk=trade.pk)
+    if row is None or (row.last_trade_date and values["date"] < row.last_trade_date):
+        # Chưa có row hoặc trade chèn vào giữa equity curve -> tính lại cả walk
+        return rebuild(trade.portfolio_id)
+
+    pnl = values["pnl_amount"] or Decimal(0)
+    row.total_trades += 1
+    row.net_pnl += pnl
+    if pnl > 0:
+        row.wins += 1
+        row.gross_win += pnl
+    elif pnl < 0:
+        row.losses += 1
+        row.gross_loss += pnl
+    if values["risk_amount"] is not None:
+        row.risk_sum += values["risk_amount"]
+        row.risk_count += 1
+
+    # Nối tiếp equity curve đã có: cùng công thức với rebuild
+    curve = equity_curve([pnl], row.equity, peak=row.peak_equity)
+    return_sum, return_sq_sum, downside_sq_sum = return_sums(curve.returns)
+    row.return_sum += return_sum
+    row.return_sq_sum += return_sq_sum
+    row.downside_sq_sum += downside_sq_sum
+    longest, row.underwater_trades = drawdown_runs(curve, row.underwater_trades)
+    row.longest_drawdown = max(row.longest_drawdown, longest)
+    row.max_drawdown = max(row.max_drawdown, max_drawdown(curve))
+    row.equity += pnl
+    row.peak_equity = max(row.peak_equity, row.equity)
+    row.last_trade_date = values["date"]
+    row.save()
+    return row
+
+
+def _flush():
+    connection = transaction.get_connection()
+    portfolio_ids, connection._analytics_pending = connection._analytics_pending, set()
+    for portfolio_id in portfolio_ids:
+        rebuild(portfolio_id)
+
+
+def schedule_rebuild(portfolio_ids):
+    """Rebuild ``portfolio_ids`` sau commit (ngay lập tức nếu không ở trong transaction)"""
+    portfolio_ids = {portfolio_id for portfolio_id in portfolio_ids if portfolio_id is not None}
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        for portfolio_id in portfolio_ids:
+            rebuild(portfolio_id)
+        return
+    # Transaction bị rollback thì callback bị bỏ -> đăng ký lại với set mới
+    if not any(func is _flush for _, func, *_ in connection.run_on_commit):
+        connection._analytics_pending = set()
+        transaction.on_commit(_flush)
+    connection._analytics_pending.update(portfolio_ids)
+
+
+def analytics_row(portfolio):
+    """PortfolioAnalytics của ``portfolio`` (rebuild nếu chưa có)"""
+    try:
+        return portfolio.analytics
+    except PortfolioAnalytics.DoesNotExist:
+        return rebuild(portfolio.pk)
+
+
+def as_dict(row):
+    """Dict cho template portfolio (max_drawdown theo %, >= 0)"""
+    if not row or not row.total_trades:
+        return dict(EMPTY_ANALYTICS)
+    avg_win = float(row.gross_win) / row.wins if row.wins else 0.0
+    avg_loss = float(row.gross_loss) / row.losses if row.losses else 0.0
+    return {
+        "total_trades": row.total_trades,
+        "win_rate": round(row.wins / row.total_trades * 100, 2),
+        "expectancy": round(avg_win - avg_loss, 2),
+        "net_pnl": round(float(row.net_pnl), 2),
+        "max_drawdown": round(row.max_drawdown * 100, 2),
+        "avg_risk": round(float(row.risk_sum) / row.risk_count, 2) if row.risk_count else 0.0,
+        "avg_trade": round(float(row.net_pnl) / row.total_trades, 2),
+        "sharpe": _round(sharpe_ratio(row.total_trades, row.return_sum, row.return_sq_sum)),
+        "sortino": _round(sortino_ratio(row.total_trades, row.return_sum, row.downside_sq_sum)),
+        "profit_factor": _round(profit_factor(row.gross_win, row.gross_loss)),
+        "longest_drawdown": row.longest_drawdown,
+    }
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+def portfolio_analytics(portfolios):
+    """[analytics dict] theo thứ tự ``portfolios``: một query cho mọi rows"""
+    rows = PortfolioAnalytics.objects.in_bulk([portfolio.pk for portfolio in portfolios], field_name="portfolio_id")
+    return [as_dict(rows.get(portfolio.pk) or rebuild(portfolio.pk)) for portfolio in portfolios]
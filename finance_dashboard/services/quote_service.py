@@ -0,0 +1,252 @@
+# finance_dashboard/services/quote_service.py
+"""
+Quotes, sparklines, chart data và ETF flows cho các trang Home / Search / Chart.
+
+Tất cả đọc từ bar store và cache qua ``cached_many`` (single-flight +
+stale-while-revalidate); ``force=True`` bỏ qua cache để tính lại payload
+(dùng bởi ``manage.py refresh_market_data``).
+"""
+import logging
+
+from .bar_store import get_bar_store
+from .market_cache import cached, cached_many
+from .market_data import symbol_frame
+
+logger = logging.getLogger(__name__)
+
+# Symbols hiển thị trên Home
+HOME_INDICES = {"DXY": "DX-Y.NYB", "SP500": "^GSPC", "US10Y": "^TNX", "Gold": "GC=F"}  # SỬA: AGSPC -> ^GSPC, ATNX -> ^TNX
+CHART_PAIRS = ('EURUSD', 'GBPUSD', 'USDJPY', 'USDCHF', 'AUDUSD')
+ETF_FLOW_TICKERS = ("SPY", "TLT", "GLD")
+RISK_TICKER = "^VIX"
+
+# Symbols hỗ trợ trong Search
+FOREX_SYMBOLS = ('EURUSD', 'GBPUSD', 'USDJPY', 'USDCHF', 'AUDUSD', 'USDCAD', 'NZDUSD')
+STOCK_SYMBOLS = ('AAPL', 'GOOGL', 'MSFT', 'TSLA', 'AMZN', 'NVDA', 'META')
+
+
+def _yf_history(symbols, period, interval="1d"):
+    """
+    Đọc từ bar store local; các symbol đã cũ được refresh trong một lần download.
+    Không retry: upstream lỗi thì circuit breaker của provider fail fast và dữ liệu
+    đã lưu (hoặc giá trị cache cũ) được dùng.
+    """
+    frame = get_bar_store().history(symbols, period=period, interval=interval)
+    closes = frame.xs("Close", axis=1, level="Field")
+    if closes.empty or closes.isna().all().all():
+        raise ValueError(f"No data for {symbols}")
+    return frame
+
+def _last_and_change(hist):
+    if hist.empty:
+        return None
+    last = float(hist["Close"].iloc[-1])
+    if len(hist) > 1:
+        prev = float(hist["Close"].iloc[-2])
+        change_pct = round(((last - prev) / prev) * 100, 2) if prev else None
+    else:
+        change_pct = None
+    return {"last": last, "change": change_pct}
+
+def get_symbol_data(symbol, timeout=1800):
+    """Get cached symbol data with fallback"""
+    return get_symbols_data([symbol], timeout=timeout)[symbol]
+
+def get_symbols_data(symbols, timeout=1800, force=False):
+    """
+    Batched version của get_symbol_data: đọc cache cho tất cả symbols,
+    các symbol bị miss được lấy trong MỘT lần download (coalesced).
+    """
+    def load(missing):
+        try:
+            frame = _yf_history(missing, period="5d")
+        except Exception as e:
+            logger.error(f"Error getting symbol data for {missing}: {e}")
+            frame = None
+        return {symbol: _last_and_change(symbol_frame(frame, symbol)) for symbol in missing}
+
+    keys = {symbol: f"symbol_{symbol}" for symbol in symbols}  # SỬA: symbol_symbol! -> symbol_{symbol}
+    data = cached_many(keys, load, timeout, force=force)
+    for symbol in symbols:
+        if symbol not in data:
+            logger.error(f"No symbol data for {symbol}")
+    return {symbol: data.get(symbol) or {"last": None, "change": None} for symbol in symbols}
+
+def get_sparklines(symbols, points=20, timeout=1800, force=False):
+    """Sparkline (Close 1 tháng) cho nhiều symbols, một lần download cho các symbol chưa có trong cache"""
+    def load(missing):
+        try:
+            frame = _yf_history(missing, period="1mo")
+        except Exception as e:
+            logger.error(f"Error getting sparklines for {missing}: {e}")
+            frame = None
+        return {
+            symbol: symbol_frame(frame, symbol)["Close"].tail(points).astype(float).tolist()
+            for symbol in missing
+        }
+
+    keys = {symbol: f"sparkline_{symbol}_{points}" for symbol in symbols}
+    data = cached_many(keys, load, timeout, force=force)
+    return {symbol: data.get(symbol) for symbol in symbols}
+
+def empty_chart_data():
+    return {
+        "labels": [],
+        "values": [],
+        "high": None,
+        "low": None,
+        "volume": "N/A"
+    }
+
+def _build_chart_data(pair, hist):
+    if hist.empty:
+        logger.error(f"No chart data for {pair}")
+        return None
+    decimals = 3 if 'JPY' in pair else 5
+    values = [round(float(v), decimals) for v in hist["Close"].tolist()]
+    return {
+        "labels": [d.strftime("%Y-%m-%d") for d in hist.index],
+        "values": values,
+        "high": round(float(hist["High"].max()), decimals),
+        "low": round(float(hist["Low"].min()), decimals),
+        "volume": "High" if hist["Volume"].mean() > 1000000 else "Medium" if "Volume" in hist.columns else "N/A"
+    }
+
+def get_multiple_chart_data(pairs=CHART_PAIRS, timeout=3600, force=False):  # SỬA: dấu ngoặc
+    def load(missing):
+        yf_symbols = {pair: pair + '=X' if not pair.endswith('=X') else pair for pair in missing}
+        try:
+            frame = _yf_history(list(yf_symbols.values()), period="30d")
+        except Exception as e:
+            logger.error(f"Error getting chart data for {missing}: {e}")
+            frame = None
+        return {pair: _build_chart_data(pair, symbol_frame(frame, yf_symbols[pair])) for pair in missing}
+
+    keys = {pair: f"chart_data_{pair}" for pair in pairs}  # SỬA: chart_data_pair! -> chart_data_{pair}
+    chart_data = cached_many(keys, load, timeout, force=force)
+    return {pair: chart_data.get(pair) or empty_chart_data() for pair in pairs}
+
+def get_etf_flows(etfs=ETF_FLOW_TICKERS, timeout=1800, force=False):
+    """Ước lượng dòng tiền ETF (triệu USD) từ nến ngày gần nhất"""
+    def load():
+        try:
+            frame = _yf_history(list(etfs), period="5d")
+            etf_flows = []
+            for etf in etfs:
+                h = symbol_frame(frame, etf)
+                if not h.empty:
+                    last_row = h.iloc[-1]  # SỬA: lloc -> iloc
+                    approx_flow_m = float((last_row.get("Close", 0) - last_row.get("Open", 0)) * last_row.get("Volume", 0)) / 1_000_000.0
+                    etf_flows.append({"name": f"{etf}", "flow": round(approx_flow_m, 2)})  # SỬA: sửa cấu trúc list
+            return etf_flows
+        except Exception as e:
+            logger.error(f"ETF flow error: {e}")
+            return None
+
+    etf_flows = cached("etf_flows_" + "_".join(etfs), load, timeout, force=force)
+    return etf_flows or [{"name": etf, "flow": None} for etf in etfs]  # SỬA: sửa cấu trúc list
+
+def search_yf_symbol(symbol, symbol_type):
+    # Add proper suffix for yfinance
+    if symbol_type == 'forex' and not symbol.endswith('=X'):
+        return symbol + '=X'
+    return symbol
+
+def _volume_category(hist):
+    # Estimate volume category based on recent volume
+    avg_volume = hist["Volume"].mean() if "Volume" in hist.columns else 0
+    if avg_volume > 1000000:
+        return 'High'
+    elif avg_volume > 100000:
+        return 'Medium'
+    return 'Low'
+
+def get_real_search_data_many(items):
+    """
+    Get real data for search results - items: list (symbol, symbol_type).
+    Tất cả symbols được lấy trong một lần download.
+    """
+    results = {}
+    frame = None
+    try:
+        frame = _yf_history([search_yf_symbol(symbol, symbol_type) for symbol, symbol_type in items], period="5d")
+    except Exception as e:
+        logger.warning("Real search data error for %s: %s", [symbol for symbol, _ in items], e)
+
+    for symbol, symbol_type in items:
+        hist = symbol_frame(frame, search_yf_symbol(symbol, symbol_type))
+        if hist.empty:
+            # Fallback data
+            results[symbol] = {
+                'last': 0.0,
+                'change': 0.0,
+                'history': [0.0] * 5,
+                'volume': 'N/A'
+            }
+            continue
+
+        last = float(hist["Close"].iloc[-1])
+        if len(hist) > 1:
+            prev = float(hist["Close"].iloc[-2])
+            change = round(((last - prev) / prev) * 100, 2) if prev else 0  # SỬA: thiếu dấu )
+        else:
+            change = 0
+
+        results[symbol] = {
+            'last': round(last, 4 if symbol_type == 'forex' else 2),
+            'change': change,
+            'history': hist["Close"].astype(float).tolist()[-5:],  # Last 5 days
+            'volume': _volume_category(hist)
+        }
+    return results
+
+def get_real_search_data(symbol, symbol_type='forex'):
+    """Get real data for search results using yfinance"""
+    return get_real_search_data_many([(symbol, symbol_type)])[symbol]
+
+def chart_yf_symbol(symbol):
+    """Symbol yfinance cho chart: forex pairs có suffix =X"""
+    if symbol in FOREX_SYMBOLS and not symbol.endswith('=X'):
+        return symbol + '=X'
+    return symbol
+
+def get_real_chart_data(symbol):
+    """Get real chart data using yfinance"""
+    try:
+        is_forex = symbol in FOREX_SYMBOLS
+        yf_symbol = chart_yf_symbol(symbol)
+        hist = symbol_frame(_yf_history([yf_symbol], period="30d"), yf_symbol)
+        if not hist.empty:
+            labels = [d.strftime("%Y-%m-%d") for d in hist.index]
+            values = hist["Close"].astype(float).tolist()
+            high = float(hist["High"].max())
+            low = float(hist["Low"].min())
+
+            # Get current price and change
+            last = float(hist["Close"].iloc[-1])
+            if len(hist) > 1:
+                prev = float(hist["Close"].iloc[-2])
+                change = round(((last - prev) / prev) * 100, 2) if prev else 0  # SỬA: thiếu dấu )
+            else:
+                change = 0
+
+            volume = _volume_category(hist)
+
+            return {
+                'chart_data': {
+                    'labels': labels,
+                    'values': values,
+                    'high': round(high, 4 if is_forex else 2),
+                    'low': round(low, 4 if is_forex else 2),
+                    'volume': volume
+                },
+                'details': {
+                    'last': round(last, 4 if is_forex else 2),
+                    'change': change,
+                    'history': values[-5:],  # Last 5 days
+                    'volume': volume
+                }
+            }
+    except Exception as e:
+        logger.warning("Real chart data error for %s: %s", symbol, e)
+    return None
@@ -0,0 +1,241 @@
+# finance_dashboard/services/quote_stream.py
+"""
+Server-sent events cho quotes trên dashboard (chạy dưới ASGI).
+
+Một ``QuoteBroadcaster`` cho mỗi process (event loop):
+- MỘT producer task: mỗi ``interval`` giây lấy quotes / sparklines / signals
+  cho hợp các symbols đang được subscribe, qua cached_many (single-flight +
+  cache dùng chung) -> số tab mở không làm tăng số lần gọi upstream;
+- chỉ các symbol có giá trị đổi được đẩy đi (incremental), subscriber mới
+  nhận snapshot các giá trị đã biết;
+- backpressure: mỗi subscriber giữ tối đa một update mới nhất cho mỗi
+  (event, symbol) - client chậm nhận bản mới nhất, các bản cũ bị gộp
+  (đếm trong ``coalesced``), bộ nhớ không tăng theo tốc độ client;
+- giới hạn số connection (toàn process và theo IP), số symbols mỗi subscribe;
+- heartbeat (comment SSE) khi không có update để proxy không cắt connection.
+"""
+import asyncio
+import logging
+import re
+import time
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import StreamingHttpResponse
+
+from .json_fragments import dumps
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "interval": 15,            # giây giữa hai lần producer lấy dữ liệu
+    "heartbeat": 20,           # giây không có event -> gửi comment ping
+    "max_connections": 10000,  # toàn process
+    "max_per_client": 20,      # theo IP
+    "max_symbols": 30,         # mỗi subscription
+    "sparkline_points": 20,
+    "retry_ms": 5000,          # client EventSource reconnect sau
+}
+
+
+SYMBOL_RE = re.compile(r"^[A-Z0-9^=.\-]{1,20}$")
+
+
+def stream_settings():
+    return dict(DEFAULTS, **getattr(settings, "QUOTE_STREAM", {}))
+
+
+class StreamLimitExceeded(Exception):
+    """Hết chỗ (connection limits) -> 503 + Retry-After."""
+
+
+def parse_symbols(raw, max_symbols):
+    """'EURUSD=X,^VIX' -> list symbols; ValueError nếu rỗng, sai định dạng hoặc quá nhiều."""
+    symbols = list(dict.fromkeys(s.strip().upper() for s in raw.split(",") if s.strip()))
+    if not symbols:
+        raise ValueError("No symbols requested")
+    if len(symbols) > max_symbols:
+        raise ValueError(f"At most {max_symbols} symbols per stream")
+    invalid = [symbol for symbol in symbols if not SYMBOL_RE.match(symbol)]
+    if invalid:
+        raise ValueError(f"Invalid symbols: {', '.join(invalid[:5])}")
+    return symbols
+
+
+def format_event(event, data):
+    # dumps: numpy / datetime trong signals serialize được như JsonResponse
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+
+class Subscriber:
+    """Hàng đợi gộp: {(event, symbol): data}, chỉ giữ bản mới nhất."""
+
+    def __init__(self, symbols, client):
+        self.symbols = set(symbols)
+        self.client = client
+        self.pending = {}
+        self.wakeup = asyncio.Event()
+        self.coalesced = 0
+
+    def push(self, event, symbol, data):
+        if (event, symbol) in self.pending:
+            self.coalesced += 1
+        self.pending[(event, symbol)] = data
+        self.wakeup.set()
+
+    def drain(self):
+        pending, self.pending = self.pending, {}
+        self.wakeup.clear()
+        return pending
+
+
+def _fetch(symbols, points):
+    """Chạy trong thread: quotes + sparklines + signals cho ``symbols``."""
+    from .analysis_service import AnalysisService, SIGNAL_INDICATORS
+    from .quote_service import get_sparklines, get_symbols_data
+
+    try:
+        quotes = get_symbols_data(symbols)
+        sparklines = get_sparklines(symbols, points=points)
+        pairs = [symbol for symbol in symbols if symbol.endswith("=X")]
+        signals = {}
+        if pairs:
+            service = AnalysisService()
+            technical = service.get_technical_analyses(pairs, indicators=SIGNAL_INDICATORS)
+            technical_list = [technical[pair] for pair in pairs if technical.get(pair)]
+            for signal in service.generate_signals_alerts(service.get_macro_data(), technical_list):
+                signals.setdefault(signal.get("pair", "") + "=X", []).append(signal)
+        return {"quote": quotes, "sparkline": sparklines, "signal": signals}
+    finally:
+        close_old_connections()
+
+
+class QuoteBroadcaster:
+    def __init__(self, options=None):
+        self.options = options or stream_settings()
+        self.subscribers = set()
+        self.clients = Counter()
+        self.latest = {}  # (event, symbol) -> data
+        self.task = None
+        self.stats = Counter()
+
+    # ---------------------------------------------------------- subscribers
+
+    def subscribe(self, symbols, client):
+        if len(self.subscribers) >= self.options["max_connections"]:
+            self.stats["rejected"] += 1
+            raise StreamLimitExceeded("Too many open streams")
+        if self.clients[client] >= self.options["max_per_client"]:
+            self.stats["rejected"] += 1
+            raise StreamLimitExceeded("Too many open streams for this client")
+
+        subscriber = Subscriber(symbols, client)
+        self.subscribers.add(subscriber)
+        self.clients[client] += 1
+        self.stats["subscribed"] += 1
+        # Snapshot các giá trị đã biết
+        for (event, symbol), data in self.latest.items():
+            if symbol in subscriber.symbols:
+                subscriber.push(event, symbol, data)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self._produce())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        if subscriber in self.subscribers:
+            self.subscribers.discard(subscriber)
+            self.clients[subscriber.client] -= 1
+            if self.clients[subscriber.client] <= 0:
+                del self.clients[subscriber.client]
+            self.stats["coalesced"] += subscriber.coalesced
+
+    # ------------------------------------------------------------- producer
+
+    async def _produce(self):
+        fetch = sync_to_async(_fetch, thread_sensitive=False)
+        while self.subscribers:
+            symbols = sorted(set().union(*(subscriber.symbols for subscriber in self.subscribers)))
+            started = time.monotonic()
+            try:
+                self.publish(await fetch(symbols, self.options["sparkline_points"]))
+                self.stats["ticks"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Quote stream fetch failed for {len(symbols)} symbols: {e}")
+            await asyncio.sleep(max(0.0, self.options["interval"] - (time.monotonic() - started)))
+        # Không còn subscriber: producer dừng, giá trị cũ bỏ đi
+        self.latest.clear()
+
+    def publish(self, updates):
+        """Đẩy các giá trị thay đổi tới subscribers của symbol đó."""
+        for event, values in updates.items():
+            for symbol, data in values.items():
+                if data is None or self.latest.get((event, symbol)) == data:
+                    continue
+                self.latest[(event, symbol)] = data
+                self.stats["updates"] += 1
+                for subscriber in self.subscribers:
+                    if symbol in subscriber.symbols:
+                        subscriber.push(event, symbol, data)
+
+    # --------------------------------------------------------------- stream
+
+    async def stream(self, subscriber):
+        """Async iterator các SSE chunks cho một subscriber."""
+        heartbeat = self.options["heartbeat"]
+        try:
+            yield f"retry: {self.options['retry_ms']}\n\n"
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.wakeup.wait(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                chunks = [
+                    format_event(event, {"symbol": symbol, "data": data})
+                    for (event, symbol), data in subscriber.drain().items()
+                ]
+                yield "".join(chunks)
+        finally:
+            self.unsubscribe(subscriber)
+
+    def metrics(self):
+        return dict(self.stats, connections=len(self.subscribers), clients=len(self.clients),
+                    symbols=len({symbol for _, symbol in self.latest}),
+                    producer_running=bool(self.task and not self.task.done()))
+
+
+class EventStreamResponse(StreamingHttpResponse):
+    """text/event-stream cho một subscriber; close() luôn trả lại slot connection."""
+
+    def __init__(self, broadcaster, subscriber):
+        super().__init__(broadcaster.stream(subscriber), content_type="text/event-stream")
+        self["Cache-Control"] = "no-cache"
+        self["X-Accel-Buffering"] = "no"  # nginx: không buffer SSE
+        self._unsubscribe = lambda: broadcaster.unsubscribe(subscriber)
+
+    def close(self):
+        # Client ngắt trước khi stream bắt đầu -> generator không chạy tới finally
+        self._unsubscribe()
+        super().close()
+
+
+_broadcasters = {}
+
+
+def get_broadcaster():
+    """Broadcaster của event loop hiện tại (một loop mỗi ASGI worker)."""
+    loop = asyncio.get_running_loop()
+    broadcaster = _broadcasters.get(loop)
+    if broadcaster is None:
+        for other in [other for other in _broadcasters if other.is_closed()]:
+            del _broadcasters[other]
+        broadcaster = _broadcasters[loop] = QuoteBroadcaster()
+    return broadcaster
+
+
+def stream_stats():
+    """Metrics của các broadcaster (thường một cho mỗi ASGI worker process)."""
+    return [broadcaster.metrics() for loop, broadcaster in list(_broadcasters.items()) if not loop.is_closed()]
@@ -0,0 +1,130 @@
+# finance_dashboard/services/singleflight.py
+"""
+Single-flight cho cache miss: với cùng một key, chỉ caller đầu tiên thực sự
+fetch; các caller khác chờ kết quả của lần fetch đang chạy thay vì cùng gọi
+Yahoo/FRED (thundering herd).
+
+Hai mode (``settings.SINGLEFLIGHT_MODE``):
+- ``local``: coalesce giữa các thread trong cùng process.
+- ``cache``: thêm một lock dùng chung qua ``cache.add`` (atomic trên mọi cache
+  backend) để coalesce cả giữa các gunicorn workers; kết quả của leader được
+  đặt vào cache trong ``result_ttl`` giây cho các process đang chờ.
+"""
+import hashlib
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, mode=None, lock_timeout=30, wait_timeout=30, result_ttl=10, poll_interval=0.05):
+        self.mode = mode or getattr(settings, "SINGLEFLIGHT_MODE", "local")
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {"calls": 0, "executed": 0, "coalesced": 0, "coalesced_remote": 0}
+
+    def do(self, key, fn):
+        """Chạy ``fn()`` cho ``key``, hoặc chờ lần chạy đang diễn ra cho cùng key."""
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            if not call.event.wait(self.wait_timeout):
+                logger.warning(f"Single-flight wait timed out for {key}, fetching directly")
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            if self.mode == "cache":
+                call.result = self._do_shared(key, fn)
+            else:
+                call.result = self._execute(fn)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            if call.waiters:
+                logger.debug(f"Single-flight {key}: {call.waiters} caller(s) coalesced")
+            call.event.set()
+
+    def _execute(self, fn):
+        with self._lock:
+            self._stats["executed"] += 1
+        return fn()
+
+    def _do_shared(self, key, fn):
+        # Key batch có thể dài -> hash để hợp lệ với mọi cache backend
+        digest = hashlib.md5(key.encode()).hexdigest()
+        lock_key = f"singleflight_lock_{digest}"
+        result_key = f"singleflight_result_{digest}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait_timeout
+
+        while True:
+            if cache.add(lock_key, token, self.lock_timeout):
+                try:
+                    result = self._execute(fn)
+                    cache.set(result_key, {"value": result}, self.result_ttl)
+                    return result
+                finally:
+                    if cache.get(lock_key) == token:
+                        cache.delete(lock_key)
+
+            # Process khác đang fetch: chờ kết quả hoặc lock được nhả
+            while cache.get(lock_key) is not None and time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+            shared = cache.get(result_key)
+            if shared is not None:
+                with self._lock:
+                    self._stats["coalesced_remote"] += 1
+                return shared["value"]
+            if time.monotonic() >= deadline:
+                logger.warning(f"Single-flight shared wait timed out for {key}, fetching directly")
+                return self._execute(fn)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._calls), mode=self.mode)
+
+
+_singleflight = None
+_singleflight_lock = threading.Lock()
+
+
+def get_singleflight():
+    global _singleflight
+    if _singleflight is None:
+        with _singleflight_lock:
+            if _singleflight is None:
+                _singleflight = SingleFlight()
+    return _singleflight
@@ -0,0 +1,375 @@
+# finance_dashboard/services/streaming_indicators.py
+"""
+Indicators dạng streaming: mỗi object giữ state và cập nhật O(1) cho mỗi bar mới
+(running sum cho SMA, EMA đệ quy, Wilder smoothing cho RSI/ATR, EMA signal cho MACD).
+
+State serialize được thành dict JSON (``to_dict`` / ``indicator_from_dict``) để lưu
+vào cache hoặc database; khi có state cũ chỉ cần đưa các bar sau ``last_ts`` vào.
+
+Sai số: với cùng một chuỗi input, output khớp thư viện ``ta`` (fillna=False) và
+pandas ``rolling``/``ewm`` trong 1e-9 tương đối (xem ``manage.py benchmark_indicators``).
+EMA/RSI/ATR/SMA(min_periods) phụ thuộc điểm bắt đầu chuỗi -> state được neo vào bar
+đầu tiên của toàn bộ lịch sử đã lưu (``IndicatorSet.first_ts``), không phải cửa sổ
+period (cửa sổ tính từ now() nên trượt mỗi ngày). Caller đưa vào toàn bộ lịch sử,
+state chỉ chạy tiếp trên các bar mới, rồi cắt output theo period khi dựng payload
+(``frame(start)``). Lịch sử đã lưu đổi điểm đầu (backfill thêm) thì tính lại từ đầu.
+"""
+import copy
+import math
+from collections import deque
+
+import pandas as pd
+
+from .market_data import since
+
+NAN = float("nan")
+
+# Cộng dồn running sum lâu ngày bị trôi -> tính lại bằng fsum định kỳ
+RESUM_EVERY = 1000
+
+
+def _isnan(value):
+    return value is None or value != value
+
+
+class Indicator:
+    """Base class: ``update(bar)`` nhận (open, high, low, close), trả về tuple theo ``columns``."""
+
+    kind = None
+    state_fields = ()
+
+    def __init__(self, columns=(), **params):
+        self.columns = tuple(columns)
+        self.params = dict(params, columns=list(self.columns))
+
+    def update(self, bar):
+        return (self.push(bar[3]),)
+
+    def push(self, value):
+        raise NotImplementedError
+
+    def to_dict(self):
+        state = {}
+        for field in self.state_fields:
+            value = getattr(self, field)
+            if isinstance(value, Indicator):
+                value = value.to_dict()
+            elif isinstance(value, deque):
+                value = list(value)
+            state[field] = value
+        return {"kind": self.kind, "params": self.params, "state": state}
+
+
+class SMA(Indicator):
+    kind = "sma"
+    state_fields = ("values", "total", "updates")
+
+    def __init__(self, window, min_periods=None, columns=()):
+        super().__init__(columns, window=window, min_periods=min_periods)
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.updates = 0
+
+    def push(self, value):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+        self.updates += 1
+        if self.updates % RESUM_EVERY == 0:
+            self.total = math.fsum(self.values)
+        if len(self.values) < max(self.min_periods, 1):
+            return NAN
+        return self.total / len(self.values)
+
+
+class EMA(Indicator):
+    """Như pandas ``ewm(span=..|alpha=.., adjust=.., min_periods=..).mean()``."""
+
+    kind = "ema"
+    state_fields = ("mean", "numerator", "denominator", "count")
+
+    def __init__(self, span=None, alpha=None, adjust=False, min_periods=0, columns=()):
+        super().__init__(columns, span=span, alpha=alpha, adjust=adjust, min_periods=min_periods)
+        self.alpha = alpha if alpha is not None else 2.0 / (span + 1)
+        self.adjust = adjust
+        self.min_periods = min_periods
+        self.mean = None
+        self.numerator = 0.0
+        self.denominator = 0.0
+        self.count = 0
+
+    def push(self, value):
+        decay = 1 - self.alpha
+        if self.adjust:
+            self.numerator = value + decay * self.numerator
+            self.denominator = 1 + decay * self.denominator
+            self.mean = self.numerator / self.denominator
+        elif self.mean is None:
+            self.mean = value
+        else:
+            self.mean = decay * self.mean + self.alpha * value
+        self.count += 1
+        return self.mean if self.count >= self.min_periods else NAN
+
+
+class WilderMean(Indicator):
+    """Wilder smoothing khởi tạo bằng trung bình ``window`` giá trị đầu (ATR của ``ta``)."""
+
+    kind = "wilder"
+    state_fields = ("value", "total", "count")
+
+    def __init__(self, window, columns=()):
+        super().__init__(columns, window=window)
+        self.window = window
+        self.value = None
+        self.total = 0.0
+        self.count = 0
+
+    def push(self, value):
+        self.count += 1
+        if self.count <= self.window:
+            self.total += value
+            if self.count == self.window:
+                self.value = self.total / self.window
+        else:
+            self.value = (self.value * (self.window - 1) + value) / self.window
+        return self.value if self.count >= self.window else NAN
+
+
+class RSI(Indicator):
+    """
+    smoothing="wilder": RSIIndicator của ``ta`` (ewm alpha=1/window).
+    smoothing="sma": RSI với rolling mean của gain/loss (Cutler).
+    """
+
+    kind = "rsi"
+    state_fields = ("prev", "up", "down")
+
+    def __init__(self, window=14, smoothing="wilder", columns=()):
+        super().__init__(columns, window=window, smoothing=smoothing)
+        self.smoothing = smoothing
+        self.prev = None
+        if smoothing == "wilder":
+            self.up = EMA(alpha=1.0 / window, min_periods=window)
+            self.down = EMA(alpha=1.0 / window, min_periods=window)
+        else:
+            self.up = SMA(window)
+            self.down = SMA(window)
+
+    def push(self, value):
+        # Bar đầu tiên: diff NaN được tính là gain = loss = 0 (như ta / pandas where)
+        diff = 0.0 if self.prev is None else value - self.prev
+        self.prev = value
+        up = self.up.push(max(diff, 0.0))
+        down = self.down.push(max(-diff, 0.0))
+        if _isnan(up) or _isnan(down):
+            return NAN
+        if down == 0:
+            return 100.0 if self.smoothing == "wilder" or up > 0 else NAN
+        return 100 - 100 / (1 + up / down)
+
+
+class MACD(Indicator):
+    """columns = (macd, signal). ``warmup=True`` là min_periods = span như ``ta``."""
+
+    kind = "macd"
+    state_fields = ("fast", "slow", "signal")
+
+    def __init__(self, window_fast=12, window_slow=26, window_sign=9, adjust=False, warmup=True, columns=()):
+        super().__init__(columns, window_fast=window_fast, window_slow=window_slow,
+                         window_sign=window_sign, adjust=adjust, warmup=warmup)
+        self.fast = EMA(window_fast, adjust=adjust, min_periods=window_fast if warmup else 0)
+        self.slow = EMA(window_slow, adjust=adjust, min_periods=window_slow if warmup else 0)
+        self.signal = EMA(window_sign, adjust=adjust, min_periods=window_sign if warmup else 0)
+
+    def update(self, bar):
+        macd = self.fast.push(bar[3]) - self.slow.push(bar[3])
+        # Signal chỉ bắt đầu khi MACD có giá trị (ewm bỏ qua NaN ở đầu)
+        signal = NAN if _isnan(macd) else self.signal.push(macd)
+        return macd, signal
+
+
+class Bollinger(Indicator):
+    """columns = (upper, lower); std với ddof=0 như ``ta``."""
+
+    kind = "bollinger"
+    state_fields = ("values",)
+
+    def __init__(self, window=20, window_dev=2, columns=()):
+        super().__init__(columns, window=window, window_dev=window_dev)
+        self.window = window
+        self.window_dev = window_dev
+        self.values = deque(maxlen=window)
+
+    def update(self, bar):
+        self.values.append(bar[3])
+        if len(self.values) < self.window:
+            return NAN, NAN
+        mean = math.fsum(self.values) / self.window
+        std = math.sqrt(math.fsum((value - mean) ** 2 for value in self.values) / self.window)
+        return mean + self.window_dev * std, mean - self.window_dev * std
+
+
+class Stochastic(Indicator):
+    """%K không làm mượt (StochasticOscillator.stoch() của ``ta``)."""
+
+    kind = "stochastic"
+    state_fields = ("highs", "lows")
+
+    def __init__(self, window=14, columns=()):
+        super().__init__(columns, window=window)
+        self.window = window
+        self.highs = deque(maxlen=window)
+        self.lows = deque(maxlen=window)
+
+    def update(self, bar):
+        self.highs.append(bar[1])
+        self.lows.append(bar[2])
+        if len(self.highs) < self.window:
+            return (NAN,)
+        low, high = min(self.lows), max(self.highs)
+        if high == low:
+            return (NAN,)
+        return (100 * (bar[3] - low) / (high - low),)
+
+
+class ATR(Indicator):
+    kind = "atr"
+    state_fields = ("prev_close", "smoother")
+
+    def __init__(self, window=14, columns=()):
+        super().__init__(columns, window=window)
+        self.prev_close = None
+        self.smoother = WilderMean(window)
+
+    def update(self, bar):
+        _, high, low, close = bar
+        if self.prev_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        return (self.smoother.push(true_range),)
+
+
+INDICATOR_KINDS = {cls.kind: cls for cls in (SMA, EMA, WilderMean, RSI, MACD, Bollinger, Stochastic, ATR)}
+
+
+def indicator_from_dict(data):
+    params = dict(data["params"])
+    indicator = INDICATOR_KINDS[data["kind"]](**params)
+    for field, value in data["state"].items():
+        current = getattr(indicator, field)
+        if isinstance(current, Indicator):
+            value = indicator_from_dict(value)
+        elif isinstance(current, deque):
+            value = deque(value, maxlen=current.maxlen)
+        setattr(indicator, field, value)
+    return indicator
+
+
+class IndicatorSet:
+    """
+    Một nhóm indicators cho một symbol + ``history`` bar gần nhất (OHLCV + outputs).
+
+    ``advance(df)`` cập nhật state tới bar áp chót của ``df`` (bar cuối có thể
+    chưa đóng và bị ghi đè ở lần refresh sau) rồi trả về một bản "live" đã gồm
+    cả bar cuối - dùng bản live để hiển thị, lưu lại ``self``.
+    """
+
+    def __init__(self, indicators, history=30):
+        self.indicators = list(indicators)
+        self.history = history
+        self.columns = [column for indicator in self.indicators for column in indicator.columns]
+        self.rows = deque(maxlen=history)
+        self.first_ts = None
+        self.last_ts = None
+        self.last_close = None
+        self.bars = 0
+
+    def update(self, ts, open_, high, low, close, volume=None):
+        bar = (open_, high, low, close)
+        outputs = []
+        for indicator in self.indicators:
+            outputs.extend(indicator.update(bar))
+        self.rows.append([pd.Timestamp(ts).isoformat(), open_, high, low, close, volume] + outputs)
+        if self.first_ts is None:
+            self.first_ts = pd.Timestamp(ts)
+        self.last_ts = pd.Timestamp(ts)
+        self.last_close = close
+        self.bars += 1
+        return dict(zip(self.columns, outputs))
+
+    def can_advance(self, df):
+        """
+        State còn dùng được cho ``df`` (toàn bộ lịch sử của symbol): df bắt đầu ở cùng bar
+        với state và bar cuối đã xử lý có trong df với cùng giá Close.
+        """
+        if self.last_ts is None or df.empty or self.last_ts not in df.index:
+            return False
+        if self.first_ts is None or df.index[0] != self.first_ts:
+            return False
+        if len(df[df.index > self.last_ts]) + len(self.rows) < min(len(df), self.history):
+            return False
+        close = float(df.loc[self.last_ts, "Close"])
+        return math.isclose(close, self.last_close, rel_tol=1e-9, abs_tol=1e-12)
+
+    def advance(self, df):
+        new = df[df.index > self.last_ts] if self.last_ts is not None else df
+        rows = list(new[["Open", "High", "Low", "Close", "Volume"]].itertuples(name=None))
+        for ts, open_, high, low, close, volume in rows[:-1]:
+            self.update(ts, open_, high, low, close, volume)
+        live = self.copy()
+        if rows:
+            live.update(*rows[-1])
+        return live
+
+    def frame(self, start=None):
+        """History dạng DataFrame: index ngày, cột OHLCV + các cột indicator (từ ``start``)."""
+        columns = ["Date", "Open", "High", "Low", "Close", "Volume"] + self.columns
+        df = pd.DataFrame(list(self.rows), columns=columns)
+        df["Date"] = pd.to_datetime(df["Date"])
+        return since(df.set_index("Date").astype(float), start)
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+    def to_dict(self):
+        return {
+            "indicators": [indicator.to_dict() for indicator in self.indicators],
+            "history": self.history,
+            "rows": list(self.rows),
+            "first_ts": self.first_ts.isoformat() if self.first_ts is not None else None,
+            "last_ts": self.last_ts.isoformat() if self.last_ts is not None else None,
+            "last_close": self.last_close,
+            "bars": self.bars,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls([indicator_from_dict(item) for item in data["indicators"]], history=data["history"])
+        state.rows.extend(data["rows"])
+        # State cũ không có first_ts -> can_advance False, được tính lại
+        state.first_ts = pd.Timestamp(data["first_ts"]) if data.get("first_ts") else None
+        state.last_ts = pd.Timestamp(data["last_ts"]) if data["last_ts"] else None
+        state.last_close = data["last_close"]
+        state.bars = data["bars"]
+        return state
+
+
+def technical_indicator_set(history=30):
+    """Các indicators của technical analysis (cùng tham số và tên cột như ``indicators.py``)."""
+    return IndicatorSet([
+        SMA(20, columns=["SMA_20"]),
+        SMA(50, columns=["SMA_50"]),
+        EMA(12, min_periods=12, columns=["EMA_12"]),
+        EMA(26, min_periods=26, columns=["EMA_26"]),
+        RSI(14, columns=["RSI_14"]),
+        MACD(12, 26, 9, columns=["MACD_12_26_9", "MACDs_12_26_9"]),
+        Bollinger(20, 2, columns=["BBU_20_2.0", "BBL_20_2.0"]),
+        Stochastic(14, columns=["STOCHk_14_3_3"]),
+        ATR(14, columns=["ATR_14"]),
+    ], history=history)
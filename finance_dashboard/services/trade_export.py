@@ -0,0 +1,204 @@
+# finance_dashboard/services/trade_export.py
+"""
+Export trades (CSV / Parquet) cho research notebooks, stream theo chunk -> bộ nhớ không đổi
+theo số dòng.
+
+- ``export_queryset``: trades của user, filter như trang portfolio (trade_type, portfolio,
+  symbol, khoảng date), pnl / risk tính trong DB (TradeQuerySet.with_pnl), xếp theo
+  portfolio rồi date;
+- ``export_batches``: đọc bằng ``.iterator(chunk_size=...)`` (Postgres: server-side cursor),
+  mỗi batch thêm equity / peak / drawdown chạy theo từng portfolio, bắt đầu từ
+  Portfolio.amount, trên tập trades được export (services/equity_engine.py, nối tiếp
+  giữa các batch bằng ``peak=``);
+- ``csv_chunks`` / ``parquet_chunks``: mỗi batch -> một đoạn CSV / một row group Parquet;
+- ``streaming_response``: StreamingHttpResponse; dưới ASGI iterator sync được đọc từng
+  chunk trong thread (Django sẽ đọc hết vào list nếu đưa thẳng iterator sync).
+
+Parquet cần pyarrow (optional).
+"""
+import csv
+import io
+from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+
+from finance_dashboard.models import Portfolio, Trade
+from .equity_engine import equity_curve
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow là optional (chỉ cho Parquet)
+    pa = pq = None
+
+CHUNK_SIZE = 5000
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Cột đọc từ DB (values_list) + cột equity tính khi stream
+SOURCE_FIELDS = [
+    "pk", "portfolio_id", "portfolio__name", "date", "symbol", "side", "trade_type",
+    "entry", "exit", "stoploss", "qty", "pnl_amount", "risk_amount", "ref",
+]
+COLUMNS = [
+    "trade_id", "portfolio_id", "portfolio", "date", "symbol", "side", "trade_type",
+    "entry", "exit", "stoploss", "qty", "pnl", "risk", "ref", "equity", "peak_equity", "drawdown",
+]
+PNL, RISK = SOURCE_FIELDS.index("pnl_amount"), SOURCE_FIELDS.index("risk_amount")
+CENT = Decimal("0.01")
+DECIMAL_COLUMNS = {"entry", "exit", "stoploss", "pnl", "risk"}  # Parquet: float64
+
+
+class ExportUnavailable(Exception):
+    pass
+
+
+def export_queryset(user, trade_type=None, portfolio_id=None, symbol=None, date_from=None, date_to=None):
+    trades = Trade.objects.filter(portfolio__user=user)
+    if trade_type and trade_type != "All":
+        trades = trades.filter(trade_type=trade_type)
+    if portfolio_id:
+        trades = trades.filter(portfolio_id=portfolio_id)
+    if symbol:
+        trades = trades.filter(symbol=symbol)
+    if date_from:
+        trades = trades.filter(date__gte=date_from)
+    if date_to:
+        trades = trades.filter(date__lte=date_to)
+    return trades.with_pnl().order_by("portfolio_id", "date", "pk")
+
+
+def export_batches(queryset, chunk_size=CHUNK_SIZE):
+    """[tuple theo COLUMNS] mỗi ``chunk_size`` trades"""
+    state = {"portfolio_id": None, "equity": 0.0, "peak": None}
+    batch = []
+    for row in queryset.values_list(*SOURCE_FIELDS).iterator(chunk_size=chunk_size):
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            yield _with_equity(batch, state)
+            batch = []
+    if batch:
+        yield _with_equity(batch, state)
+
+
+def _with_equity(batch, state):
+    """Thêm equity / peak / drawdown; ``state`` giữ equity, peak của portfolio đang dở giữa hai batch"""
+    rows = []
+    for portfolio_id, trades in groupby(batch, key=itemgetter(1)):
+        trades = list(trades)
+        if portfolio_id != state["portfolio_id"]:
+            amount = Portfolio.objects.values_list("amount", flat=True).get(pk=portfolio_id)
+            state.update(portfolio_id=portfolio_id, equity=float(amount), peak=None)
+        pnls = np.fromiter((trade[PNL] or 0 for trade in trades), dtype=np.float64, count=len(trades))
+        curve = equity_curve(pnls, state["equity"], peak=state["peak"])
+        state.update(equity=float(curve.equity[-1]), peak=float(curve.peak[-1]))
+        for trade, equity, peak, drawdown in zip(trades, curve.equity.tolist(), curve.peak.tolist(), curve.drawdown.tolist()):
+            rows.append(
+                trade[:PNL] + (_cents(trade[PNL]), _cents(trade[RISK])) + trade[RISK + 1:]
+                + (round(equity, 2), round(peak, 2), round(drawdown, 6))
+            )
+    return rows
+
+
+def _cents(value):
+    # SQLite trả ROUND(...) dạng float -> Decimal nhiều chữ số; quantize cho CSV gọn
+    return None if value is None else value.quantize(CENT)
+
+
+def csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class _ChunkSink:
+    """File-like cho ParquetWriter: giữ bytes đã ghi tới khi được lấy ra (take)"""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks, self._position = [], 0
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def parquet_schema():
+    money = pa.float64()
+    return pa.schema([
+        ("trade_id", pa.int64()), ("portfolio_id", pa.int64()), ("portfolio", pa.string()),
+        ("date", pa.date32()), ("symbol", pa.string()), ("side", pa.string()), ("trade_type", pa.string()),
+        ("entry", money), ("exit", money), ("stoploss", money), ("qty", pa.int64()),
+        ("pnl", money), ("risk", money), ("ref", pa.string()),
+        ("equity", money), ("peak_equity", money), ("drawdown", pa.float64()),
+    ])
+
+
+def parquet_chunks(batches):
+    """Mỗi batch một row group; footer được ghi khi đóng writer"""
+    schema = parquet_schema()
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression="snappy") as writer:
+        for batch in batches:
+            arrays = [
+                pa.array(_floats(values) if column in DECIMAL_COLUMNS else values, type=field.type)
+                for column, values, field in zip(COLUMNS, zip(*batch), schema)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.take()
+    yield sink.take()
+
+
+def _floats(values):
+    return [None if value is None else float(value) for value in values]
+
+
+def export_chunks(queryset, export_format, chunk_size=CHUNK_SIZE):
+    batches = export_batches(queryset, chunk_size)
+    if export_format == "parquet":
+        if pa is None:
+            raise ExportUnavailable("Parquet export requires pyarrow")
+        return parquet_chunks(batches)
+    return csv_chunks(batches)
+
+
+async def _async_chunks(chunks):
+    # thread_sensitive: cursor của .iterator() luôn được đọc trong cùng một thread
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    while (chunk := await next_chunk(chunks, None)) is not None:
+        yield chunk
+
+
+def streaming_response(chunks, export_format, filename, asynchronous=False):
+    content_type, extension = FORMATS[export_format]
+    response = StreamingHttpResponse(_async_chunks(chunks) if asynchronous else chunks, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{extension}"'
+    response["Cache-Control"] = "no-store"
+    return response
@@ -1,4 +1,4 @@
-import yfinance as yf
+from .market_data import get_provider, symbol_frame
 
 def get_forex_data(symbol="EURUSD=X", period="1mo", interval="1d"):
     """
@@ -7,6 +7,4 @@ def get_forex_data(symbol="EURUSD=X", period="1mo", interval="1d"):
     period: khoảng thời gian (1d, 5d, 1mo, 3mo, 6mo, 1y, 5y, max)
     interval: khung dữ liệu (1m, 5m, 15m, 1h, 1d, 1wk, 1mo)
     """
-    ticker = yf.Ticker(symbol)
-    hist = ticker.history(period=period, interval=interval)
-    return hist
+    return symbol_frame(get_provider().history([symbol], period=period, interval=interval), symbol)
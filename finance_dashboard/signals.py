@@ -0,0 +1,98 @@
+# finance_dashboard/signals.py
+"""
+Giữ PortfolioAnalytics đồng bộ với trades (xem services/portfolio_analytics.py):
+trade mới -> cập nhật incremental; trade sửa / xóa, portfolio tạo / đổi amount -> rebuild.
+Insight lưu / xóa -> đồng bộ normalized_tags và xóa cache đếm tags (services/insight_tags.py).
+Sau migrate (SQLite): cài lại triggers full-text search của Insight (services/insight_search.py).
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+
+from .models import Insight, Portfolio, Trade
+from .services import insight_search
+from .services.insight_tags import invalidate_tag_counts, sync_insight_tags
+from .services.portfolio_analytics import record_new_trade, schedule_rebuild
+
+# Các field ảnh hưởng tới analytics; save(update_fields=["ref", ...]) thì bỏ qua
+ANALYTICS_FIELDS = {"portfolio", "portfolio_id", "side", "entry", "exit", "stoploss", "qty", "date"}
+
+
+def _affects_analytics(update_fields):
+    return update_fields is None or bool(ANALYTICS_FIELDS & set(update_fields))
+
+
+@receiver(pre_save, sender=Trade)
+def remember_trade_portfolio(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Trade chuyển sang portfolio khác -> cả portfolio cũ cũng cần rebuild
+    if raw or instance.pk is None or not _affects_analytics(update_fields):
+        return
+    instance._previous_portfolio_id = (
+        Trade.objects.filter(pk=instance.pk).values_list("portfolio_id", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Trade)
+def trade_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or not _affects_analytics(update_fields):
+        return
+    if created:
+        record_new_trade(instance)
+    else:
+        schedule_rebuild({instance.portfolio_id, getattr(instance, "_previous_portfolio_id", None)})
+
+
+@receiver(post_delete, sender=Trade)
+def trade_deleted(sender, instance, **kwargs):
+    schedule_rebuild({instance.portfolio_id})
+
+
+def _may_change_amount(update_fields):
+    return update_fields is None or "amount" in update_fields
+
+
+@receiver(pre_save, sender=Portfolio)
+def remember_portfolio_amount(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance.pk is None or not _may_change_amount(update_fields):
+        return
+    instance._previous_amount = (
+        Portfolio.objects.filter(pk=instance.pk).values_list("amount", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Portfolio)
+def portfolio_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Portfolio mới: row rỗng; amount là equity ban đầu của curve -> chỉ rebuild khi amount đổi
+    # (đổi tên, save(update_fields=["name"]) không ảnh hưởng analytics)
+    if raw:
+        return
+    if created or (
+        _may_change_amount(update_fields)
+        and getattr(instance, "_previous_amount", None) != instance.amount
+    ):
+        schedule_rebuild({instance.pk})
+
+
+@receiver(post_save, sender=Insight)
+def insight_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and (update_fields is None or "tags" in update_fields):
+        sync_insight_tags(instance)
+    invalidate_tag_counts()
+
+
+@receiver(post_delete, sender=Insight)
+@receiver(m2m_changed, sender=Insight.normalized_tags.through)
+def insight_tags_changed(sender, **kwargs):
+    invalidate_tag_counts()
+
+
+def install_insight_search(sender, using="default", plan=None, **kwargs):
+    # SQLite remake bảng insight (AlterField...) thì drop luôn triggers FTS -> tạo lại
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    applied = MigrationRecorder(connection).applied_migrations()
+    if ("finance_dashboard", "0024_insight_full_text_search") in applied:
+        insight_search.install(connection)
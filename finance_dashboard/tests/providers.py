@@ -0,0 +1,22 @@
+from finance_dashboard.services.market_data import FixtureMarketDataProvider, UpstreamError, empty_frame
+
+
+class CountingProvider(FixtureMarketDataProvider):
+    """Fixture provider ghi lại mỗi lần download (symbols, period, start)"""
+
+    def __init__(self, name=None, missing=(), error=False):
+        super().__init__()
+        if name:
+            self.name = name
+        self.missing = set(missing)
+        self.error = error
+        self.calls = []
+
+    def _download(self, symbols, period, interval, start):
+        self.calls.append((tuple(symbols), period, start))
+        if self.error:
+            raise UpstreamError(f"{self.name}: HTTP 503")
+        found = [symbol for symbol in symbols if symbol not in self.missing]
+        if not found:
+            return empty_frame(), set()
+        return super()._download(found, period, interval, start)
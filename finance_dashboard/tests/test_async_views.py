@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TransactionTestCase
+
+from finance_dashboard import async_views, views
+from finance_dashboard.services.async_market import executor_stats, run_blocking
+from finance_dashboard.services.market_data import FixtureMarketDataProvider, set_provider
+
+
+class RunBlockingTests(SimpleTestCase):
+    async def test_blocking_calls_run_concurrently_in_the_executor(self):
+        calls = executor_stats()["calls"]
+        started = time.monotonic()
+        results = await asyncio.gather(*(run_blocking(time.sleep, 0.1) for _ in range(3)))
+        self.assertLess(time.monotonic() - started, 0.25)
+        self.assertEqual(results, [None] * 3)
+        stats = executor_stats()
+        self.assertEqual((stats["calls"] - calls, stats["in_flight"]), (3, 0))
+
+    async def test_exceptions_propagate(self):
+        with self.assertRaises(ZeroDivisionError):
+            await run_blocking(divmod, 1, 0)
+        self.assertEqual(executor_stats()["in_flight"], 0)
+
+
+class AsyncViewTests(TransactionTestCase):
+    """Async views trả về cùng HTML với bản sync (dùng chung helpers)"""
+
+    def setUp(self):
+        cache.clear()
+        set_provider(FixtureMarketDataProvider())
+        self.factory = AsyncRequestFactory()
+
+    def tearDown(self):
+        set_provider(None)
+
+    async def test_search_matches_sync_view(self):
+        response = await async_views.search_view(self.factory.get("/search/", {"query": "usd"}))
+        self.assertEqual(response.status_code, 200)
+        sync = await asyncio.to_thread(views.search_view, RequestFactory().get("/search/", {"query": "usd"}))
+        self.assertEqual(response.content, sync.content)
+        self.assertIn(b"EURUSD", response.content)
+
+    async def test_chart_is_conditional(self):
+        await async_views.chart_view(self.factory.get("/chart/EURUSD/"), "EURUSD")
+        response = await async_views.chart_view(self.factory.get("/chart/EURUSD/"), "EURUSD")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header("ETag"))
+        again = await async_views.chart_view(
+            self.factory.get("/chart/EURUSD/", headers={"If-None-Match": response["ETag"]}), "EURUSD",
+        )
+        self.assertEqual(again.status_code, 304)
+
+    async def test_home_renders(self):
+        response = await async_views.home(self.factory.get("/"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"EURUSD", response.content)
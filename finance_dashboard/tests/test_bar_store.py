@@ -0,0 +1,72 @@
+import pandas as pd
+from django.core.cache import cache
+from django.test import TestCase
+
+from finance_dashboard.models import PriceBar
+from finance_dashboard.services.bar_store import BarStore
+from finance_dashboard.services.market_data import set_provider, symbol_frame
+from .providers import CountingProvider
+
+SYMBOL = "EURUSD=X"
+
+
+class BarStoreRefreshTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.provider = CountingProvider("fixture")
+        set_provider(self.provider)
+        self.store = BarStore(max_age=3600, backfill_period="1y", read_only=False)
+
+    def tearDown(self):
+        set_provider(None)
+        cache.clear()
+
+    def bars(self):
+        return PriceBar.objects.filter(symbol=SYMBOL, interval="1d")
+
+    def test_first_read_backfills_then_serves_from_store(self):
+        frame = self.store.history([SYMBOL], period="1mo")
+        self.assertEqual(self.provider.calls, [((SYMBOL,), "1y", None)])
+        self.assertGreater(self.bars().count(), 200)
+
+        again = self.store.history([SYMBOL], period="3mo")
+        self.assertEqual(len(self.provider.calls), 1)
+        self.assertGreater(len(symbol_frame(again, SYMBOL)), len(symbol_frame(frame, SYMBOL)))
+
+    def test_stale_symbol_only_downloads_bars_after_the_last_stored_one(self):
+        self.store.history([SYMBOL], period="1mo")
+        count = self.bars().count()
+        last = self.bars().order_by("-ts").values_list("ts", flat=True)[5]
+        self.bars().filter(ts__gt=last).delete()
+
+        cache.clear()  # hết hạn fresh markers
+        frame = self.store.history([SYMBOL], period="1mo")
+        symbols, period, start = self.provider.calls[-1]
+        self.assertEqual((symbols, start), ((SYMBOL,), last.date()))
+        self.assertEqual(self.bars().count(), count)
+
+        stored = symbol_frame(frame, SYMBOL)
+        expected = symbol_frame(self.provider.history([SYMBOL], period="3mo"), SYMBOL).reindex(stored.index)
+        pd.testing.assert_frame_equal(stored, expected, check_freq=False)
+
+    def test_long_periods_download_only_missing_history(self):
+        self.store.history([SYMBOL], period="1mo")
+        self.store.history([SYMBOL], period="2y")
+        self.assertEqual([call[1] for call in self.provider.calls], ["1y", "2y"])
+
+        # Đã đủ lịch sử và còn fresh: 2y / 1y / max đọc từ store
+        for period in ("2y", "1y", "max"):
+            self.store.history([SYMBOL], period=period)
+        self.assertEqual(len(self.provider.calls), 2)
+
+    def test_history_shorter_than_period_is_not_backfilled_on_every_read(self):
+        # Fixture chỉ có ~800 ngày giao dịch: 5y không bao giờ được phủ kín
+        frame = self.store.history([SYMBOL], period="5y")
+        self.store.history([SYMBOL], period="5y")
+        self.assertEqual([call[1] for call in self.provider.calls], ["5y"])
+        self.assertEqual(len(symbol_frame(frame, SYMBOL)), self.bars().count())
+
+    def test_read_only_store_never_downloads(self):
+        store = BarStore(read_only=True)
+        self.assertTrue(symbol_frame(store.history([SYMBOL], period="1mo"), SYMBOL).empty)
+        self.assertEqual(self.provider.calls, [])
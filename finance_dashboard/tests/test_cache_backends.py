@@ -0,0 +1,108 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.test import SimpleTestCase
+
+from finance_dashboard.services.cache_backends import SQLiteCache, TieredCache
+
+
+class SharedCacheMixin:
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        self.path = os.path.join(directory, "cache.sqlite3")
+
+    def sqlite(self, **options):
+        cache = SQLiteCache(self.path, {"TIMEOUT": 60, "OPTIONS": options})
+        self.addCleanup(cache.close)
+        return cache
+
+    def rows(self):
+        with sqlite3.connect(self.path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+
+class SQLiteCacheTests(SharedCacheMixin, SimpleTestCase):
+    def test_values_are_shared_between_instances(self):
+        # Hai instance trên cùng file ~ hai gunicorn workers
+        writer, reader = self.sqlite(), self.sqlite()
+        writer.set("quote", {"EURUSD": 1.1})
+        writer.set_many({"a": 1, "b": [2]})
+        self.assertEqual(reader.get("quote"), {"EURUSD": 1.1})
+        self.assertEqual(reader.get_many(["a", "b", "c"]), {"a": 1, "b": [2]})
+        reader.delete_many(["a", "b"])
+        self.assertIsNone(writer.get("a"))
+
+    def test_expired_entries_are_missing_and_can_be_added_again(self):
+        cache = self.sqlite()
+        cache.set("expired", "old", timeout=0)
+        self.assertIsNone(cache.get("expired"))
+        self.assertFalse(cache.has_key("expired"))
+        self.assertFalse(cache.touch("expired"))
+        self.assertTrue(cache.add("expired", "new"))
+        self.assertFalse(cache.add("expired", "newer"))
+        self.assertEqual(cache.get("expired"), "new")
+
+    def test_add_is_atomic_across_instances(self):
+        first, second = self.sqlite(), self.sqlite()
+        self.assertTrue(first.add("lock", 1))
+        self.assertFalse(second.add("lock", 2))
+        self.assertTrue(second.delete("lock"))
+        self.assertTrue(second.add("lock", 2))
+
+    def test_cull_keeps_entries_near_max_entries(self):
+        cache = self.sqlite(MAX_ENTRIES=20, CULL_FREQUENCY=2)
+        for index in range(100):
+            cache.set(f"key{index}", index)
+        # Chỉ đếm sau mỗi MAX_ENTRIES / CULL_CHECK_FRACTION dòng ghi -> vượt tối đa một đợt
+        self.assertLessEqual(self.rows(), 20 + cache._cull_every)
+        self.assertEqual(cache.get("key99"), 99)
+
+    def test_close_reopens_connection_on_next_use(self):
+        cache = self.sqlite()
+        cache.set("quote", 1)
+        conn = cache._connection()
+        cache.close()
+        self.assertIsNone(cache._conn)
+        self.assertEqual(cache.get("quote"), 1)
+        self.assertIsNot(cache._connection(), conn)
+
+
+class TieredCacheTests(SharedCacheMixin, SimpleTestCase):
+    def tiered(self):
+        cache = TieredCache(self.path, {
+            "TIMEOUT": 60,
+            "OPTIONS": {"L1_TIMEOUT": 60, "L1_MAX_ENTRIES": 10, "L1_PREFIXES": ("technical_",)},
+        })
+        cache.l1.clear()
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_hot_keys_are_served_from_l1(self):
+        worker = self.tiered()
+        other = self.sqlite()
+        worker.set("technical_EURUSD", "v1")
+        worker.set("lock_EURUSD", "v1")
+        # Process khác ghi đè L2: key hot vẫn đọc bản L1 tới hết L1_TIMEOUT, key thường đọc L2
+        other.set("technical_EURUSD", "v2")
+        other.set("lock_EURUSD", "v2")
+        self.assertEqual(worker.get("technical_EURUSD"), "v1")
+        self.assertEqual(worker.get("lock_EURUSD"), "v2")
+        self.assertEqual(worker.get_many(["technical_EURUSD", "lock_EURUSD"]),
+                         {"technical_EURUSD": "v1", "lock_EURUSD": "v2"})
+
+    def test_l2_hits_fill_l1(self):
+        worker = self.tiered()
+        self.sqlite().set("technical_GBPUSD", "v1")
+        self.assertEqual(worker.get_many(["technical_GBPUSD"]), {"technical_GBPUSD": "v1"})
+        self.assertEqual(worker.l1.get("technical_GBPUSD"), "v1")
+
+    def test_add_and_delete_go_through_to_l2(self):
+        first, second = self.tiered(), self.tiered()
+        first.set("technical_EURUSD", "v1")
+        first.delete("technical_EURUSD")
+        self.assertIsNone(first.get("technical_EURUSD"))
+        self.assertTrue(first.add("technical_lock", 1))
+        self.assertFalse(second.add("technical_lock", 2))
@@ -0,0 +1,108 @@
+import time
+
+from django.test import SimpleTestCase
+
+from finance_dashboard.services.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, RateLimitedError, TokenBucket, UpstreamGuard,
+)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker("test", failure_threshold=3, recovery_timeout=60)
+        for _ in range(2):
+            breaker.before_call()
+            breaker.record_failure()
+        breaker.before_call()
+        breaker.record_success()  # thành công reset bộ đếm lỗi liên tiếp
+        for _ in range(3):
+            breaker.before_call()
+            breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        self.assertEqual(breaker.stats()["rejections"], 1)
+
+    def test_half_open_allows_one_trial_call(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=0.05)
+        breaker.before_call()
+        breaker.record_failure()
+        time.sleep(0.06)
+        self.assertTrue(breaker.before_call())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertFalse(breaker.before_call())
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=0.05)
+        breaker.before_call()
+        breaker.record_failure()
+        time.sleep(0.06)
+        breaker.before_call()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_burst_then_rate_limited(self):
+        bucket = TokenBucket("test", rate=1.0, burst=2, max_wait=0)
+        bucket.acquire()
+        bucket.acquire()
+        with self.assertRaises(RateLimitedError):
+            bucket.acquire()
+        self.assertEqual(bucket.stats()["rejections"], 1)
+
+    def test_waits_for_a_token_within_max_wait(self):
+        bucket = TokenBucket("test", rate=50.0, burst=1, max_wait=1.0)
+        bucket.acquire()
+        started = time.monotonic()
+        bucket.acquire()
+        self.assertGreater(time.monotonic() - started, 0.01)
+
+    def test_rate_adapts_to_failures_and_recovers(self):
+        bucket = TokenBucket("test", rate=2.0, burst=5, min_rate=0.5)
+        bucket.on_failure()
+        self.assertEqual(bucket.rate, 1.0)
+        for _ in range(5):
+            bucket.on_failure()
+        self.assertEqual(bucket.rate, 0.5)
+        for _ in range(30):
+            bucket.on_success()
+        self.assertEqual(bucket.rate, 2.0)
+
+
+class UpstreamGuardTests(SimpleTestCase):
+    def setUp(self):
+        self.guard = UpstreamGuard("test", failure_threshold=2, recovery_timeout=60, rate=1000.0, burst=1000)
+        self.calls = 0
+
+    def fail(self):
+        self.calls += 1
+        raise ConnectionError("HTTP 503")
+
+    def ok(self):
+        self.calls += 1
+        return "bars"
+
+    def test_exceptions_count_and_open_circuit_fails_fast(self):
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                self.guard.call(self.fail)
+        with self.assertRaises(CircuitOpenError):
+            self.guard.call(self.ok)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.guard.stats()["circuit"]["state"], OPEN)
+
+    def test_is_failure_marks_result_as_error(self):
+        for _ in range(2):
+            self.assertEqual(self.guard.call(self.ok, is_failure=lambda result: result == "bars"), "bars")
+        self.assertEqual(self.guard.breaker.state, OPEN)
+
+    def test_success_keeps_circuit_closed(self):
+        self.assertEqual(self.guard.call(self.ok), "bars")
+        self.assertEqual(self.guard.stats()["circuit"]["state"], CLOSED)
@@ -0,0 +1,84 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from finance_dashboard.models import Insight, Portfolio, Trade
+from finance_dashboard.services.conditional_get import UNKNOWN, DataVersion, combine
+from finance_dashboard.services.market_data import FixtureMarketDataProvider, set_provider
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user("trader")
+        cls.portfolio = Portfolio.objects.create(user=user, name="FX", amount=Decimal("10000"))
+        for index in range(3):
+            Trade.objects.create(
+                portfolio=cls.portfolio, symbol="EURUSD", side="BUY", trade_type="Live",
+                entry=Decimal("1.1"), exit=Decimal("1.2"), date=date(2024, 1, 1 + index),
+            )
+        Insight.objects.create(title="Gold breakout", summary="range", category="currency", date=date(2024, 1, 1))
+
+    def setUp(self):
+        cache.clear()
+        set_provider(FixtureMarketDataProvider())
+
+    def tearDown(self):
+        set_provider(None)
+
+    def etag(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header("ETag"))
+        return response["ETag"]
+
+    def assert_not_modified(self, url, etag, **params):
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_unchanged_trade_table_is_not_modified(self):
+        url = reverse("filter_trades", args=["Live"])
+        etag = self.etag(url)
+        self.assert_not_modified(url, etag)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_query_string_and_data_change_the_etag(self):
+        url = reverse("filter_trades", args=["Live"])
+        etag = self.etag(url)
+        self.assertNotEqual(self.etag(url, cursor="abc"), etag)
+        self.assertNotEqual(self.etag(reverse("filter_trades", args=["Backtest"])), etag)
+
+        # Tên portfolio hiện trong bảng trades -> đổi tên cũng đổi ETag
+        self.portfolio.name = "FX majors"
+        self.portfolio.save()
+        renamed = self.etag(url)
+        self.assertNotEqual(renamed, etag)
+
+        Trade.objects.filter(pk=Trade.objects.first().pk).delete()
+        self.assertNotEqual(self.etag(url), renamed)
+
+    def test_insight_search_follows_insight_edits(self):
+        url = reverse("search_insights")
+        etag = self.etag(url, q="gold")
+        self.assert_not_modified(url, etag, q="gold")
+        insight = Insight.objects.get()
+        insight.summary = "breakout confirmed"
+        insight.save()
+        self.assertNotEqual(self.etag(url, q="gold"), etag)
+
+    def test_chart_is_not_modified_while_bars_are_unchanged(self):
+        url = reverse("chart", args=["EURUSD"])
+        # Lần đầu bar store chưa có bars -> version chưa biết, không có ETag
+        self.assertFalse(self.client.get(url).has_header("ETag"))
+        etag = self.etag(url)
+        self.assert_not_modified(url, etag)
+
+    def test_unknown_part_disables_validators(self):
+        self.assertEqual(combine(DataVersion("a"), UNKNOWN), UNKNOWN)
+        self.assertEqual(combine(DataVersion("a"), extra=("q",)), combine(DataVersion("a"), extra=("q",)))
+        self.assertNotEqual(combine(DataVersion("a"), extra=("q",)).etag, combine(DataVersion("a")).etag)
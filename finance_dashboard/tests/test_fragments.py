@@ -0,0 +1,81 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from finance_dashboard.services.analysis_fragments import macro_fragments
+from finance_dashboard.services.analysis_service import MACRO_TICKERS, AnalysisService, macro_missing_keys
+from finance_dashboard.services.json_fragments import Fragment, cached_fragment, dumps, join
+
+
+class JsonFragmentTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.builds = 0
+
+    def build(self, value):
+        def load():
+            self.builds += 1
+            return value
+        return load
+
+    def test_join_splices_fragments_at_any_depth(self):
+        data = {"technical": Fragment(dumps({"pair": "EURUSD"})), "macro": {"VIX": Fragment(b'{"value":14.2}')}, "ok": True}
+        self.assertEqual(json.loads(join(data)), {"technical": {"pair": "EURUSD"}, "macro": {"VIX": {"value": 14.2}}, "ok": True})
+
+    def test_fragment_is_cached_per_version(self):
+        for _ in range(2):
+            self.assertEqual(cached_fragment("quote", lambda: "v1", self.build([1]), 60), b"[1]")
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(cached_fragment("quote", lambda: "v2", self.build([2]), 60), b"[2]")
+        self.assertEqual(self.builds, 2)
+
+    def test_unknown_version_always_builds(self):
+        for _ in range(2):
+            cached_fragment("quote", lambda: None, self.build([1]), 60)
+        self.assertEqual(self.builds, 2)
+
+    def test_version_is_read_before_build(self):
+        versions = iter(["v1", "v2"])
+        cached_fragment("quote", lambda: next(versions), self.build([1]), 60)
+        # Dữ liệu đổi trong lúc build: fragment cũ không được gắn vào version mới
+        self.assertEqual(cached_fragment("quote", lambda: "v2", self.build([2]), 60), b"[2]")
+
+    def test_dict_encoding_returns_fragment_per_key(self):
+        result = cached_fragment("tiles", lambda: "v1", self.build({"VIX": 1}), 60,
+                                 encode=lambda data: {name: dumps(value) for name, value in data.items()})
+        self.assertEqual(result, {"VIX": b"1"})
+        self.assertIsInstance(result["VIX"], Fragment)
+
+
+@override_settings(MARKET_CACHE_BACKGROUND_REFRESH=False, MACRO_MISSING_TILE_TTL=300)
+class MacroFragmentTests(SimpleTestCase):
+    """US10Y không bao giờ có (FRED key mặc định, không có ^TNX): fragment vẫn phải cache được"""
+
+    def setUp(self):
+        cache.clear()
+        self.service = AnalysisService()
+        self.loads = []
+        patcher = mock.patch.multiple(self.service, _load_ticker_tiles=self.yahoo, _load_fred_us10y=lambda: None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def yahoo(self, names):
+        self.loads.append(tuple(names))
+        return {name: {'value': 1.0, 'change': 0.1, 'signal': 'Bullish', 'history': [1.0]} for name in names}
+
+    def test_missing_tile_is_part_of_the_version(self):
+        self.service.get_macro_data()
+        with mock.patch.object(self.service, "get_macro_data", wraps=self.service.get_macro_data) as build:
+            first = macro_fragments(self.service)
+            second = macro_fragments(self.service)
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(set(first), set(MACRO_TICKERS) | {'COT'})
+
+    def test_missing_tile_is_retried_after_its_ttl(self):
+        macro_fragments(self.service)
+        cache.delete(macro_missing_keys()['US10Y'])  # negative cache hết hạn
+        macro_fragments(self.service)
+        self.assertEqual(self.loads, [tuple(MACRO_TICKERS), ()])
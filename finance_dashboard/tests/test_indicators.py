@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from finance_dashboard.management.commands.benchmark_indicators import ta_indicators
+from finance_dashboard.services.indicators import TECHNICAL_INDICATORS, compute_indicators, resolve
+from finance_dashboard.services.market_data import FixtureMarketDataProvider, symbol_frame
+
+# Forex (giao dịch mọi ngày làm việc) và cổ phiếu (bỏ bớt vài ngày) dùng chung một ma trận
+SYMBOLS = ["EURUSD=X", "USDJPY=X", "AAPL", "MSFT"]
+
+
+class IndicatorEngineTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        frame = FixtureMarketDataProvider().history(SYMBOLS, period="6mo")
+        # Cổ phiếu thiếu một số phiên -> lịch khác forex, số bar khác nhau
+        frame.loc[frame.index[::7], "AAPL"] = np.nan
+        frame.loc[frame.index[-3:], "MSFT"] = np.nan
+        cls.frame = frame
+
+    def test_matches_ta_for_every_symbol(self):
+        result = compute_indicators(self.frame, SYMBOLS)
+        for symbol in SYMBOLS:
+            expected = ta_indicators(symbol_frame(self.frame, symbol))
+            pd.testing.assert_index_equal(result[symbol].index, expected.index)
+            for column in TECHNICAL_INDICATORS:
+                with self.subTest(symbol=symbol, column=column):
+                    actual, reference = result[symbol][column], expected[column]
+                    # ta trả 0 cho ATR trong giai đoạn warm-up, engine trả NaN
+                    mask = actual.notna() & reference.notna() & (reference != 0)
+                    self.assertGreater(mask.sum(), 50)
+                    np.testing.assert_allclose(actual[mask], reference[mask], rtol=1e-9)
+
+    def test_batch_equals_one_symbol_at_a_time(self):
+        batch = compute_indicators(self.frame, SYMBOLS)
+        for symbol in SYMBOLS:
+            single = compute_indicators(self.frame[[symbol]], [symbol])[symbol]
+            pd.testing.assert_frame_equal(batch[symbol], single.loc[batch[symbol].index])
+
+    def test_only_requested_indicators_and_dependencies_are_computed(self):
+        self.assertEqual(resolve(["MACD_12_26_9"]), ["EMA_12", "EMA_26", "MACD_12_26_9"])
+        result = compute_indicators(self.frame, SYMBOLS[:1], names=["MACD_12_26_9"])[SYMBOLS[0]]
+        self.assertEqual(
+            list(result.columns),
+            ["Open", "High", "Low", "Close", "Volume", "EMA_12", "EMA_26", "MACD_12_26_9", "MACDs_12_26_9"],
+        )
+
+    def test_empty_frame(self):
+        result = compute_indicators(self.frame.iloc[:0], ["EURUSD=X"])
+        self.assertTrue(result["EURUSD=X"].empty)
@@ -0,0 +1,59 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from finance_dashboard.models import Insight, Tag
+from finance_dashboard.services.insight_tags import normalize_tag, parse_tags, tag_counts
+from finance_dashboard.views import filter_insights
+
+
+class InsightTagTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def insight(self, tags, title="Idea"):
+        return Insight.objects.create(title=title, summary="", category="currency", tags=tags)
+
+    def names(self, insight):
+        return sorted(insight.normalized_tags.values_list("name", flat=True))
+
+    def test_parse_tags(self):
+        self.assertEqual(parse_tags("Forex, Risk Mgmt;#breakout\nforex,, "), ["forex", "risk-mgmt", "breakout"])
+        self.assertEqual(parse_tags(""), [])
+        self.assertEqual(parse_tags(None), [])
+        self.assertEqual(normalize_tag("Vàng  Giá"), "vàng-giá")
+        self.assertEqual(len(normalize_tag("x" * 80)), 50)
+
+    def test_tags_are_synced_on_save(self):
+        insight = self.insight("EUR, breakout")
+        self.assertEqual(self.names(insight), ["breakout", "eur"])
+        insight.tags = "euro; Breakout"
+        insight.save()
+        self.assertEqual(self.names(insight), ["breakout", "euro"])
+        # Tag dùng chung, không tạo trùng
+        self.insight("euro")
+        self.assertEqual(Tag.objects.filter(name="euro").count(), 1)
+
+    def test_saving_other_fields_keeps_tags(self):
+        insight = self.insight("gold")
+        insight.tags = "silver"
+        insight.save(update_fields=["title"])
+        self.assertEqual(self.names(insight), ["gold"])
+
+    def test_filter_matches_whole_tags_only(self):
+        euro = self.insight("euro", title="Euro")
+        self.insight("eur", title="Eur")
+        self.assertEqual(list(filter_insights(tag="Euro")), [euro])
+
+    def test_counts_are_cached_until_the_next_insight_write(self):
+        self.insight("forex, gold")
+        self.insight("forex")
+        with self.assertNumQueries(1):
+            self.assertEqual(tag_counts(), [("forex", 2), ("gold", 1)])
+            self.assertEqual(tag_counts(), [("forex", 2), ("gold", 1)])
+
+        last = self.insight("gold, gold")
+        self.assertEqual(tag_counts(), [("forex", 2), ("gold", 2)])
+        last.delete()
+        # Tag không còn insight nào thì không được đếm
+        Insight.objects.filter(tags="forex").delete()
+        self.assertEqual(tag_counts(), [("forex", 1), ("gold", 1)])
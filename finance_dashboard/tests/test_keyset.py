@@ -0,0 +1,81 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from finance_dashboard.models import Insight, Portfolio, Trade
+from finance_dashboard.services.insight_search import is_ranked, search
+from finance_dashboard.services.keyset import capped_count, decode_cursor, encode_cursor, paginate
+
+
+def all_pages(queryset, per_page, **kwargs):
+    """pk của mọi trang, đi theo next_cursor"""
+    pks, cursor = [], None
+    while True:
+        page = paginate(queryset, cursor, per_page, **kwargs)
+        pks += [row.pk for row in page.items]
+        if not page.has_next:
+            return pks
+        cursor = page.next_cursor
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user("trader")
+        portfolio = Portfolio.objects.create(user=user, name="FX")
+        # Nhiều trades cùng ngày: cursor phải phân biệt bằng pk
+        Trade.objects.bulk_create(
+            Trade(
+                portfolio=portfolio, symbol="EURUSD", side="BUY", trade_type="Live",
+                entry=Decimal("1.1"), exit=Decimal("1.2"), date=date(2024, 1, 1) + timedelta(days=index // 3),
+            )
+            for index in range(23)
+        )
+        for index in range(17):
+            Insight.objects.create(
+                title="gold " * (1 + index % 4), summary="breakout" if index % 2 else "range",
+                category="currency", date=date(2024, 1, 1) + timedelta(days=index % 5),
+            )
+
+    def test_pages_cover_every_row_once_in_order(self):
+        trades = Trade.objects.all()
+        expected = list(trades.order_by("-date", "-pk").values_list("pk", flat=True))
+        for per_page in (1, 5, 23, 50):
+            with self.subTest(per_page=per_page):
+                self.assertEqual(all_pages(trades, per_page), expected)
+
+    def test_next_page_ignores_rows_added_before_the_cursor(self):
+        first = paginate(Trade.objects.all(), None, 5)
+        newest = Trade.objects.order_by("-date").first()
+        Trade.objects.create(
+            portfolio=newest.portfolio, symbol="EURUSD", side="SELL", trade_type="Live",
+            entry=Decimal("1.2"), exit=Decimal("1.1"), date=newest.date + timedelta(days=1),
+        )
+        second = paginate(Trade.objects.all(), first.next_cursor, 5)
+        self.assertEqual(len({row.pk for row in first.items} & {row.pk for row in second.items}), 0)
+        self.assertLess(second.items[0].date, first.items[-1].date + timedelta(days=1))
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        first = paginate(Trade.objects.all(), None, 5)
+        for cursor in ("not-base64!", encode_cursor(["k"]), encode_cursor({"k": "yesterday", "pk": 3})):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(paginate(Trade.objects.all(), cursor, 5).items, first.items)
+
+    def test_cursor_round_trip(self):
+        state = {"k": "2024-01-01", "pk": 7, "r": -1.25}
+        self.assertEqual(decode_cursor(encode_cursor(state)), state)
+
+    def test_ranked_search_pages_follow_relevance_order(self):
+        results = search(Insight.objects.all(), "gold")
+        self.assertTrue(is_ranked(results))
+        expected = [row.pk for row in results]
+        self.assertEqual(len(expected), 17)
+        for per_page in (1, 4, 6):
+            with self.subTest(per_page=per_page):
+                self.assertEqual(all_pages(results, per_page, ranked=True), expected)
+
+    def test_capped_count(self):
+        self.assertEqual(capped_count(Trade.objects.all(), cap=10), (10, True))
+        self.assertEqual(capped_count(Trade.objects.all(), cap=23), (23, False))
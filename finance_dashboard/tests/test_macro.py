@@ -0,0 +1,72 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from finance_dashboard.services.analysis_service import MACRO_TICKERS, AnalysisService
+
+
+def tile(value):
+    return {'value': value, 'change': 0.1, 'signal': 'Bullish', 'history': [value]}
+
+
+@override_settings(MARKET_CACHE_BACKGROUND_REFRESH=False, MACRO_SOURCE_TIMEOUTS={'yahoo': 2, 'fred': 0.2})
+class MacroFanOutTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.service = AnalysisService()
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.calls = []
+
+    def yahoo(self, delay=0.0):
+        def load(names):
+            self.calls.append(('yahoo', tuple(names)))
+            time.sleep(delay)
+            return {**{name: tile(1.0) for name in names}, '_TNX': tile(4.2)}
+        return load
+
+    def fred(self, block=False, delay=0.0):
+        def load():
+            self.calls.append(('fred',))
+            time.sleep(delay)
+            if block:
+                self.release.wait(5)
+            return tile(4.5)
+        return load
+
+    def patch(self, yahoo, fred):
+        return mock.patch.multiple(self.service, _load_ticker_tiles=yahoo, _load_fred_us10y=fred)
+
+    def test_sources_are_fetched_in_parallel(self):
+        with self.patch(self.yahoo(delay=0.15), self.fred(delay=0.15)):
+            started = time.monotonic()
+            data = self.service.get_macro_data()
+        self.assertLess(time.monotonic() - started, 0.28)
+        self.assertEqual(set(data), set(MACRO_TICKERS) | {'US10Y', 'COT'})
+        self.assertEqual(data['US10Y']['value'], 4.5)
+
+    def test_slow_fred_falls_back_to_tnx_within_its_timeout(self):
+        with self.patch(self.yahoo(), self.fred(block=True)):
+            started = time.monotonic()
+            data = self.service.get_macro_data()
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(data['US10Y']['value'], 4.2)
+        self.assertNotIn('_TNX', data)
+
+    def test_failed_source_only_drops_its_tiles_and_is_retried_alone(self):
+        def broken(names):
+            raise ConnectionError("HTTP 503")
+
+        with self.patch(broken, self.fred()):
+            data = self.service.get_macro_data()
+        self.assertEqual(set(data), {'US10Y', 'COT'})
+
+        self.calls.clear()
+        with self.patch(self.yahoo(), self.fred()):
+            data = self.service.get_macro_data()
+        # US10Y đã cache -> chỉ Yahoo tickers được fetch lại
+        self.assertEqual(self.calls, [('yahoo', tuple(MACRO_TICKERS))])
+        self.assertEqual(set(data), set(MACRO_TICKERS) | {'US10Y', 'COT'})
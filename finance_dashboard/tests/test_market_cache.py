@@ -0,0 +1,132 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from finance_dashboard.services import market_cache
+from finance_dashboard.services.market_cache import cached, cached_many, get_freshness, payload_version
+
+
+class StalledExecutor:
+    """Executor nhận task nhưng không chạy (worker chết giữa lần refresh)"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.submitted = 0
+
+    def submit(self, fn):
+        if self.error:
+            raise self.error
+        self.submitted += 1
+
+
+@override_settings(MARKET_CACHE_BACKGROUND_REFRESH=True, MARKET_CACHE_REFRESH_LOCK_TIMEOUT=1)
+class RefreshMarkerTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        market_cache._scheduled.clear()
+        cached("quote_a", lambda: "v1", 60, source="test")
+        entry = cache.get("quote_a")
+        entry["refreshed_at"] -= 120
+        cache.set("quote_a", entry)
+
+    def tearDown(self):
+        market_cache._scheduled.clear()
+
+    def test_abandoned_refresh_expires_after_lock_timeout(self):
+        executor = StalledExecutor()
+        with mock.patch.object(market_cache, "_get_executor", return_value=executor):
+            self.assertEqual(cached("quote_a", lambda: "v2", 60, source="test"), "v1")
+            # Worker khác (process khác: không có _scheduled) thấy marker -> không refresh trùng
+            market_cache._scheduled.clear()
+            cached("quote_a", lambda: "v2", 60, source="test")
+            self.assertEqual(executor.submitted, 1)
+
+            time.sleep(1.1)
+            market_cache._scheduled.clear()
+            cached("quote_a", lambda: "v2", 60, source="test")
+        self.assertEqual(executor.submitted, 2)
+
+    def test_failed_refresh_releases_marker(self):
+        with override_settings(MARKET_CACHE_BACKGROUND_REFRESH=False):
+            def fail():
+                raise ConnectionError("HTTP 503")
+            self.assertEqual(cached("quote_a", fail, 60, source="test"), "v1")
+            self.assertEqual(cached("quote_a", lambda: "v2", 60, source="test"), "v1")
+        self.assertEqual(cache.get("quote_a")["value"], "v2")
+
+    def test_unschedulable_refresh_serves_stale_value_and_releases_marker(self):
+        executor = StalledExecutor(error=RuntimeError("cannot schedule new futures after shutdown"))
+        with mock.patch.object(market_cache, "_get_executor", return_value=executor):
+            self.assertEqual(cached("quote_a", lambda: "v2", 60, source="test"), "v1")
+        self.assertEqual(market_cache._scheduled, set())
+        with override_settings(MARKET_CACHE_BACKGROUND_REFRESH=False):
+            cached("quote_a", lambda: "v2", 60, source="test")
+        self.assertEqual(cache.get("quote_a")["value"], "v2")
+
+
+@override_settings(MARKET_CACHE_BACKGROUND_REFRESH=False)
+class StaleWhileRevalidateTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.loads = []
+
+    def loader(self, value):
+        def load():
+            self.loads.append(value)
+            return value
+        return load
+
+    def age(self, key, seconds):
+        entry = cache.get(key)
+        entry["refreshed_at"] -= seconds
+        cache.set(key, entry)
+
+    def test_fresh_entry_is_served_from_cache(self):
+        self.assertEqual(cached("quote_a", self.loader("v1"), 60, source="test"), "v1")
+        self.assertEqual(cached("quote_a", self.loader("v2"), 60, source="test"), "v1")
+        self.assertEqual(self.loads, ["v1"])
+        entry = cache.get("quote_a")
+        self.assertEqual((entry["swr"], entry["source"], entry["soft_ttl"]), (1, "test", 60))
+
+    def test_stale_entry_is_served_then_refreshed(self):
+        cached("quote_a", self.loader("v1"), 60, source="test")
+        self.age("quote_a", 120)
+        self.assertTrue(get_freshness(["quote_a"])["quote_a"]["stale"])
+        self.assertIsNone(payload_version(["quote_a"]))
+
+        # Giá trị cũ trả về ngay; refresh (ở đây chạy đồng bộ) ghi giá trị mới
+        self.assertEqual(cached("quote_a", self.loader("v2"), 60, source="test"), "v1")
+        self.assertEqual(cached("quote_a", self.loader("v3"), 60, source="test"), "v2")
+        self.assertEqual(self.loads, ["v1", "v2"])
+        self.assertFalse(get_freshness(["quote_a"])["quote_a"]["stale"])
+        self.assertIsNotNone(payload_version(["quote_a"]))
+
+    def test_empty_result_is_not_cached(self):
+        self.assertIsNone(cached("quote_a", self.loader(None), 60, source="test"))
+        self.assertEqual(cached("quote_a", self.loader("v1"), 60, source="test"), "v1")
+        self.assertEqual(self.loads, [None, "v1"])
+
+    def test_pre_envelope_value_is_treated_as_stale(self):
+        cache.set("quote_a", "legacy")
+        self.assertEqual(cached("quote_a", self.loader("v1"), 60, source="test"), "legacy")
+        self.assertEqual(cache.get("quote_a")["value"], "v1")
+
+    def test_cached_many_loads_only_missing_items(self):
+        keys = {"EURUSD": "quote_EURUSD", "GBPUSD": "quote_GBPUSD"}
+        batches = []
+
+        def load(items):
+            batches.append(sorted(items))
+            return {item: f"{item}-quote" for item in items}
+
+        cached_many({"EURUSD": keys["EURUSD"]}, load, 60, source="test")
+        result = cached_many(keys, load, 60, source="test")
+        self.assertEqual(result, {"EURUSD": "EURUSD-quote", "GBPUSD": "GBPUSD-quote"})
+        self.assertEqual(batches, [["EURUSD"], ["GBPUSD"]])
+
+    def test_force_reloads_everything(self):
+        cached("quote_a", self.loader("v1"), 60, source="test")
+        cached("quote_a", self.loader("v2"), 60, source="test", force=True)
+        self.assertEqual(cache.get("quote_a")["value"], "v2")
@@ -0,0 +1,116 @@
+import sys
+import types
+import uuid
+from unittest import mock
+
+import pandas as pd
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from finance_dashboard.services.circuit_breaker import CLOSED, OPEN, get_guard
+from finance_dashboard.services.market_data import (
+    OHLCV_FIELDS, FixtureMarketDataProvider, MarketDataProvider, UpstreamError, get_provider, normalize_frame,
+    set_provider, symbol_frame,
+)
+from .providers import CountingProvider
+
+SYMBOL = "EURUSD=X"
+
+
+class ProviderTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        set_provider(None)
+
+    def test_fixture_history_is_deterministic_and_aligned(self):
+        provider = FixtureMarketDataProvider()
+        frame = provider.history([SYMBOL, "AAPL"], period="3mo")
+        again = provider.history([SYMBOL, "AAPL"], period="3mo")
+        pd.testing.assert_frame_equal(frame, again)
+        self.assertEqual(list(frame.columns.get_level_values(0).unique()), [SYMBOL, "AAPL"])
+        self.assertGreater(len(symbol_frame(frame, SYMBOL)), 50)
+
+    def test_one_download_for_a_batch_of_symbols(self):
+        provider = CountingProvider("fixture")
+        frame = provider.history([SYMBOL, "AAPL", SYMBOL], period="1mo")
+        self.assertEqual(provider.calls, [((SYMBOL, "AAPL"), "1mo", None)])
+        self.assertEqual(list(frame.columns.get_level_values(0).unique()), [SYMBOL, "AAPL"])
+
+    def test_normalize_frame_pads_missing_symbols_and_fields(self):
+        raw = pd.DataFrame({"Close": [1.0, 2.0]}, index=pd.to_datetime(["2024-01-02", "2024-01-01"]))
+        frame = normalize_frame(raw, [SYMBOL, "AAPL"])
+        self.assertEqual(list(frame.columns), [(symbol, field) for symbol in (SYMBOL, "AAPL") for field in OHLCV_FIELDS])
+        self.assertTrue(frame.index.is_monotonic_increasing)
+        self.assertEqual(symbol_frame(frame, SYMBOL)["Close"].tolist(), [2.0, 1.0])
+        self.assertTrue(symbol_frame(frame, "AAPL").empty)
+
+    def test_set_provider_swaps_the_shared_provider(self):
+        provider = CountingProvider("fixture")
+        set_provider(provider)
+        self.assertIs(get_provider(), provider)
+
+
+class ProviderNoDataTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        # Guard riêng cho mỗi test: breaker / limiter là state của process
+        self.name = f"test-{uuid.uuid4().hex[:8]}"
+
+    def test_unknown_ticker_is_cached_as_no_data_without_tripping_breaker(self):
+        provider = CountingProvider(self.name, missing={"NOPE"})
+        for _ in range(3):
+            self.assertTrue(symbol_frame(provider.history(["NOPE"], period="1mo"), "NOPE").empty)
+        self.assertEqual(len(provider.calls), 1)
+        circuit = get_guard(self.name).stats()["circuit"]
+        self.assertEqual((circuit["state"], circuit["failures"]), (CLOSED, 0))
+
+    def test_no_data_is_remembered_per_symbol(self):
+        provider = CountingProvider(self.name, missing={"NOPE"})
+        provider.history(["NOPE", SYMBOL], period="1mo")
+        frame = provider.history(["NOPE", SYMBOL], period="1mo")
+        self.assertFalse(symbol_frame(frame, SYMBOL).empty)
+        self.assertEqual(provider.calls[1][0], (SYMBOL,))
+
+    def test_short_window_without_bars_is_not_remembered(self):
+        # Cửa sổ 1 ngày có thể rỗng vì cuối tuần / ngày lễ
+        provider = CountingProvider(self.name, missing={"NOPE"})
+        provider.history(["NOPE"], period="1d")
+        provider.history(["NOPE"], period="1d")
+        self.assertEqual(len(provider.calls), 2)
+
+    def test_upstream_errors_open_the_breaker(self):
+        with override_settings(UPSTREAM_LIMITS={self.name: {"failure_threshold": 2, "recovery_timeout": 60}}):
+            provider = CountingProvider(self.name, error=True)
+            for _ in range(4):
+                self.assertTrue(provider.history([SYMBOL], period="1mo").isna().all().all())
+        self.assertEqual(len(provider.calls), 2)
+        self.assertEqual(get_guard(self.name).stats()["circuit"]["state"], OPEN)
+        # Lỗi upstream không phải "không có dữ liệu"
+        self.assertFalse(provider._no_data([SYMBOL], "1d"))
+
+
+class YahooDownloadTests(SimpleTestCase):
+    """MarketDataProvider._download với một yfinance giả (không gọi mạng)"""
+
+    def fake_yfinance(self, errors):
+        shared = types.SimpleNamespace(_ERRORS={})
+
+        def download(tickers, **kwargs):
+            # Như yfinance: reset dict global rồi ghi lỗi của từng ticker
+            shared._ERRORS = dict(errors)
+            return pd.DataFrame()
+
+        return mock.patch.dict(sys.modules, {"yfinance": types.SimpleNamespace(download=download, shared=shared)})
+
+    def test_missing_tickers_are_not_upstream_failures(self):
+        errors = {"NOPE": "YFTickerMissingError('NOPE: possibly delisted')", "AAPL": "HTTPError('HTTP 503')"}
+        with self.fake_yfinance(errors):
+            _, failed = MarketDataProvider()._download(["NOPE", "AAPL", SYMBOL], "1mo", "1d", None)
+        self.assertEqual(failed, {"AAPL"})
+
+    def test_every_symbol_failing_raises_upstream_error(self):
+        with self.fake_yfinance({"AAPL": "HTTPError('HTTP 503')"}):
+            with self.assertRaises(UpstreamError):
+                MarketDataProvider()._download(["AAPL"], "1mo", "1d", None)
@@ -0,0 +1,119 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+
+from finance_dashboard.models import Portfolio, PortfolioAnalytics, Trade
+from finance_dashboard.services.portfolio_analytics import as_dict, rebuild
+
+EXACT_FIELDS = [
+    "total_trades", "wins", "losses", "net_pnl", "gross_win", "gross_loss", "risk_sum", "risk_count",
+    "equity", "peak_equity", "underwater_trades", "longest_drawdown", "last_trade_date",
+]
+FLOAT_FIELDS = ["max_drawdown", "return_sum", "return_sq_sum", "downside_sq_sum"]
+
+# (side, entry, exit, stoploss): thắng, thua, drawdown dài rồi hồi phục
+TRADES = [
+    ("BUY", "1.10000", "1.10500", "1.09500"),
+    ("SELL", "1.10500", "1.10800", "1.11000"),
+    ("BUY", "1.10800", "1.10200", None),
+    ("BUY", "1.10200", "1.10100", "1.09800"),
+    ("SELL", "1.10100", "1.09000", "1.10500"),
+    ("BUY", "1.09000", "1.09000", "1.08500"),
+    ("SELL", "1.09000", "1.09600", None),
+    ("BUY", "1.09600", "1.11000", "1.09000"),
+]
+
+
+class AnalyticsMixin:
+    def setUp(self):
+        user = User.objects.create_user("trader")
+        self.portfolio = Portfolio.objects.create(user=user, name="FX", amount=Decimal("10000"))
+        self.start = date(2024, 1, 1)
+
+    def add_trade(self, index, side, entry, exit, stoploss, day=None):
+        return Trade.objects.create(
+            portfolio=self.portfolio, symbol="EURUSD", side=side, trade_type="Live",
+            entry=Decimal(entry), exit=Decimal(exit), stoploss=Decimal(stoploss) if stoploss else None,
+            qty=10000, date=self.start + timedelta(days=index if day is None else day),
+        )
+
+    def snapshot(self):
+        row = PortfolioAnalytics.objects.get(portfolio=self.portfolio)
+        return {field: getattr(row, field) for field in EXACT_FIELDS + FLOAT_FIELDS}
+
+    def assert_matches_rebuild(self):
+        incremental = self.snapshot()
+        rebuild(self.portfolio.pk)
+        rebuilt = self.snapshot()
+        for field in EXACT_FIELDS:
+            self.assertEqual(incremental[field], rebuilt[field], field)
+        for field in FLOAT_FIELDS:
+            self.assertAlmostEqual(incremental[field], rebuilt[field], places=9, msg=field)
+
+
+class PortfolioAnalyticsTests(AnalyticsMixin, TestCase):
+    def test_incremental_updates_match_rebuild_after_every_trade(self):
+        for index, trade in enumerate(TRADES):
+            self.add_trade(index, *trade)
+            with self.subTest(trade=index):
+                self.assert_matches_rebuild()
+
+    def test_backdated_trade_rebuilds(self):
+        for index, trade in enumerate(TRADES[:4]):
+            self.add_trade(index * 2, *trade)
+        self.add_trade(0, *TRADES[4], day=3)
+        self.add_trade(0, *TRADES[5], day=20)
+        self.assert_matches_rebuild()
+        self.assertEqual(self.snapshot()["last_trade_date"], self.start + timedelta(days=20))
+
+    def test_summary_matches_trade_properties(self):
+        trades = [self.add_trade(index, *trade) for index, trade in enumerate(TRADES)]
+        summary = as_dict(PortfolioAnalytics.objects.get(portfolio=self.portfolio))
+        wins = [trade for trade in trades if trade.pnl > 0]
+        risks = [trade.risk for trade in trades if trade.risk is not None]
+        self.assertEqual(summary["total_trades"], len(trades))
+        self.assertEqual(summary["win_rate"], round(len(wins) / len(trades) * 100, 2))
+        self.assertEqual(summary["net_pnl"], round(float(sum(trade.pnl for trade in trades)), 2))
+        self.assertEqual(summary["avg_risk"], round(float(sum(risks)) / len(risks), 2))
+
+
+    def test_only_amount_changes_rebuild_the_portfolio(self):
+        self.add_trade(0, *TRADES[0])
+        with mock.patch("finance_dashboard.signals.schedule_rebuild") as schedule:
+            self.portfolio.name = "FX majors"
+            self.portfolio.save()
+            self.portfolio.save(update_fields=["name"])
+            self.assertEqual(schedule.call_count, 0)
+
+            self.portfolio.amount = Decimal("20000")
+            self.portfolio.save(update_fields=["amount"])
+            self.portfolio.amount = Decimal("25000")
+            self.portfolio.save()
+            self.assertEqual(schedule.call_args_list, [mock.call({self.portfolio.pk})] * 2)
+
+
+class PortfolioAnalyticsRebuildTests(AnalyticsMixin, TransactionTestCase):
+    """Rebuild chạy trong transaction.on_commit -> cần commit thật"""
+
+    def test_edit_and_delete_rebuild(self):
+        trades = [self.add_trade(index, *trade) for index, trade in enumerate(TRADES)]
+        # Sửa / xóa -> rebuild một lần sau commit
+        with transaction.atomic():
+            trades[2].exit = Decimal("1.12000")
+            trades[2].save()
+            trades[5].delete()
+        self.assert_matches_rebuild()
+        row = PortfolioAnalytics.objects.get(portfolio=self.portfolio)
+        self.assertEqual(row.total_trades, len(TRADES) - 1)
+        self.assertEqual(row.net_pnl, sum(trade.pnl for index, trade in enumerate(trades) if index != 5))
+
+    def test_new_amount_moves_the_equity_curve(self):
+        trade = self.add_trade(0, *TRADES[0])
+        self.portfolio.amount = Decimal("20000")
+        self.portfolio.save()
+        self.assertEqual(self.snapshot()["equity"], Decimal("20000") + trade.pnl)
+        self.assert_matches_rebuild()
@@ -0,0 +1,67 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from finance_dashboard.models import Insight, Portfolio, Trade
+from finance_dashboard.views import link_ref_insights
+
+
+class PortfolioPageQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("trader")
+        cls.portfolios = [Portfolio.objects.create(user=cls.user, name=name) for name in ("FX", "Stocks")]
+        cls.insights = [
+            Insight.objects.create(title=f"Idea {index}", category="currency", date=date(2024, 1, 1))
+            for index in range(3)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.day = 0
+
+    def add_trades(self, count):
+        for index in range(count):
+            insight = self.insights[index % len(self.insights)]
+            self.day += 1
+            Trade.objects.create(
+                portfolio=self.portfolios[index % 2], symbol="EURUSD", side="BUY",
+                trade_type="Live" if index % 2 else "Backtest",
+                entry=Decimal("1.1"), exit=Decimal("1.2"), date=date(2024, 1, 1) + timedelta(days=self.day),
+                # Ref đã migrate sang FK, ref lệch FK, ref không phải insight
+                ref=[f"Insight #{insight.pk}", f"Insight #{insight.pk}", "manual"][index % 3],
+                ref_insight=insight if index % 3 == 0 else None,
+            )
+
+    def queries(self, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("portfolio"), params)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_query_count_does_not_grow_with_trades(self):
+        self.add_trades(3)
+        for trade_type in ("All", "Live"):
+            with self.subTest(trade_type=trade_type):
+                few = self.queries(type=trade_type)
+                self.add_trades(30)
+                self.assertEqual(self.queries(type=trade_type), few)
+
+    def test_ref_decides_the_linked_insight(self):
+        deleted = Insight.objects.create(title="Gone", category="currency", date=date(2024, 1, 1))
+        first, second = self.insights[:2]
+        trades = [
+            Trade(ref=f"Insight #{first.pk}", ref_insight=first),
+            Trade(ref=f"Insight #{second.pk}", ref_insight=first),
+            Trade(ref="manual", ref_insight=first),
+            Trade(ref=f"Insight #{deleted.pk}"),
+        ]
+        deleted.delete()
+        with self.assertNumQueries(1):
+            link_ref_insights(trades)
+        self.assertEqual([trade.ref_insight for trade in trades], [first, second, None, None])
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from finance_dashboard.management.commands.check_query_plans import POSTGRES_SCAN_RE, SQLITE_SCAN_RE, Command
+from finance_dashboard.models import Insight
+from finance_dashboard.views import filter_insights
+
+
+class QueryPlanTests(TestCase):
+    """EXPLAIN của các query nóng (xem ``manage.py check_query_plans``): không query nào đọc cả bảng"""
+
+    def assert_no_full_scans(self):
+        command = Command()
+        for label, queryset in command._queries():
+            with self.subTest(label):
+                plan = command._explain(queryset)
+                self.assertEqual(command._full_scans(plan), [], plan)
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite query plans')
+    def test_sqlite_hot_queries_use_indexes(self):
+        self.assert_no_full_scans()
+
+    @skipUnless(
+        connection.vendor == 'postgresql',
+        'PostgreSQL plans (enable_seqscan = off) need DATABASE_URL pointing at PostgreSQL; the default test database is SQLite',
+    )
+    def test_postgresql_hot_queries_use_indexes(self):
+        self.assert_no_full_scans()
+
+
+class FullScanPatternTests(SimpleTestCase):
+    def test_only_scans_without_an_index_are_reported(self):
+        plan = (
+            "SEARCH finance_dashboard_trade USING INDEX trade_symbol_date_idx (symbol=?)\n"
+            "SCAN finance_dashboard_insight USING INDEX insight_date_idx\n"
+            "SCAN finance_dashboard_portfolio\n"
+            "USE TEMP B-TREE FOR ORDER BY"
+        )
+        self.assertEqual([match.group(1) for match in SQLITE_SCAN_RE.finditer(plan)], ["finance_dashboard_portfolio"])
+        plan = "Index Scan using trade_type_date_idx on finance_dashboard_trade\n  ->  Seq Scan on finance_dashboard_insight"
+        self.assertEqual([match.group(1) for match in POSTGRES_SCAN_RE.finditer(plan)], ["finance_dashboard_insight"])
+
+
+class FilterInsightsTests(TestCase):
+    """filter_insights (dùng chung cho insights, search_insights và check_query_plans)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        for index in range(12):
+            insight = Insight.objects.create(
+                title=f"Idea {index}", summary="", category=["currency", "stock", "crypto"][index % 3],
+                result=["positive", "negative", "neutral"][index % 2],
+            )
+            # date là auto_now_add -> đặt lại bằng update
+            Insight.objects.filter(pk=insight.pk).update(date=start + timedelta(days=index))
+        cls.start = start
+
+    def expected(self, predicate):
+        return [insight.pk for insight in sorted(Insight.objects.all(), key=lambda row: row.date, reverse=True)
+                if predicate(insight)]
+
+    def test_filters_match_python_filtering(self):
+        since, until = self.start + timedelta(days=3), self.start + timedelta(days=8)
+        cases = [
+            ({}, lambda row: True),
+            ({"category": "currency"}, lambda row: row.category == "currency"),
+            ({"category": "stock", "result": "negative"}, lambda row: (row.category, row.result) == ("stock", "negative")),
+            ({"date_from": since, "date_to": until}, lambda row: since <= row.date <= until),
+        ]
+        for filters, predicate in cases:
+            with self.subTest(**{key: str(value) for key, value in filters.items()}):
+                self.assertEqual(list(filter_insights(**filters).values_list("pk", flat=True)), self.expected(predicate))
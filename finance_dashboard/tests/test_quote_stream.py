@@ -0,0 +1,119 @@
+import asyncio
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from finance_dashboard.services import quote_stream
+from finance_dashboard.services.quote_stream import (
+    DEFAULTS, QuoteBroadcaster, StreamLimitExceeded, Subscriber, parse_symbols,
+)
+
+
+def options(**overrides):
+    return dict(DEFAULTS, **{"interval": 0.01, "heartbeat": 0.05, **overrides})
+
+
+async def stop(broadcaster):
+    """Bỏ mọi subscriber và dừng producer (đang chờ interval)"""
+    for subscriber in list(broadcaster.subscribers):
+        broadcaster.unsubscribe(subscriber)
+    broadcaster.task.cancel()
+    try:
+        await broadcaster.task
+    except asyncio.CancelledError:
+        pass
+
+
+class ParseSymbolsTests(SimpleTestCase):
+    def test_symbols_are_normalized_and_deduplicated(self):
+        self.assertEqual(parse_symbols(" eurusd=x,^VIX,EURUSD=X, ", 5), ["EURUSD=X", "^VIX"])
+
+    def test_invalid_requests_raise_value_error(self):
+        for raw, limit in (("", 5), (" , ", 5), ("A,B,C", 2), ("EURUSD=X,<script>", 5)):
+            with self.subTest(raw=raw):
+                with self.assertRaises(ValueError):
+                    parse_symbols(raw, limit)
+
+
+class QuoteBroadcasterTests(SimpleTestCase):
+    def setUp(self):
+        self.fetches = []
+
+    def fake_fetch(self, symbols, points):
+        self.fetches.append(tuple(symbols))
+        return {"quote": {symbol: {"price": 1.0} for symbol in symbols}, "sparkline": {}, "signal": {}}
+
+    def test_slow_subscriber_keeps_only_the_latest_update(self):
+        subscriber = Subscriber(["EURUSD=X"], "1.2.3.4")
+        for price in (1.1, 1.2, 1.3):
+            subscriber.push("quote", "EURUSD=X", {"price": price})
+        self.assertEqual(subscriber.coalesced, 2)
+        self.assertEqual(subscriber.drain(), {("quote", "EURUSD=X"): {"price": 1.3}})
+        self.assertFalse(subscriber.wakeup.is_set())
+
+    async def test_publish_sends_changed_values_and_snapshot_to_new_subscribers(self):
+        broadcaster = QuoteBroadcaster(options(interval=60))
+        with mock.patch.object(quote_stream, "_fetch", self.fake_fetch):
+            eur = broadcaster.subscribe(["EURUSD=X"], "a")
+            gbp = broadcaster.subscribe(["GBPUSD=X"], "b")
+            broadcaster.publish({"quote": {"EURUSD=X": {"price": 1.1}, "GBPUSD=X": None}})
+            broadcaster.publish({"quote": {"EURUSD=X": {"price": 1.1}}})  # không đổi -> không đẩy
+            self.assertEqual(eur.drain(), {("quote", "EURUSD=X"): {"price": 1.1}})
+            self.assertEqual(gbp.drain(), {})
+
+            late = broadcaster.subscribe(["EURUSD=X"], "c")
+            self.assertEqual(late.drain(), {("quote", "EURUSD=X"): {"price": 1.1}})
+            await stop(broadcaster)
+
+    async def test_connection_limits_and_unsubscribe(self):
+        broadcaster = QuoteBroadcaster(options(max_connections=3, max_per_client=2))
+        with mock.patch.object(quote_stream, "_fetch", self.fake_fetch):
+            first = broadcaster.subscribe(["EURUSD=X"], "a")
+            broadcaster.subscribe(["EURUSD=X"], "a")
+            with self.assertRaises(StreamLimitExceeded):
+                broadcaster.subscribe(["EURUSD=X"], "a")
+            broadcaster.subscribe(["EURUSD=X"], "b")
+            with self.assertRaises(StreamLimitExceeded):
+                broadcaster.subscribe(["EURUSD=X"], "c")
+
+            broadcaster.unsubscribe(first)
+            broadcaster.unsubscribe(first)  # lần hai không trừ thêm
+            self.assertEqual(broadcaster.clients["a"], 1)
+            broadcaster.subscribe(["EURUSD=X"], "c")
+            self.assertEqual(broadcaster.metrics()["rejected"], 2)
+            await stop(broadcaster)
+
+    async def test_one_producer_fetches_the_union_of_symbols(self):
+        broadcaster = QuoteBroadcaster(options())
+        with mock.patch.object(quote_stream, "_fetch", self.fake_fetch):
+            eur = broadcaster.subscribe(["EURUSD=X"], "a")
+            both = broadcaster.subscribe(["EURUSD=X", "^VIX"], "b")
+            await asyncio.sleep(0.05)
+            broadcaster.unsubscribe(eur)
+            broadcaster.unsubscribe(both)
+            await broadcaster.task
+        self.assertEqual(set(self.fetches), {("EURUSD=X", "^VIX")})
+        # Producer dừng khi không còn subscriber, giá trị cũ bỏ đi
+        self.assertEqual(broadcaster.latest, {})
+        self.assertFalse(broadcaster.metrics()["producer_running"])
+
+    async def test_stream_yields_events_and_releases_the_slot(self):
+        broadcaster = QuoteBroadcaster(options(interval=60))
+        with mock.patch.object(quote_stream, "_fetch", self.fake_fetch):
+            subscriber = broadcaster.subscribe(["EURUSD=X"], "a")
+            stream = broadcaster.stream(subscriber)
+            self.assertEqual(await anext(stream), f"retry: {DEFAULTS['retry_ms']}\n\n")
+            chunk = await anext(stream)
+            self.assertIn("event: quote\n", chunk)
+            self.assertIn('"symbol":"EURUSD=X"', chunk)
+            self.assertEqual(await anext(stream), ": ping\n\n")
+            await stream.aclose()
+            self.assertEqual(broadcaster.metrics()["connections"], 0)
+            await stop(broadcaster)
+
+
+class QuoteStreamViewTests(SimpleTestCase):
+    def test_requires_asgi(self):
+        response = self.client.get(reverse("quote_stream"), {"symbols": "EURUSD=X"})
+        self.assertEqual(response.status_code, 501)
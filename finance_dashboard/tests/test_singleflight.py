@@ -0,0 +1,79 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from finance_dashboard.services.singleflight import SingleFlight
+
+
+class SlowCounter:
+    """fn cho single-flight: đếm số lần chạy, giữ leader đủ lâu để các caller khác phải chờ"""
+
+    def __init__(self, delay=0.2, error=None):
+        self.delay = delay
+        self.error = error
+        self.runs = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.runs += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {"value": 42}
+
+
+def run_concurrently(target, count):
+    results, errors = [], []
+
+    def run():
+        try:
+            results.append(target())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_callers_share_one_execution(self):
+        flight, fn = SingleFlight(mode="local"), SlowCounter()
+        results, errors = run_concurrently(lambda: flight.do("quotes", fn), 8)
+        self.assertEqual((fn.runs, errors), (1, []))
+        self.assertEqual(results, [{"value": 42}] * 8)
+        stats = flight.stats()
+        self.assertEqual((stats["executed"], stats["coalesced"], stats["in_flight"]), (1, 7, 0))
+
+    def test_leader_error_is_raised_in_every_waiter(self):
+        flight, fn = SingleFlight(mode="local"), SlowCounter(error=ValueError("upstream down"))
+        results, errors = run_concurrently(lambda: flight.do("quotes", fn), 4)
+        self.assertEqual((fn.runs, results), (1, []))
+        self.assertEqual(len(errors), 4)
+        self.assertTrue(all(isinstance(error, ValueError) for error in errors))
+
+    def test_different_keys_do_not_coalesce(self):
+        flight, fn = SingleFlight(mode="local"), SlowCounter(delay=0)
+        flight.do("a", fn)
+        flight.do("b", fn)
+        self.assertEqual(fn.runs, 2)
+
+    def test_cache_mode_coalesces_across_instances(self):
+        # Hai instance = hai workers dùng chung cache
+        workers, fn = [SingleFlight(mode="cache", poll_interval=0.01) for _ in range(2)], SlowCounter()
+        leader = threading.Thread(target=lambda: workers[0].do("quotes", fn))
+        leader.start()
+        time.sleep(0.05)
+        self.assertEqual(workers[1].do("quotes", fn), {"value": 42})
+        leader.join()
+        self.assertEqual(fn.runs, 1)
+        self.assertEqual(workers[1].stats()["coalesced_remote"], 1)
@@ -0,0 +1,121 @@
+from datetime import timedelta
+from unittest import mock
+
+import pandas as pd
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from finance_dashboard.models import PriceBar
+from finance_dashboard.services import analysis_service
+from finance_dashboard.services.analysis_service import AnalysisService
+from finance_dashboard.services.bar_store import get_bar_store
+from finance_dashboard.services.forex_service import _apply_indicators
+from finance_dashboard.services.indicators import compute_indicators
+from finance_dashboard.services.market_data import FixtureMarketDataProvider, set_provider, symbol_frame
+from finance_dashboard.services.streaming_indicators import IndicatorSet, technical_indicator_set
+
+SYMBOL = "EURUSD=X"
+FOREX_INDICATORS = ["ema", "macd", "rsi", "sma"]
+TECHNICAL_COLUMNS = [
+    "SMA_20", "SMA_50", "EMA_12", "EMA_26", "RSI_14", "MACD_12_26_9", "MACDs_12_26_9",
+    "BBU_20_2.0", "BBL_20_2.0", "STOCHk_14_3_3", "ATR_14",
+]
+
+
+class StreamingIndicatorWindowTests(SimpleTestCase):
+    """State streaming (giữ trong cache giữa các request) phải bằng việc tính lại trên toàn bộ lịch sử."""
+
+    def setUp(self):
+        cache.clear()
+        frame = FixtureMarketDataProvider().history([SYMBOL], period="2y")
+        self.bars = symbol_frame(frame, SYMBOL)
+
+    def _days(self, length=300, window=65):
+        # Mỗi ngày lịch sử có thêm một bar, cửa sổ period trượt theo; xen kẽ lần đọc lại cùng ngày
+        for day in range(40):
+            history = self.bars.iloc[:length + day]
+            yield history, history.index[-window]
+            yield history, history.index[-window]
+
+    def test_forex_indicators_match_full_recompute_when_window_moves(self):
+        for history, start in self._days():
+            streamed = _apply_indicators(history, SYMBOL, "1d", FOREX_INDICATORS, start=start)
+            full = _apply_indicators(history, SYMBOL, "1d", FOREX_INDICATORS, start=start, persist=False)
+            self.assertEqual(streamed.index[0], start)
+            pd.testing.assert_frame_equal(streamed, full, rtol=1e-9)
+
+    def test_technical_state_matches_vectorized_engine(self):
+        state = None
+        rebuilds = 0
+        for history, start in self._days():
+            if state is None or not state.can_advance(history):
+                state = technical_indicator_set()
+                rebuilds += 1
+            live = state.advance(history)
+            state = IndicatorSet.from_dict(state.to_dict())
+
+            expected = compute_indicators(pd.concat({SYMBOL: history}, axis=1), [SYMBOL])[SYMBOL]
+            expected = expected[TECHNICAL_COLUMNS].tail(len(live.rows))
+            pd.testing.assert_frame_equal(live.frame()[TECHNICAL_COLUMNS], expected, rtol=1e-9, check_names=False, check_freq=False)
+        self.assertEqual(rebuilds, 1)
+
+    def test_state_advances_on_new_bar_and_rebuilds_when_history_start_moves(self):
+        state = technical_indicator_set()
+        state.advance(self.bars.iloc[:60])
+        self.assertTrue(state.can_advance(self.bars.iloc[:61]))
+        # Backfill thêm lịch sử cũ -> bar đầu đổi, phải tính lại
+        self.assertFalse(state.can_advance(self.bars.iloc[1:61]))
+        # State cũ (trước khi có first_ts) được tính lại
+        data = state.to_dict()
+        del data["first_ts"]
+        self.assertFalse(IndicatorSet.from_dict(data).can_advance(self.bars.iloc[:61]))
+
+    def test_frame_is_cut_to_the_requested_window(self):
+        state = technical_indicator_set(history=100)
+        live = state.advance(self.bars.iloc[:200])
+        start = self.bars.index[180]
+        self.assertEqual(list(live.frame(start).index), list(self.bars.index[180:200]))
+        self.assertEqual(len(live.frame()), 100)
+
+
+class TechnicalStreamingTests(TestCase):
+    """get_technical_analyses: một daily bar mới chỉ cập nhật state, không tính lại"""
+
+    def setUp(self):
+        cache.clear()
+        set_provider(FixtureMarketDataProvider())
+        self.store = get_bar_store()
+        self.store.history([SYMBOL], period="3mo")
+        self.service = AnalysisService()
+
+    def tearDown(self):
+        set_provider(None)
+        cache.clear()
+
+    def state(self):
+        return IndicatorSet.from_dict(cache.get(f"technical_state_{SYMBOL}_1d"))
+
+    def test_new_daily_bar_advances_state(self):
+        newest = PriceBar.objects.filter(symbol=SYMBOL, interval="1d").latest("ts")
+        newest.delete()
+        with mock.patch.object(analysis_service, "technical_indicator_set", wraps=technical_indicator_set) as bootstrap:
+            before = self.service.get_technical_analyses([SYMBOL], period="3mo")[SYMBOL]
+            bars = self.state().bars
+
+            # Hôm sau: bar mới về và cửa sổ 3mo (tính từ now()) trượt theo
+            newest.pk = None
+            newest.save()
+            with mock.patch.object(timezone, "now", return_value=timezone.now() + timedelta(days=7)):
+                after = self.service.get_technical_analyses([SYMBOL], period="3mo", force=True)[SYMBOL]
+        self.assertEqual(bootstrap.call_count, 1)
+        self.assertEqual(self.state().bars, bars + 1)
+        self.assertEqual(after['labels'][-1], f"{newest.ts:%Y-%m-%d}")
+        self.assertNotEqual(after['labels'], before['labels'])
+
+        # Bằng việc tính lại trên toàn bộ lịch sử đã lưu
+        cache.clear()
+        rebuilt = self.service.get_technical_analyses([SYMBOL], period="3mo")[SYMBOL]
+        for name, payload in rebuilt['indicators'].items():
+            self.assertEqual(after['indicators'][name]['signal'], payload['signal'], name)
+            self.assertAlmostEqual(after['indicators'][name]['value'], payload['value'], places=4, msg=name)
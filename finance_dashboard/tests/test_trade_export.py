@@ -0,0 +1,81 @@
+import csv
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import skipIf
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from finance_dashboard.models import Portfolio, Trade
+from finance_dashboard.services.trade_export import (
+    COLUMNS, csv_chunks, export_batches, export_chunks, export_queryset, pa,
+)
+
+EQUITY, PEAK, DRAWDOWN = COLUMNS.index("equity"), COLUMNS.index("peak_equity"), COLUMNS.index("drawdown")
+
+
+class TradeExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("trader")
+        other = User.objects.create_user("other")
+        cls.portfolios = [
+            Portfolio.objects.create(user=cls.user, name="FX", amount=Decimal("10000")),
+            Portfolio.objects.create(user=cls.user, name="Stocks", amount=Decimal("5000")),
+        ]
+        Portfolio.objects.create(user=other, name="Not mine")
+        moves = ["0.00500", "-0.00300", "-0.00400", "0.00200", "0.00900", "-0.00100", "-0.00600"]
+        trades = []
+        for portfolio in cls.portfolios:
+            for index in range(11):
+                move = Decimal(moves[index % len(moves)])
+                trades.append(Trade(
+                    portfolio=portfolio, symbol="EURUSD", side="BUY", trade_type="Live" if index % 3 else "Backtest",
+                    entry=Decimal("1.10000"), exit=Decimal("1.10000") + move, qty=10000,
+                    date=date(2024, 1, 1) + timedelta(days=index),
+                ))
+        Trade.objects.bulk_create(trades)
+
+    def rows(self, chunk_size, **filters):
+        return [row for batch in export_batches(export_queryset(self.user, **filters), chunk_size) for row in batch]
+
+    def test_equity_is_continuous_across_batches(self):
+        expected = self.rows(10_000)
+        self.assertEqual(len(expected), 22)
+        for chunk_size in (1, 3, 10, 11, 12):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.rows(chunk_size), expected)
+
+    def test_equity_starts_from_portfolio_amount(self):
+        rows = self.rows(4)
+        for portfolio in self.portfolios:
+            trades = [row for row in rows if row[1] == portfolio.pk]
+            pnls = [row[COLUMNS.index("pnl")] for row in trades]
+            self.assertEqual(trades[0][EQUITY], float(portfolio.amount + pnls[0]))
+            self.assertAlmostEqual(trades[-1][EQUITY], float(portfolio.amount + sum(pnls)), places=2)
+            for row in trades:
+                self.assertGreaterEqual(row[PEAK], row[EQUITY])
+                self.assertAlmostEqual(row[DRAWDOWN], (row[PEAK] - row[EQUITY]) / row[PEAK], places=5)
+
+    def test_filters_and_owner(self):
+        self.assertEqual({row[1] for row in self.rows(5)}, {portfolio.pk for portfolio in self.portfolios})
+        live = self.rows(5, trade_type="Live", portfolio_id=self.portfolios[0].pk)
+        self.assertEqual(len(live), 7)
+        self.assertEqual({row[COLUMNS.index("trade_type")] for row in live}, {"Live"})
+
+    def test_csv_has_header_and_every_row(self):
+        chunks = list(csv_chunks(export_batches(export_queryset(self.user), 5)))
+        self.assertEqual(len(chunks), 5)
+        rows = list(csv.reader(io.StringIO("".join(chunks))))
+        self.assertEqual(rows[0], COLUMNS)
+        self.assertEqual(len(rows), 23)
+
+    @skipIf(pa is None, "Parquet export requires pyarrow")
+    def test_parquet_matches_csv(self):
+        import pyarrow.parquet as pq
+        data = b"".join(export_chunks(export_queryset(self.user), "parquet", chunk_size=4))
+        table = pq.read_table(io.BytesIO(data))
+        self.assertEqual(table.column_names, COLUMNS)
+        self.assertEqual(table.num_rows, 22)
+        self.assertEqual(table.column("equity").to_pylist(), [row[EQUITY] for row in self.rows(4)])
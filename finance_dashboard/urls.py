@@ -1,20 +1,23 @@
+from django.conf import settings
 from django.urls import path, include  # THÊM include
-from . import views
+from . import async_views, views
 from django.contrib.auth.views import LoginView
 
+# ASYNC_VIEWS=True (chạy dưới ASGI): các trang I/O-bound dùng async views
+pages = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     # Auth
     path('login/', LoginView.as_view(template_name='finance_dashboard/login.html'), name='login'),
     
     # Main pages
-    path('', views.home, name='home'),
-    path("analysis/", views.analysis, name="analysis"),
-    path("analysis/ajax/", views.analysis_ajax, name="analysis_ajax"),
+    path('', pages.home, name='home'),
+    path("analysis/", pages.analysis, name="analysis"),
+    path("analysis/ajax/", pages.analysis_ajax, name="analysis_ajax"),
     path("portfolio/", views.portfolio, name="portfolio"),
     path("about/", views.about, name="about"),
-    path('search/', views.search_view, name='search'),
-    path('chart/<str:symbol>/', views.chart_view, name='chart'),  # SỬA: st: → str:
+    path('search/', pages.search_view, name='search'),
+    path('chart/<str:symbol>/', pages.chart_view, name='chart'),  # SỬA: st: → str:
     path("details/<str:symbol>/", views.details, name="details"),
     
     # Insights CRUD
@@ -42,7 +45,14 @@ urlpatterns = [
     
     # Trade filtering - SỬA: st: → str:
     path("trades/filter/<str:trade_type>/", views.filter_trades, name="filter_trades"),
+    path("trades/export/", views.export_trades, name="export_trades"),
     
     # AJAX endpoints
     path("get-symbol-choices/", views.get_symbol_choices, name="get_symbol_choices"),
+
+    # Live quotes (server-sent events, ASGI)
+    path("stream/quotes/", views.quote_stream, name="quote_stream"),
+
+    # Metrics (circuit breakers, rate limiters, single-flight)
+    path("metrics/market-data/", views.market_data_metrics, name="market_data_metrics"),
 ]
\ No newline at end of file
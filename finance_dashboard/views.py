@@ -1,123 +1,123 @@
 # finance_dashboard/views.py
 
 from django.shortcuts import render, redirect, get_object_or_404
-from django.core.cache import cache
 from django.views.generic import TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.handlers.asgi import ASGIRequest
 from django.http import JsonResponse, HttpResponse
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from finance_dashboard.services.forex_service import get_forex_data, get_macro_data
 from finance_dashboard.services.macro_service import get_cot_data, get_us10y_yield, get_inflation_data
+from finance_dashboard.services.async_market import executor_stats
+from finance_dashboard.services.cache_backends import cache_stats
+from finance_dashboard.services.circuit_breaker import guard_stats
+from finance_dashboard.services.indicators import display_indicators
+from finance_dashboard.services.insight_search import is_ranked, search as search_insights_text
+from finance_dashboard.services.insight_tags import normalize_tag, tag_counts
+from finance_dashboard.services.json_fragments import FragmentResponse, join
+from finance_dashboard.services.keyset import capped_count, paginate
+from finance_dashboard.services.market_cache import get_freshness, oldest_freshness
+from finance_dashboard.services.portfolio_analytics import EMPTY_ANALYTICS, portfolio_analytics
+from finance_dashboard.services.quote_stream import (
+    EventStreamResponse, StreamLimitExceeded, get_broadcaster, parse_symbols, stream_stats,
+)
+from finance_dashboard.services.singleflight import get_singleflight
+from finance_dashboard.services.trade_export import (
+    FORMATS as EXPORT_FORMATS, ExportUnavailable, export_chunks, export_queryset, streaming_response,
+)
+from finance_dashboard.services.quote_service import (
+    CHART_PAIRS, ETF_FLOW_TICKERS, FOREX_SYMBOLS, HOME_INDICES, RISK_TICKER, STOCK_SYMBOLS,
+    get_symbols_data, get_sparklines, get_multiple_chart_data, get_etf_flows,
+    get_real_search_data_many, get_real_chart_data, empty_chart_data,
+    chart_yf_symbol, search_yf_symbol,
+)
+from finance_dashboard.services.conditional_get import (
+    DataVersion, bars_version, combine, conditional, queryset_version,
+)
 from .forms import TechnicalForm, MacroForm, TradeForm, PortfolioForm, InsightForm, InsightSearchForm
 from .models import Portfolio, Trade, ForexPair, Insight
-from django.db.models import Q
-from django.core.paginator import Paginator
+from django.db.models import Prefetch
 import json
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.template.loader import render_to_string
-from tenacity import retry, stop_after_attempt, wait_fixed
 import logging
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# ====================== Trang Home ======================
+# ====================== Metrics ======================
+
+@staff_member_required
+def market_data_metrics(request):
+    """(Chỉ staff) Circuit breaker / rate limiter của từng upstream, single-flight và cache tiers"""
+    return JsonResponse({
+        'upstreams': guard_stats(),
+        'cache': cache_stats(),
+        'singleflight': get_singleflight().stats(),
+        'quote_stream': stream_stats(),
+        'async_upstream': executor_stats(),
+    })
 
-# Helper với retry
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(2))  # SỬA: stop_after_atempt -> stop_after_attempt
-def _yf_last_and_change(symbol: str):
-    import yfinance as yf
-    ticker = yf.Ticker(symbol)
-    hist = ticker.history(period="2d", interval="1d")
-    if not hist.empty:
-        last = float(hist["Close"].iloc[-1])
-        if len(hist) > 1:
-            prev = float(hist["Close"].iloc[-2])
-            change_pct = round(((last - prev) / prev) * 100, 2) if prev else None
-        else:
-            change_pct = None
-        return {"last": last, "change": change_pct}
-    raise ValueError(f"No data for {symbol}")
-
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(2))  # SỬA: stop_after_atempt -> stop_after_attempt
-def _yf_sparkline(symbol: str, points: int = 20):
-    import yfinance as yf
-    ticker = yf.Ticker(symbol)
-    hist = ticker.history(period="1mo", interval="1d")
-    if not hist.empty:
-        closes = hist["Close"].dropna().tail(points).astype(float).tolist()
-        return closes if closes else None
-    raise ValueError(f"No sparkline for {symbol}")
-
-def get_symbol_data(symbol, timeout=1800):
-    """Get cached symbol data with fallback"""
-    key = f"symbol_{symbol}"  # SỬA: symbol_symbol! -> symbol_{symbol}
-    data = cache.get(key)
-    if data:
-        return data
+# ====================== Quote stream (SSE) ======================
+
+async def quote_stream(request):
+    """
+    Server-sent events: ?symbols=EURUSD=X,GBPUSD=X -> events quote / sparkline / signal
+    khi giá trị đổi. Dùng chung một producer cho mọi connection của worker; chỉ chạy
+    dưới ASGI (config.asgi:application).
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse('Quote stream requires the ASGI server (config.asgi:application)',
+                            status=501, content_type='text/plain')
+
+    broadcaster = get_broadcaster()
     try:
-        data = _yf_last_and_change(symbol)
-        cache.set(key, data, timeout=timeout)
-        return data
-    except Exception as e:
-        logger.error(f"Error getting symbol data for {symbol}: {e}")
-        return {"last": None, "change": None}
-
-def get_multiple_chart_data(pairs=('EURUSD', 'GBPUSD', 'USDJPY', 'USDCHF', 'AUDUSD'), timeout=3600):  # SỬA: dấu ngoặc
-    chart_data = {}
-    for pair in pairs:
-        cache_key = f"chart_data_{pair}"  # SỬA: chart_data_pair! -> chart_data_{pair}
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            chart_data[pair] = cached_data
-            continue
-        try:
-            import yfinance as yf
-            yf_symbol = pair + '=X' if not pair.endswith('=X') else pair
-            ticker = yf.Ticker(yf_symbol)
-            hist = ticker.history(period="30d", interval="1d")
-            if not hist.empty:
-                decimals = 3 if 'JPY' in pair else 5
-                values = [round(float(v), decimals) for v in hist["Close"].tolist()]
-                data = {
-                    "labels": [d.strftime("%Y-%m-%d") for d in hist.index],
-                    "values": values,
-                    "high": round(float(hist["High"].max()), decimals),
-                    "low": round(float(hist["Low"].min()), decimals),
-                    "volume": "High" if hist["Volume"].mean() > 1000000 else "Medium" if "Volume" in hist.columns else "N/A"
-                }
-                chart_data[pair] = data
-                cache.set(cache_key, data, timeout=timeout)
-            else:
-                logger.error(f"No chart data for {pair}")
-                chart_data[pair] = {
-                    "labels": [],
-                    "values": [],
-                    "high": None,
-                    "low": None,
-                    "volume": "N/A"
-                }
-        except Exception as e:
-            logger.error(f"Error getting chart data for {pair}: {e}")
-            chart_data[pair] = {
-                "labels": [],
-                "values": [],
-                "high": None,
-                "low": None,
-                "volume": "N/A"
-            }
-    return chart_data
+        symbols = parse_symbols(request.GET.get('symbols', ''), broadcaster.options['max_symbols'])
+        subscriber = broadcaster.subscribe(symbols, request.META.get('REMOTE_ADDR'))
+    except ValueError as e:
+        return HttpResponse(str(e), status=400, content_type='text/plain')
+    except StreamLimitExceeded as e:
+        response = HttpResponse(str(e), status=503, content_type='text/plain')
+        response['Retry-After'] = str(broadcaster.options['retry_ms'] // 1000)
+        return response
+
+    return EventStreamResponse(broadcaster, subscriber)
+
+# ====================== Trang Home ======================
+
+def _home_symbols():
+    """(chart_pairs, forex symbols, tất cả symbols cần quote) của trang home"""
+    chart_pairs = list(CHART_PAIRS)
+    symbols = [pair + "=X" for pair in chart_pairs]  # SỬA: symbol -> symbols
+    return chart_pairs, symbols, list(HOME_INDICES.values()) + symbols + [RISK_TICKER]
 
 def home(request):
-    indices_symbols = {"DXY": "DX-Y.NYB", "SP500": "^GSPC", "US10Y": "^TNX", "Gold": "GC=F"}  # SỬA: AGSPC -> ^GSPC, ATNX -> ^TNX
+    chart_pairs, symbols, quote_symbols = _home_symbols()
+
+    # Một lần lấy quote cho tất cả indices + forex + VIX
+    quotes = get_symbols_data(quote_symbols)
+    sparklines = get_sparklines(symbols, points=20)
+    all_chart_data = get_multiple_chart_data(chart_pairs)
+    etf_flows = get_etf_flows(ETF_FLOW_TICKERS)
+
+    context = _home_context(quotes, sparklines, all_chart_data, etf_flows)
+    return render(request, "finance_dashboard/home.html", context)
+
+def _home_context(quotes, sparklines, all_chart_data, etf_flows):
+    """Context trang home từ dữ liệu đã lấy (dùng chung cho view sync và async)"""
+    indices_symbols = HOME_INDICES
+    chart_pairs, symbols, _ = _home_symbols()
+
     indices = {}
     for name, sym in indices_symbols.items():
         try:
-            raw = get_symbol_data(sym)  # Sử dụng cached function
+            raw = quotes[sym]
             if name == "US10Y":
                 indices[name] = round(raw["last"] / 10, 2) if raw["last"] else None  # SỬA: row -> raw
             else:
@@ -126,14 +126,11 @@ def home(request):
             logger.error(f"Error fetching {name}: {e}")
             indices[name] = None
 
-    chart_pairs = ['EURUSD', 'GBPUSD', 'USDJPY', 'USDCHF', 'AUDUSD']
-    symbols = [pair + "=X" for pair in chart_pairs]  # SỬA: symbol -> symbols
-
     forex_data = []
     for i, pair in enumerate(symbols):
         try:
-            raw = get_symbol_data(pair)  # Sử dụng cached function
-            history = _yf_sparkline(pair, points=20)
+            raw = quotes[pair]
+            history = sparklines.get(pair)
             decimals = 3 if 'JPY' in chart_pairs[i] else 5
             rounded_last = round(raw["last"], decimals) if raw["last"] is not None else None  # SỬA: row -> raw
             rounded_history = [round(v, decimals) for v in history] if history else []
@@ -152,31 +149,13 @@ def home(request):
                 "history": json.dumps([]),
             })
 
-    all_chart_data = get_multiple_chart_data(chart_pairs)
-    chart = all_chart_data.get('EURUSD', {
-        "labels": [], "values": [], "high": None, "low": None, "volume": "N/A"
-    })
+    chart = all_chart_data.get('EURUSD', empty_chart_data())
 
-    vix_data = get_symbol_data("^VIX")
+    vix_data = quotes[RISK_TICKER]
     risk_on = True if vix_data["last"] and vix_data["last"] < 20 else False
     vix = round(vix_data["last"], 2) if vix_data["last"] else None
 
-    # ETF flows với retry
-    etf_flows = []
-    try:
-        import yfinance as yf
-        for etf in ["SPY", "TLT", "GLD"]:
-            t = yf.Ticker(etf)
-            h = t.history(period="5d", interval="1d")
-            if not h.empty:
-                last_row = h.iloc[-1]  # SỬA: lloc -> iloc
-                approx_flow_m = float((last_row.get("Close", 0) - last_row.get("Open", 0)) * last_row.get("Volume", 0)) / 1_000_000.0
-                etf_flows.append({"name": f"{etf}", "flow": round(approx_flow_m, 2)})  # SỬA: sửa cấu trúc list
-    except Exception as e:
-        logger.error(f"ETF flow error: {e}")
-        etf_flows = [{"name": etf, "flow": None} for etf in ["SPY", "TLT", "GLD"]]  # SỬA: sửa cấu trúc list
-
-    context = {
+    return {
         "indices": indices,
         "forex_data": forex_data,
         "chart": chart,
@@ -186,16 +165,18 @@ def home(request):
         "gold": indices.get("Gold"),
         "us10y": indices.get("US10Y"),
         "etf_flows": etf_flows,
+        "market_freshness": oldest_freshness(
+            [f"symbol_{sym}" for sym in quotes] + [f"chart_data_{pair}" for pair in chart_pairs]
+        ),
     }
-    return render(request, "finance_dashboard/home.html", context)
 
 # ====================== Trang Analysis ==============================
 
-def analysis(request):
-    from .services.analysis_service import AnalysisService  # SỬA: from_services -> from .services
-    analysis_service = AnalysisService()
+# Forex pairs cho technical analysis / Select Pair
+ANALYSIS_PAIRS = ['EURUSD', 'GBPUSD', 'USDJPY', 'USDCHF', 'AUDUSD']
 
-    # Get selected pair and indicator from request
+def _analysis_params(request):
+    """(selected_pair, yf_pair, selected_indicator, selected_macro) từ query string"""
     selected_pair = request.GET.get('pair', 'EURUSD')
     selected_indicator = request.GET.get('indicator', 'RSI_14')
     selected_macro = request.GET.get('macro', 'VIX')
@@ -206,26 +187,38 @@ def analysis(request):
     else:
         yf_pair = selected_pair
     selected_pair = selected_pair.replace('=X', '')
+    return selected_pair, yf_pair, selected_indicator, selected_macro
+
+def analysis(request):
+    from .services.analysis_service import AnalysisService  # SỬA: from_services -> from .services
+    analysis_service = AnalysisService()
+    params = _analysis_params(request)
+    yf_pair = params[1]
 
     # Fetch macro data
     macro_data = analysis_service.get_macro_data()
 
-    # Forex pairs for technical analysis
-    symbols = ['EURUSD', 'GBPUSD', 'USDJPY', 'USDCHF', 'AUDUSD']  # SỬA: symbol -> symbols
-    symbol_yf = [pair + '=X' for pair in symbols]  # SỬA: symbol_yf -> symbol_yf
-
-    # Get technical analysis for selected pair
-    technical_data = analysis_service.get_technical_analysis(yf_pair)
+    # Technical analysis cho selected pair + tất cả pairs (một lần download cho các pair chưa cache)
+    technical_by_pair = analysis_service.get_technical_analyses([yf_pair] + [pair + '=X' for pair in ANALYSIS_PAIRS])
 
     # Get gainers/losers data
     gainers_losers = analysis_service.get_forex_gainers_losers()
 
+    context = _analysis_context(analysis_service, params, macro_data, technical_by_pair, gainers_losers)
+    return render(request, "finance_dashboard/analysis.html", context)
+
+def _analysis_context(analysis_service, params, macro_data, technical_by_pair, gainers_losers):
+    """Context trang analysis từ dữ liệu đã lấy (dùng chung cho view sync và async)"""
+    from .services.analysis_service import macro_cache_keys
+    from .services.analysis_fragments import macro_fragments, technical_fragment
+    selected_pair, yf_pair, selected_indicator, selected_macro = params
+
+    symbols = ANALYSIS_PAIRS  # SỬA: symbol -> symbols
+    symbol_yf = [pair + '=X' for pair in symbols]  # SỬA: symbol_yf -> symbol_yf
+    technical_data = technical_by_pair.get(yf_pair)
+
     # Generate signals and alerts - get technical data for all pairs
-    technical_data_list = []
-    for pair in symbol_yf:  # SỬA: symbol_vf -> symbol_yf
-        tech_data = analysis_service.get_technical_analysis(pair)
-        if tech_data:
-            technical_data_list.append(tech_data)
+    technical_data_list = [technical_by_pair[pair] for pair in symbol_yf if technical_by_pair.get(pair)]  # SỬA: symbol_vf -> symbol_yf
 
     signals_alerts = analysis_service.generate_signals_alerts(macro_data, technical_data_list)
 
@@ -239,9 +232,13 @@ def analysis(request):
                 'signal': data['signal']
             })
 
-    context = {
-        'macro_data': json.dumps(macro_data) if macro_data else '{}',
-        'technical_data': json.dumps(technical_data) if technical_data else '{}',
+    # JSON cho JS dùng chung fragments (đã encode sẵn) với analysis_ajax
+    macro_json = join(macro_fragments(analysis_service)).decode()
+    technical_json = technical_fragment(analysis_service, yf_pair)
+
+    return {
+        'macro_data': macro_json if macro_data else '{}',
+        'technical_data': technical_json.text() if not technical_json.is_null else '{}',
         'macro_summary': macro_summary,
         'signals_alerts': signals_alerts,
         'gainers_losers': gainers_losers,
@@ -250,74 +247,105 @@ def analysis(request):
         'selected_macro': selected_macro,
         'symbols': symbols,  # SỬA: symbol -> symbols
         'forex_pairs': symbols,  # Thêm danh sách pairs cho Select Pair
-        'available_indicators': ['SMA_20', 'SMA_50', 'RSI_14', 'MACD_12_26_9', 'BBU_20_2.0', 'STOCHk_14_3_3', 'ATRr_14'],
+        'available_indicators': display_indicators(),
         'macro_indicators': list(macro_data.keys()) if macro_data else [],
         'macro_data_raw': macro_data,
-        'technical_data_raw': technical_data
+        'technical_data_raw': technical_data,
+        'market_freshness': oldest_freshness(list(macro_cache_keys().values()) + [f"technical_{yf_pair}_3mo"]),
     }
-    return render(request, "finance_dashboard/analysis.html", context)
+
+def _analysis_ajax_version(request):
+    """Bars của pair được chọn + các pairs cho signals, và macro tiles"""
+    from .services.analysis_fragments import SIGNAL_PAIRS
+    from .services.analysis_service import macro_version
+    yf_pair = _analysis_params(request)[1]
+    return combine(
+        bars_version([yf_pair, *SIGNAL_PAIRS], "3mo"),
+        DataVersion(macro_version()),
+        extra=(request.GET.urlencode(),),
+    )
+
+def _ajax_macro_fragments(analysis_service):
+    from .services.analysis_fragments import macro_fragments
+    try:
+        return macro_fragments(analysis_service)
+    except Exception as macro_error:
+        logger.error(f"Error fetching macro data: {macro_error}")  # SỬA: {macro_error} -> {macro_error}
+        return None
+
+def _ajax_signals_fragment(analysis_service, versions):
+    from .services.analysis_fragments import signals_fragment
+    try:
+        return signals_fragment(analysis_service, versions)
+    except Exception as signals_error:
+        logger.error(f"Error generating signals: {signals_error}")  # SỬA: {signals_error} -> {signals_error}
+        return None
+
+def _analysis_ajax_data(params, technical_data, macro_tiles, signals):
+    """
+    Response của analysis_ajax ghép từ các JSON fragments đã encode sẵn (cache theo
+    version dữ liệu: cửa sổ bars cho technical/signals, refreshed_at cho macro).
+    technical_data / macro_tiles None = không được yêu cầu (hoặc lỗi).
+    """
+    from .services.analysis_service import macro_cache_keys
+    pair, yf_pair, _, macro_indicator = params
+    response_data = {}
+
+    # Get technical data if pair is requested
+    if technical_data is not None:
+        if not technical_data.is_null:
+            logger.info(f"Technical data retrieved successfully for {yf_pair}")
+            response_data['technical'] = technical_data
+            response_data['success'] = True
+        else:
+            logger.warning(f"No technical data available for {yf_pair}")
+            response_data['error'] = f'No technical data available for {pair}'
+            response_data['success'] = False
+
+    # Get macro data if macro indicator is requested
+    if macro_tiles is not None:
+        response_data['macro'] = {
+            'indicator': macro_indicator,
+            'data': macro_tiles.get(macro_indicator, {}),
+            'full_data': macro_tiles
+        }
+
+    # Updated signals for Signals & Alerts tab
+    if signals is not None and response_data.get('success', False):
+        response_data['signals'] = signals
+
+    # Freshness (age, source, refreshed_at) của từng payload
+    response_data['freshness'] = {
+        'macro': oldest_freshness(macro_cache_keys().values()),
+        'technical': get_freshness([f"technical_{yf_pair}_3mo"]).get(f"technical_{yf_pair}_3mo"),
+    }
+    return response_data
 
 # AJAX endpoint for dynamic analysis updates
+@conditional(_analysis_ajax_version)
 def analysis_ajax(request):
     """AJAX endpoint for updating analysis data without page reload"""
     if request.method == 'GET':
-        from .services.analysis_service import AnalysisService
+        from .services.analysis_service import AnalysisService, SIGNAL_INDICATORS
+        from .services.analysis_fragments import SIGNAL_PAIRS, indicator_fragment
         analysis_service = AnalysisService()
 
-        # Get parameters
-        pair = request.GET.get('pair', 'EURUSD')
-        indicator = request.GET.get('indicator', 'RSI_14')
-        macro_indicator = request.GET.get('macro', 'VIX')
+        params = _analysis_params(request)
+        pair, yf_pair, indicator, macro_indicator = params
         logger.info(f"AJAX request - pair: {pair}, indicator: {indicator}")
 
-        # Add =X suffix for yfinance if not present
-        if not pair.endswith('=X'):  # SỬA: ; -> :
-            yf_pair = pair + '=X'
-        else:
-            yf_pair = pair
-            pair = pair.replace('=X', '')
-        
-        response_data = {}
         try:
-            # Get technical data if pair is requested
+            versions = analysis_service.bar_versions([yf_pair, *SIGNAL_PAIRS])
+            technical_data = macro_tiles = signals = None
             if pair:
                 logger.info(f"Fetching technical data for {yf_pair}")
-                technical_data = analysis_service.get_technical_analysis(yf_pair)
-                if technical_data:
-                    logger.info(f"Technical data retrieved successfully for {yf_pair}")
-                    response_data['technical'] = technical_data
-                    response_data['success'] = True
-                else:
-                    logger.warning(f"No technical data available for {yf_pair}")
-                    response_data['error'] = f'No technical data available for {pair}'
-                    response_data['success'] = False
-
-            # Get macro data if macro indicator is requested
+                # Chỉ tính indicator được chọn + các indicator cho signals
+                technical_data = indicator_fragment(analysis_service, yf_pair, [indicator, *SIGNAL_INDICATORS], versions)
             if macro_indicator:
-                try:
-                    macro_data = analysis_service.get_macro_data()
-                    response_data['macro'] = {
-                        'indicator': macro_indicator,
-                        'data': macro_data.get(macro_indicator, {}),
-                        'full_data': macro_data
-                    }
-                except Exception as macro_error:
-                    logger.error(f"Error fetching macro data: {macro_error}")  # SỬA: {macro_error} -> {macro_error}
-
-            # Generate updated signals for Signals & Alerts tab
-            if pair and response_data.get('success', False):
-                try:
-                    symbol_yf = ['EURUSD=X', 'GBPUSD=X', 'USDJPY=X', 'USDCHF=X', 'AUDUSD=X']
-                    technical_data_list = []
-                    for symbol in symbol_yf:
-                        tech_data = analysis_service.get_technical_analysis(symbol)
-                        if tech_data:
-                            technical_data_list.append(tech_data)
-                    macro_data = analysis_service.get_macro_data()
-                    signals_alerts = analysis_service.generate_signals_alerts(macro_data, technical_data_list)
-                    response_data['signals'] = signals_alerts
-                except Exception as signals_error:
-                    logger.error(f"Error generating signals: {signals_error}")  # SỬA: {signals_error} -> {signals_error}
+                macro_tiles = _ajax_macro_fragments(analysis_service)
+            if technical_data is not None and not technical_data.is_null:
+                signals = _ajax_signals_fragment(analysis_service, versions)
+            response_data = _analysis_ajax_data(params, technical_data, macro_tiles, signals)
 
         except Exception as e:
             logger.error(f"Error in analysis_ajax: {e}")  # SỬA: {e} -> {e}
@@ -327,7 +355,7 @@ def analysis_ajax(request):
             }
 
         logger.info(f"AJAX response: {list(response_data.keys())}")  # SỬA: response_data.keys() -> list(response_data.keys())
-        return JsonResponse(response_data)
+        return FragmentResponse(response_data)
     
     return JsonResponse({'error': 'Invalid request method'}, status=405)  # SỬA: thiếu dấu '
 
@@ -341,21 +369,13 @@ def details(request, symbol=None):
     trades = Trade.objects.filter(symbol=symbol).order_by("-date") if symbol else []
 
     # --- Tính các metrics cơ bản ---
-    if symbol and trades.exists():
-        # Tính toán metrics từ trades
-        total_trades = trades.count()
-        
-        winning_trades = 0
-        losing_trades = 0
-        total_pnl = 0
-        
-        for trade in trades:
-            pnl_value = float(trade.pnl)
-            total_pnl += pnl_value
-            if pnl_value > 0:
-                winning_trades += 1
-            elif pnl_value < 0:
-                losing_trades += 1
+    # Tính toán metrics trong một aggregate query (PnL annotate trong DB)
+    summary = trades.pnl_summary() if symbol else None
+    if summary and summary["total_trades"]:
+        total_trades = summary["total_trades"]
+        winning_trades = summary["wins"]
+        losing_trades = summary["losses"]
+        total_pnl = float(summary["net_pnl"] or 0)
 
         win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
         avg_pnl = total_pnl / total_trades if total_trades > 0 else 0
@@ -413,52 +433,65 @@ def details(request, symbol=None):
 
 # ====================== Trang Insights ====================
 
+def _next_page_url(request, page):
+    """URL trang sau: giữ các filter hiện tại, thay cursor (None nếu hết)"""
+    if not page.has_next:
+        return None
+    params = request.GET.copy()
+    params.pop('page', None)
+    params['cursor'] = page.next_cursor
+    return f"{request.path}?{params.urlencode()}"
+
+
+def filter_insights(q="", category="", result="", date_from=None, date_to=None, tag=""):
+    """Insights mới nhất trước (có q: liên quan nhất trước), lọc như trang insights / search_insights"""
+    insights_qs = Insight.objects.order_by('-date')
+
+    if q:
+        # Full-text index (FTS5 / tsvector), xếp theo relevance
+        insights_qs = search_insights_text(insights_qs, q)
+    if category:
+        insights_qs = insights_qs.filter(category=category)
+    if result:
+        insights_qs = insights_qs.filter(result=result)
+    if date_from:
+        insights_qs = insights_qs.filter(date__gte=date_from)
+    if date_to:
+        insights_qs = insights_qs.filter(date__lte=date_to)
+    if tag:
+        insights_qs = insights_qs.filter(normalized_tags__name=normalize_tag(tag))
+    return insights_qs
+
 def insights(request):
     form = InsightSearchForm(request.GET or None)
     insights_qs = Insight.objects.order_by('-date')
 
     if form.is_valid():
-        q = form.cleaned_data.get('q')
-        result = form.cleaned_data.get('result')
-        date_from = form.cleaned_data.get('date_from')
-        date_to = form.cleaned_data.get('date_to')
-        
         # THÊM FILTER CATEGORY
         category = request.GET.get('category', '')
-        
-        if q:
-            insights_qs = insights_qs.filter(
-                Q(title__icontains=q) |
-                Q(summary__icontains=q) |
-                Q(reason__icontains=q) |
-                Q(analysis__icontains=q) |
-                Q(lessons__icontains=q) |
-                Q(tags__icontains=q)
-            )
-
-        # FILTER THEO CATEGORY
-        if category and category != "All":
-            insights_qs = insights_qs.filter(category=category)
-
-        if result:
-            insights_qs = insights_qs.filter(result=result)
-
-        if date_from:
-            insights_qs = insights_qs.filter(date__gte=date_from)
-
-        if date_to:
-            insights_qs = insights_qs.filter(date__lte=date_to)
+        insights_qs = filter_insights(
+            q=form.cleaned_data.get('q'),
+            category=category if category != "All" else "",
+            result=form.cleaned_data.get('result'),
+            date_from=form.cleaned_data.get('date_from'),
+            date_to=form.cleaned_data.get('date_to'),
+            tag=request.GET.get('tag', ''),
+        )
 
-    # Phân trang
-    paginator = Paginator(insights_qs, 6)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Phân trang keyset (date, id); trang sau được nạp bằng infinite scroll (HTMX)
+    page = paginate(insights_qs.prefetch_related('normalized_tags'), request.GET.get('cursor'), 6,
+                    ranked=is_ranked(insights_qs))
+    context = {'page': page, 'next_url': _next_page_url(request, page)}
+    if request.GET.get('cursor'):
+        return render(request, "finance_dashboard/partials/_insight_cards.html", context)
 
-    context = {
+    context.update({
         'form': form,
-        'page_obj': page_obj,
+        'total': capped_count(insights_qs),
         'insight_form': InsightForm(),
-    }
+        'tag_counts': tag_counts()[:30],
+        'active_tag': normalize_tag(request.GET.get('tag', '')),
+    })
 
     return render(request, "finance_dashboard/insights.html", context)
 
@@ -468,19 +501,54 @@ def about(request):
 # ====================== Trang Portfolio ============================
 
 
+def _trades_prefetch(trade_type_filter):
+    """Prefetch trades của portfolio (lọc theo trade_type) cùng ref_insight trong một query"""
+    trades = Trade.objects.select_related("ref_insight")
+    if trade_type_filter != "All":
+        trades = trades.filter(trade_type=trade_type_filter)
+    return Prefetch("trades", queryset=trades, to_attr="filtered_trades")
+
+
+def _insight_ref_id(ref):
+    """ID trong ref dạng "Insight #<id>" (None nếu không phải)"""
+    if not ref or 'Insight #' not in ref:
+        return None
+    insight_id = ref.replace('Insight #', '').strip()
+    return int(insight_id) if insight_id.isdigit() else None
+
+
+def link_ref_insights(trades):
+    """
+    trade.ref_insight theo ref "Insight #<id>" (như trước: chỉ ref quyết định, không lưu lại).
+    Ref không có "Insight #<id>" hoặc insight đã bị xóa -> None.
+    Ref đã migrate sang FK (0022) -> không query; ref lệch FK -> một in_bulk cho tất cả.
+    """
+    pending = []
+    for trade in trades:
+        insight_id = _insight_ref_id(trade.ref)
+        if insight_id is None:
+            trade.ref_insight = None
+        elif insight_id != trade.ref_insight_id:
+            pending.append((trade, insight_id))
+    if pending:
+        insights = Insight.objects.in_bulk({insight_id for _, insight_id in pending})
+        for trade, insight_id in pending:
+            trade.ref_insight = insights.get(insight_id)
+
+
 def portfolio(request):
     trade_type_filter = request.GET.get("type", "All")
     
     # Xử lý cho cả user đã login và khách
     if request.user.is_authenticated:
-        portfolios = Portfolio.objects.filter(user=request.user).prefetch_related("trades")
+        portfolios = Portfolio.objects.filter(user=request.user).prefetch_related(_trades_prefetch(trade_type_filter))
         if not portfolios.exists():
             messages.warning(request, "No portfolios found. Please create a portfolio first.")
     else:
         # CHO KHÁCH: Hiển thị portfolio public với xử lý lỗi
         try:
             # Thử filter theo is_public=True
-            portfolios = Portfolio.objects.filter(is_public=True).prefetch_related("trades")
+            portfolios = Portfolio.objects.filter(is_public=True).prefetch_related(_trades_prefetch(trade_type_filter))
             if not portfolios.exists():
                 portfolios = Portfolio.objects.none()
                 messages.info(request, "No public portfolios available. Log in to create your own portfolio.")
@@ -516,26 +584,8 @@ def portfolio(request):
     else:
         analytics_data = {}
 
-    # Chuẩn bị trades theo filter
-    for p in portfolios:
-        trades = p.trades.all()
-        if trade_type_filter != "All":
-            trades = trades.filter(trade_type=trade_type_filter)
-        p.filtered_trades = trades
-
-    # Gán trade.ref_insight cho template
-    for portfolio in portfolios:
-        for trade in portfolio.filtered_trades:
-            trade.ref_insight = None
-            if trade.ref and 'Insight #' in trade.ref:
-                try:
-                    insight_id = trade.ref.replace('Insight #', '').strip()
-                    # CHỈ LẤY INSIGHT NẾU insight_id LÀ SỐ
-                    if insight_id.isdigit():
-                        trade.ref_insight = Insight.objects.filter(id=int(insight_id)).first()
-                except (ValueError, TypeError) as e:
-                    logger.warning(f"Error parsing insight ID from ref '{trade.ref}': {e}")
-                    trade.ref_insight = None
+    # Chuẩn bị trades theo filter: trades đã prefetch (to_attr filtered_trades) kèm ref_insight
+    link_ref_insights(trade for p in portfolios for trade in p.filtered_trades)
 
     return render(
         request,
@@ -550,66 +600,10 @@ def portfolio(request):
     )
 
 def compute_portfolio_analytics(portfolios):
-    analytics_data = []
-
+    """Analytics đã materialize (PortfolioAnalytics): O(1) mỗi portfolio, không đọc trades"""
     if not portfolios.exists():
-        analytics_data.append({
-            "total_trades": 0,
-            "win_rate": 0,
-            "expectancy": 0,
-            "net_pnl": 0,
-            "max_drawdown": 0,
-            "avg_risk": 0,
-        })
-        return analytics_data
-
-    for portfolio in portfolios:
-        trades = portfolio.trades.all().order_by("date")
-        total_trades = trades.count()
-
-        if total_trades > 0:
-            pnl_list = [float(t.pnl or 0) for t in trades]
-            wins = [p for p in pnl_list if p > 0]
-            losses = [p for p in pnl_list if p < 0]
-
-            net_pnl = sum(pnl_list)
-            win_rate = (len(wins) / total_trades * 100) if total_trades else 0
-            expectancy = (np.mean(wins) if wins else 0) - (np.mean(losses) if losses else 0)
-
-            equity = float(portfolio.amount)
-            peak = equity
-            max_dd = 0.0
-            for p in pnl_list:
-                equity += p
-                peak = max(peak, equity)
-                dd = (equity - peak) / peak if peak != 0 else 0.0
-                if dd < max_dd:
-                    max_dd = dd
-
-            risks = [float(t.risk) for t in trades if t.risk is not None]
-            avg_risk = float(np.mean(risks)) if risks else 0.0
-
-            analytics = {
-                "total_trades": total_trades,
-                "win_rate": round(win_rate, 2),
-                "expectancy": round(expectancy, 2),
-                "net_pnl": round(net_pnl, 2),
-                "max_drawdown": round(max_dd * 100, 2),
-                "avg_risk": round(avg_risk, 2),
-            }
-        else:
-            analytics = {
-                "total_trades": 0,
-                "win_rate": 0,
-                "expectancy": 0,
-                "net_pnl": 0,
-                "max_drawdown": 0,
-                "avg_risk": 0,
-            }
-
-        analytics_data.append(analytics)
-
-    return analytics_data
+        return [dict(EMPTY_ANALYTICS)]
+    return portfolio_analytics(portfolios)
 
 # ================= CRUD cho Insight ==========================
 
@@ -678,7 +672,7 @@ def create_insight_for_portfolio(request, portfolio_id):
 
             # Link ngược lại để Portfolio có "Linked Insight"
             portfolio.ref_insight = insight
-            portfolio.save(update_fields=["ref_insight"])  # SỬA: uodate_fields -> update_fields
+            portfolio.save(update_fields=["ref_insight", "updated_at"])  # SỬA: uodate_fields -> update_fields
 
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return JsonResponse({'success': True, 'insight_id': insight.id})
@@ -758,10 +752,19 @@ def delete_insight(request, insight_id):
     
     return JsonResponse({'success': False, 'errors': 'Invalid request method'})
 
+def _search_insights_version(request):
+    # Query string (q, filters, cursor) + max(updated_at) của portfolios
+    return combine(
+        queryset_version(Insight.objects.all()),
+        queryset_version(Portfolio.objects.all()),
+        extra=(request.user.pk, request.GET.urlencode()),
+    )
+
+@conditional(_search_insights_version)
 def search_insights(request):
     """
     Search nội trang cho trang Insights (HTML).
-    Trả về HTML của partials/_insight_list.html, có phần trang (6 items/trang).
+    Trả về HTML của partials/_insight_list.html, 6 items/trang theo keyset cursor (infinite scroll).
     """
     logger.debug("Request GET params: %s", request.GET)
 
@@ -770,35 +773,21 @@ def search_insights(request):
     result = request.GET.get("result", "")
     date_from = request.GET.get("date_from", "")
     date_to = request.GET.get("date_to", "")
+    tag = request.GET.get("tag", "")
 
-    insights_qs = Insight.objects.order_by('-date')
-
-    if q:
-        insights_qs = insights_qs.filter(
-            Q(title__icontains=q) |
-            Q(summary__icontains=q) |
-            Q(reason__icontains=q) |
-            Q(analysis__icontains=q) |
-            Q(lessons__icontains=q) |
-            Q(tags__icontains=q)
-        )
-
-    if category:
-        insights_qs = insights_qs.filter(category=category)
-    if result:
-        insights_qs = insights_qs.filter(result=result)
-    if date_from:
-        insights_qs = insights_qs.filter(date__gte=date_from)
-    if date_to:
-        insights_qs = insights_qs.filter(date__lte=date_to)
+    insights_qs = filter_insights(q, category, result, date_from, date_to, tag)
 
-    paginator = Paginator(insights_qs, 6)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    cursor = request.GET.get("cursor")
+    page = paginate(insights_qs.prefetch_related("normalized_tags"), cursor, 6, ranked=is_ranked(insights_qs))
+    context = {"page": page, "next_url": _next_page_url(request, page)}
+    if cursor:
+        # Trang sau: chỉ cards + sentinel, thay vào chỗ sentinel cũ
+        return render(request, "finance_dashboard/partials/_insight_list_items.html", context)
 
+    context["total"] = capped_count(insights_qs)
     html = render_to_string(
         "finance_dashboard/partials/_insight_list.html",
-        {"page_obj": page_obj},
+        context,
         request=request
     )
     return HttpResponse(html)
@@ -850,10 +839,11 @@ def trade_insight_modal(request, trade_id):
 
             # Link back
             trade.portfolio.ref_insight = insight
-            trade.portfolio.save(update_fields=["ref_insight"])
+            trade.portfolio.save(update_fields=["ref_insight", "updated_at"])
 
             trade.ref = f"Insight #{insight.id}"  # SỬA: Insight -> insight
-            trade.save(update_fields=["ref"])
+            trade.ref_insight = insight
+            trade.save(update_fields=["ref", "ref_insight", "updated_at"])
 
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':  # SỬA: Wi++{ -> With
                 return JsonResponse({'success': True, 'insight_id': insight.id})
@@ -885,165 +875,127 @@ def trade_insight_modal(request, trade_id):
 
 # ====================== TRADES FILTER (ALL / LIVE / BACKTEST) ====================
 
+TRADES_PER_PAGE = 50
+
+def _filtered_trades(trade_type):
+    trades = Trade.objects.all().order_by("-date")
+    if trade_type in ["Live", "Backtest"]:
+        trades = trades.filter(trade_type=trade_type)
+    return trades
+
+def _filter_trades_version(request, trade_type=None):
+    # Query string (cursor) + portfolios (tên portfolio trong bảng trades)
+    return combine(
+        queryset_version(_filtered_trades(trade_type)),
+        queryset_version(Portfolio.objects.all()),
+        extra=(request.user.pk, request.GET.urlencode()),
+    )
+
+@conditional(_filter_trades_version)
 def filter_trades(request, trade_type=None):
     """
     Lọc trades theo loại: Live / Backtest / All (optional endpoint nếu bạn muốn hook với HTMX).
-    Template gợi ý: finance_dashboard/partials/trade_table.html
+    Template: finance_dashboard/partials/trade_table.html, TRADES_PER_PAGE trades/trang theo keyset cursor.
     """
-    trades = Trade.objects.all().order_by("-date")
-    if trade_type in ["Live", "Backtest"]:
-        trades = trades.filter(trade_type=trade_type)
-    return render(request, "finance_dashboard/partials/trade_table.html", {"trades": trades})
+    trades = _filtered_trades(trade_type)
+    cursor = request.GET.get("cursor")
+    page = paginate(trades.select_related("portfolio").with_pnl(), cursor, TRADES_PER_PAGE)
+    context = {"page": page, "next_url": _next_page_url(request, page)}
+    if cursor:
+        return render(request, "finance_dashboard/partials/_trade_rows.html", context)
+    context["total"] = capped_count(trades)
+    return render(request, "finance_dashboard/partials/trade_table.html", context)
+
+def _export_date(value):
+    """YYYY-MM-DD -> date; trống -> None; sai -> ValueError"""
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f"Invalid date: {value}")
+    return parsed
 
-def get_real_search_data(symbol, symbol_type='forex'):
-    """Get real data for search results using yfinance"""
+@login_required
+def export_trades(request):
+    """
+    Stream trades của user (CSV / Parquet) kèm pnl, risk, equity / drawdown theo portfolio.
+    ?format=csv|parquet, filter như trang portfolio: type, portfolio, symbol, date_from, date_to.
+    """
+    export_format = request.GET.get("format", "csv")
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponse(f"Unknown export format: {export_format}", status=400, content_type='text/plain')
+    portfolio_id = request.GET.get("portfolio", "")
+    if portfolio_id and not portfolio_id.isdigit():
+        return HttpResponse(f"Invalid portfolio: {portfolio_id}", status=400, content_type='text/plain')
     try:
-        import yfinance as yf
-        # Add proper suffix for yfinance
-        if symbol_type == 'forex' and not symbol.endswith('=X'):
-            yf_symbol = symbol + '=X'
-        else:
-            yf_symbol = symbol
-
-        ticker = yf.Ticker(yf_symbol)
-        hist = ticker.history(period="5d", interval="1d")
-        if not hist.empty:
-            last = float(hist["Close"].iloc[-1])
-            if len(hist) > 1:
-                prev = float(hist["Close"].iloc[-2])
-                change = round(((last - prev) / prev) * 100, 2) if prev else 0  # SỬA: thiếu dấu )
-            else:
-                change = 0
-
-            history = hist["Close"].astype(float).tolist()[-5:]  # Last 5 days
-
-            # Estimate volume category based on recent volume
-            avg_volume = hist["Volume"].mean() if "Volume" in hist.columns else 0
-            if avg_volume > 1000000:
-                volume = 'High'
-            elif avg_volume > 100000:
-                volume = 'Medium'
-            else:
-                volume = 'Low'
-
-            return {
-                'last': round(last, 4 if symbol_type == 'forex' else 2),
-                'change': change,
-                'history': history,
-                'volume': volume
-            }
-    except Exception as e:
-        logger.warning("Real search data error for %s: %s", symbol, e)
-
-    # Fallback data
-    return {
-        'last': 0.0,
-        'change': 0.0,
-        'history': [0.0] * 5,
-        'volume': 'N/A'
-    }
+        date_from, date_to = _export_date(request.GET.get("date_from")), _export_date(request.GET.get("date_to"))
+    except ValueError as e:
+        return HttpResponse(str(e), status=400, content_type='text/plain')
+
+    trades = export_queryset(
+        request.user,
+        trade_type=request.GET.get("type", "All"),
+        portfolio_id=portfolio_id or None,
+        symbol=request.GET.get("symbol", "").strip() or None,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    try:
+        chunks = export_chunks(trades, export_format)
+    except ExportUnavailable as e:
+        return HttpResponse(str(e), status=501, content_type='text/plain')
+    filename = f"trades-{timezone.localdate():%Y%m%d}"
+    return streaming_response(chunks, export_format, filename, asynchronous=isinstance(request, ASGIRequest))
+
+def _search_matches(query):
+    """[(symbol, 'forex' | 'stock')] chứa ``query``"""
+    if not query:
+        return []
+    matches = [(symbol, 'forex') for symbol in FOREX_SYMBOLS if query in symbol]
+    matches += [(symbol, 'stock') for symbol in STOCK_SYMBOLS if query in symbol]
+    return matches
+
+def _search_version(request):
+    query = request.GET.get('query', '').upper()
+    symbols = [search_yf_symbol(symbol, symbol_type) for symbol, symbol_type in _search_matches(query)]
+    if not symbols:
+        return combine(extra=(query,))
+    return combine(bars_version(symbols, "5d"), extra=(query,))
 
+@conditional(_search_version)
 def search_view(request):
     query = request.GET.get('query', '').upper()
+    # Search forex pairs + stocks, lấy data trong một lần
+    matches = _search_matches(query)
+    data = get_real_search_data_many(matches) if matches else {}
+    return HttpResponse(_search_html(query, matches, data))
 
-    # Define supported symbols
-    forex_symbols = ['EURUSD', 'GBPUSD', 'USDJPY', 'USDCHF', 'AUDUSD', 'USDCAD', 'NZDUSD']
-    stock_symbols = ['AAPL', 'GOOGL', 'MSFT', 'TSLA', 'AMZN', 'NVDA', 'META']
+def _search_html(query, matches, data):
     results = []
+    for symbol, symbol_type in matches:
+        results.append({
+            'pair': symbol,
+            'data': data[symbol],
+            'type': 'Forex' if symbol_type == 'forex' else 'Stock'
+        })
+    return render_to_string('finance_dashboard/search_results.html', {'results': results, 'query': query})
 
-    if query:
-        # Search forex pairs
-        for symbol in forex_symbols:
-            if query in symbol:
-                data = get_real_search_data(symbol, 'forex')
-                results.append({
-                    'pair': symbol,
-                    'data': data,
-                    'type': 'Forex'
-                })
-
-        # Search stocks
-        for symbol in stock_symbols:
-            if query in symbol:
-                data = get_real_search_data(symbol, 'stock')
-                results.append({
-                    'pair': symbol,
-                    'data': data,
-                    'type': 'Stock'
-                })
-
-    html = render_to_string('finance_dashboard/search_results.html', {'results': results, 'query': query})
-    return HttpResponse(html)
-
-def get_real_chart_data(symbol):
-    """Get real chart data using yfinance"""
-    try:
-        import yfinance as yf
-        # Determine if it's forex or stock
-        forex_symbols = ['EURUSD', 'GBPUSD', 'USDJPY', 'USDCHF', 'AUDUSD', 'USDCAD', 'NZDUSD']
-        is_forex = symbol in forex_symbols
-
-        # Add proper suffix for yfinance
-        if is_forex and not symbol.endswith('=X'):
-            yf_symbol = symbol + '=X'
-        else:
-            yf_symbol = symbol
-
-        ticker = yf.Ticker(yf_symbol)
-        hist = ticker.history(period="30d", interval="1d")
-        if not hist.empty:
-            labels = [d.strftime("%Y-%m-%d") for d in hist.index]
-            values = hist["Close"].astype(float).tolist()
-            high = float(hist["High"].max())
-            low = float(hist["Low"].min())
-
-            # Get current price and change
-            last = float(hist["Close"].iloc[-1])
-            if len(hist) > 1:
-                prev = float(hist["Close"].iloc[-2])
-                change = round(((last - prev) / prev) * 100, 2) if prev else 0  # SỬA: thiếu dấu )
-            else:
-                change = 0
-
-            # Estimate volume category
-            avg_volume = hist["Volume"].mean() if "Volume" in hist.columns else 0
-            if avg_volume > 1000000:
-                volume = 'High'
-            elif avg_volume > 100000:
-                volume = 'Medium'
-            else:
-                volume = 'Low'
-
-            return {
-                'chart_data': {
-                    'labels': labels,
-                    'values': values,
-                    'high': round(high, 4 if is_forex else 2),
-                    'low': round(low, 4 if is_forex else 2),
-                    'volume': volume
-                },
-                'details': {
-                    'last': round(last, 4 if is_forex else 2),
-                    'change': change,
-                    'history': values[-5:],  # Last 5 days
-                    'volume': volume
-                }
-            }
-    except Exception as e:
-        logger.warning("Real chart data error for %s: %s", symbol, e)
-    return None
+def _chart_version(request, symbol):
+    return bars_version([chart_yf_symbol(symbol)], "30d")
 
+@conditional(_chart_version)
 def chart_view(request, symbol):
-    real_data = get_real_chart_data(symbol)
+    return HttpResponse(_chart_html(symbol, get_real_chart_data(symbol)))
+
+def _chart_html(symbol, real_data):
     if not real_data:
-        return HttpResponse('<div class="alert alert-danger mt-3">Chart not available for this symbol.</div>')
+        return '<div class="alert alert-danger mt-3">Chart not available for this symbol.</div>'
 
-    html = render_to_string('finance_dashboard/chart_fragment.html', {
+    return render_to_string('finance_dashboard/chart_fragment.html', {
         'symbol': symbol,
         'chart_data': real_data['chart_data'],
         'details': real_data['details']
     })
-    return HttpResponse(html)
 
 def get_symbol_choices(request):
     """AJAX endpoint để lấy symbol choices theo category - LẤY TỪ DATABASE"""